@@ -2,16 +2,20 @@ import json
 import logging
 from typing import Optional
 
-import psycopg2
 from config import DATABASE_URL
+from db_pool import get_pool
 from psycopg2.extras import DictCursor
 
 logger = logging.getLogger(__name__)
 
 
 def get_db_connection():
-    """Get a database connection."""
-    return psycopg2.connect(DATABASE_URL)
+    """Get a pooled database connection.
+
+    Use it like a psycopg2 connection; leaving `with conn:` or calling
+    `conn.close()` returns it to the pool.
+    """
+    return get_pool(DATABASE_URL).connect()
 
 
 def get_hot_wallets(cur, base):
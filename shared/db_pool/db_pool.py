@@ -0,0 +1,180 @@
+"""
+Shared psycopg2 connection pool of walletmonitor, walletmon and exchange_monitor.
+
+Settings come from the environment:
+    DB_POOL_MIN                minimum open connections (default 1)
+    DB_POOL_MAX                maximum open connections (default 10)
+    DB_STATEMENT_TIMEOUT_MS    per-statement timeout, 0 disables (default 0)
+    DB_HEALTH_CHECK_SEC        idle time after which a checkout runs SELECT 1 (default 30)
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import psycopg2
+from psycopg2 import pool as pg_pool
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """Thread-safe connection pool with bounded size and checkout health checks.
+
+    Checkouts block (up to `checkout_timeout` seconds) while `maxconn`
+    connections are in use. Connections idle for more than
+    `health_check_sec` are tested with `SELECT 1` and replaced if broken.
+    Returned connections are rolled back if a transaction was left open.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        minconn: int = 1,
+        maxconn: int = 10,
+        statement_timeout_ms: int = 0,
+        health_check_sec: float = 30.0,
+        checkout_timeout: float = 30.0,
+    ):
+        maxconn = max(1, maxconn)
+        minconn = max(0, min(minconn, maxconn))
+        kwargs = {}
+        if statement_timeout_ms > 0:
+            kwargs["options"] = f"-c statement_timeout={statement_timeout_ms}"
+        self._pool = pg_pool.ThreadedConnectionPool(minconn, maxconn, dsn, **kwargs)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._last_used: Dict[int, float] = {}
+        self.health_check_sec = health_check_sec
+        self.checkout_timeout = checkout_timeout
+        self.maxconn = maxconn
+
+    def _is_healthy(self, conn) -> bool:
+        if conn.closed:
+            return False
+        last_used = self._last_used.get(id(conn))
+        if last_used is not None and time.monotonic() - last_used < self.health_check_sec:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error as e:
+            logger.warning(f"Discarding broken database connection: {e}")
+            return False
+
+    def getconn(self):
+        """Check out a healthy connection; return it with `putconn`."""
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            raise pg_pool.PoolError(
+                f"No database connection available after {self.checkout_timeout}s"
+            )
+        try:
+            conn = self._pool.getconn()
+            if not self._is_healthy(conn):
+                self._pool.putconn(conn, close=True)
+                conn = self._pool.getconn()
+            return conn
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn) -> None:
+        """Return a connection, rolling back any open transaction."""
+        try:
+            if not conn.closed and conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            if conn.closed:
+                self._last_used.pop(id(conn), None)
+            else:
+                self._last_used[id(conn)] = time.monotonic()
+            self._pool.putconn(conn, close=bool(conn.closed))
+        except Exception as e:
+            logger.warning(f"Closing database connection that failed to reset: {e}")
+            self._last_used.pop(id(conn), None)
+            self._pool.putconn(conn, close=True)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a `with` block."""
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def connect(self) -> "PooledConnection":
+        """Borrow a connection that behaves like `psycopg2.connect()`'s."""
+        return PooledConnection(self, self.getconn())
+
+    def closeall(self) -> None:
+        """Close all connections."""
+        self._pool.closeall()
+
+
+class PooledConnection:
+    """psycopg2 connection borrowed from a pool.
+
+    Like a plain connection, `with conn:` commits on success and rolls back
+    on error; in addition the connection goes back to the pool when the
+    block ends. `close()` also returns it to the pool.
+    """
+
+    def __init__(self, pool: ConnectionPool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self) -> "PooledConnection":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if self._conn is not None and not self._conn.closed:
+                if exc_type is None:
+                    self._conn.commit()
+                else:
+                    self._conn.rollback()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._pool.putconn(self._conn)
+            self._conn = None
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_pid: Optional[int] = None
+_pools_lock = threading.Lock()
+
+
+def get_pool(dsn: str) -> ConnectionPool:
+    """Get the process-wide pool for `dsn`, creating it on first use.
+
+    Pools are not shared with forked child processes; each process gets its own.
+    """
+    global _pools_pid
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            _pools.clear()
+            _pools_pid = os.getpid()
+        pool = _pools.get(dsn)
+        if pool is None:
+            pool = ConnectionPool(
+                dsn,
+                minconn=int(os.getenv("DB_POOL_MIN", "1")),
+                maxconn=int(os.getenv("DB_POOL_MAX", "10")),
+                statement_timeout_ms=int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0")),
+                health_check_sec=float(os.getenv("DB_HEALTH_CHECK_SEC", "30")),
+            )
+            _pools[dsn] = pool
+        return pool
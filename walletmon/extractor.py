@@ -14,7 +14,8 @@ import json
 
 from arkham import ArkhamClient
 from db import store_flows, upsert_transactions
-from get_price import get_eth_usdt_price_at_unix
+from fetcher import get_block_receipts
+from get_price import get_eth_usdt_price_at_unix, prefetch_eth_usdt_prices
 from web3 import Web3
 
 # ERC20 transfer 方法的标准签名 keccak
@@ -35,12 +36,14 @@ def extract_token_transfers(
     to_entity: Optional[Dict[str, str]] = {},
     from_entity: Optional[Dict[str, str]] = {},
     full_addresses: Dict[str, Dict[str, str]] = {},
+    receipt=None,
 ):
     """
     提取一笔交易内 ETH、USDT、USDC 转账记录
     - tx: web3.eth.get_transaction(tx_hash) 结果
     - receipt: web3.eth.get_transaction_receipt(tx_hash) 结果
     - web3: Web3 实例
+    - receipt: 预先获取的交易回执 (可选，缺省时单独请求)
     返回: [{'token': 'ETH/USDT/USDC', 'from': ..., 'to': ..., 'amount': ...}]
     tx_data = {
                     "hash": (
@@ -85,7 +88,8 @@ def extract_token_transfers(
             )
         return transfers
     # 2. ERC20 Token 转账 (只提取 USDT/USDC)
-    receipt = web3.eth.get_transaction_receipt(tx["hash"])
+    if receipt is None:
+        receipt = web3.eth.get_transaction_receipt(tx["hash"])
     for log in receipt["logs"]:
         # ERC20 Transfer 事件
         if (
@@ -288,6 +292,10 @@ def extract_transactions(
             block = w3.eth.get_block(current_number, full_transactions=True)
             if i == 1:
                 latest_timestamp = block["timestamp"]
+                # 一次加载整个时间窗口的分钟价格
+                prefetch_eth_usdt_prices(
+                    latest_timestamp - minutes * 60, latest_timestamp
+                )
 
             if latest_timestamp - block["timestamp"] > minutes * 60:
                 logger.info(
@@ -297,7 +305,6 @@ def extract_transactions(
             logger.info(
                 f"Processing block {i}-th {current_number}, {((latest_timestamp - block['timestamp'])//60)} mins ago."
             )
-            time.sleep(1)
             eth_price = get_eth_usdt_price_at_unix(int(block["timestamp"]))
             if eth_price is None:
                 logger.error(
@@ -310,6 +317,20 @@ def extract_transactions(
                 f"Block {current_number} contains {len(block_txs)} transactions"
             )
 
+            # 有候选 token 转账时，一次取回整个区块的回执
+            block_receipts = None
+            if any(
+                not tx["value"]
+                and tx["to"] is not None
+                and tx["from"] is not None
+                and (
+                    tx["to"].lower() in watch_addresses
+                    or tx["from"].lower() in watch_addresses
+                )
+                for tx in block_txs
+            ):
+                block_receipts = get_block_receipts(w3, current_number)
+
             for tx in block_txs:
                 if tx["to"] is None or tx["from"] is None:
                     logger.info("found tx with no to or from address")
@@ -338,6 +359,11 @@ def extract_transactions(
                         to_entity=to_entity,
                         from_entity=from_entity,
                         full_addresses=full_addresses,
+                        receipt=(
+                            block_receipts.get(Web3.to_hex(tx["hash"]))
+                            if block_receipts
+                            else None
+                        ),
                     )
 
                     txs.extend(tx_data)
@@ -3,12 +3,18 @@ BlockFetcher: Fetches recent block numbers covering a wall-clock window.
 """
 
 import logging
-from typing import List
+from typing import Dict, List, Optional
 
 from web3 import Web3
+from web3._utils.method_formatters import PYTHONIC_RESULT_FORMATTERS
+from web3._utils.rpc_abi import RPC
+from web3.datastructures import AttributeDict
 
 logger = logging.getLogger(__name__)
 
+# Cleared once the node rejects eth_getBlockReceipts
+_block_receipts_supported = True
+
 
 def get_recent_blocks(w3: Web3, minutes: int) -> List[int]:
     """Return block numbers covering the last `minutes` wall‑clock time."""
@@ -52,3 +58,36 @@ def get_recent_blocks(w3: Web3, minutes: int) -> List[int]:
         f"Total blocks found: {len(sorted_blocks)} (range: {sorted_blocks[0]} to {sorted_blocks[-1]})"
     )
     return sorted_blocks
+
+
+def get_block_receipts(w3: Web3, block_number: int) -> Optional[Dict[str, dict]]:
+    """Return all receipts of a block keyed by tx hash, via eth_getBlockReceipts.
+
+    Returns None if the node does not support the method or the call fails,
+    in which case callers fall back to per-transaction receipts.
+    """
+    global _block_receipts_supported
+    if not _block_receipts_supported:
+        return None
+
+    try:
+        response = w3.provider.make_request("eth_getBlockReceipts", [hex(block_number)])
+    except Exception as e:
+        logger.warning(f"eth_getBlockReceipts failed for block {block_number}: {e}")
+        return None
+
+    if "error" in response or response.get("result") is None:
+        error = response.get("error", {})
+        logger.warning(
+            f"eth_getBlockReceipts unavailable ({error}), using per-tx receipts"
+        )
+        if isinstance(error, dict) and error.get("code") == -32601:
+            _block_receipts_supported = False
+        return None
+
+    formatter = PYTHONIC_RESULT_FORMATTERS[RPC.eth_getTransactionReceipt]
+    receipts = {}
+    for raw_receipt in response["result"]:
+        receipt = AttributeDict.recursive(formatter(raw_receipt))
+        receipts[Web3.to_hex(receipt["transactionHash"])] = receipt
+    return receipts
@@ -1,33 +1,69 @@
 import requests
 
+KLINES_URL = "https://api.binance.com/api/v3/klines"
+KLINES_LIMIT = 1000  # Binance 单次最多返回 1000 根 K线
+MAX_CACHED_MINUTES = 43_200  # 最多缓存 30 天的分钟价格，超出时丢弃最早加载的
+
+# 分钟 -> 开盘价 (unix 分钟为键，按加载顺序排列)
+_minute_prices = {}
+
+
+def _price_minute(unix_ts: int) -> int:
+    """
+    unix_ts 对应的 K线分钟：startTime = ts - 60s 之后的第一根 K线，
+    即包含 ts - 1 的那一分钟（整分钟时刻取上一分钟）。
+    """
+    return (unix_ts - 1) // 60
+
+
+def prefetch_eth_usdt_prices(start_ts: int, end_ts: int) -> int:
+    """
+    一次性批量加载 [start_ts, end_ts] 区间的 ETH/USDT 1 分钟 K线开盘价，
+    每个请求最多 1000 根，之后 get_eth_usdt_price_at_unix 直接读本地缓存。
+    返回加载的 K线数量。
+    """
+    loaded = 0
+    minute = _price_minute(start_ts)
+    end_minute = end_ts // 60
+    while minute <= end_minute:
+        batch_end = min(end_minute, minute + KLINES_LIMIT - 1)
+        params = {
+            "symbol": "ETHUSDT",
+            "interval": "1m",
+            "startTime": minute * 60_000,
+            "endTime": batch_end * 60_000,
+            "limit": KLINES_LIMIT,
+        }
+        try:
+            data = requests.get(KLINES_URL, params=params, timeout=10).json()
+        except Exception as e:
+            print("Error:", e)
+            return loaded
+        if not isinstance(data, list):
+            print("Unexpected klines response:", data)
+            return loaded
+        for kline in data:
+            _minute_prices[int(kline[0]) // 60_000] = float(kline[1])  # [1] 是 open
+        while len(_minute_prices) > MAX_CACHED_MINUTES:
+            del _minute_prices[next(iter(_minute_prices))]
+        loaded += len(data)
+        minute = batch_end + 1
+    return loaded
+
 
 def get_eth_usdt_price_at_unix(unix_ts: int) -> float:
     """
     使用 Binance K线接口获取指定 unix_ts（秒）时间点的 ETH/USDT 开盘价格。
     精度为 1 分钟，返回 float（价格）或 None。
+    优先读取 prefetch_eth_usdt_prices 预加载的分钟价格。
     """
-    ms = unix_ts * 1000  # Binance 使用毫秒单位
-    url = "https://api.binance.com/api/v3/klines"
-    params = {
-        "symbol": "ETHUSDT",
-        "interval": "1m",
-        "startTime": ms - 60_000,
-        "endTime": ms,
-    }
-
-    try:
-        resp = requests.get(url, params=params, timeout=5)
-        data = resp.json()
-
-        if isinstance(data, list) and len(data) > 0:
-            open_price = float(data[0][1])  # [1] 是 open
-            return open_price
-        else:
-            print("No data returned for that timestamp.")
-            return None
-    except Exception as e:
-        print("Error:", e)
-        return None
+    minute = _price_minute(unix_ts)
+    if minute not in _minute_prices:
+        prefetch_eth_usdt_prices(unix_ts, unix_ts)
+    price = _minute_prices.get(minute)
+    if price is None:
+        print("No data returned for that timestamp.")
+    return price
 
 
 # # 例如：获取 2024-06-01 12:30:00 UTC 的 ETH/USDT 价格
@@ -0,0 +1,284 @@
+"""
+Asyncio variant of the block processor.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from arkham import ArkhamClient
+from async_rpc import AsyncBatchRpcClient
+from block_processor import BlockProcessor
+from bloom import TransferBloom
+from config import Config
+from database import DatabaseManager
+from metrics import async_rpc_middleware, timed
+from models import BlockCheckpoint, BlockData, Transaction, Wallet
+from web3 import AsyncHTTPProvider, AsyncWeb3, Web3
+from web3.types import TxReceipt
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncBlockProcessor(BlockProcessor):
+    """Block processor that fetches blocks, receipts, balances and labels concurrently.
+
+    Extraction logic is shared with `BlockProcessor`; only the I/O differs.
+    Every upstream has its own bound: JSON-RPC batches share
+    `ASYNC_RPC_CONCURRENCY` in-flight requests, Arkham lookups run on
+    `ASYNC_LABEL_CONCURRENCY` clients. Transfers are extracted in block order,
+    so the output order matches the sync processor.
+
+    Without the background label enricher (`LABEL_WORKERS=0`), unknown
+    counterparties get a placeholder wallet during extraction; the labels are
+    resolved concurrently afterwards and patched into the placeholders in
+    place. Resolved labels are kept for the `LABEL_CACHE_SIZE` most recently
+    resolved addresses.
+    """
+
+    def __init__(self, web3: Web3, db_manager: DatabaseManager, config: Config):
+        super().__init__(web3, db_manager, config)
+        self.async_web3 = AsyncWeb3(AsyncHTTPProvider(str(config.PUBLICNODE_URL)))
+        self.async_web3.middleware_onion.add(async_rpc_middleware, "rpc_metrics")
+        self.async_rpc = AsyncBatchRpcClient(
+            self.async_web3,
+            web3,
+            str(config.PUBLICNODE_URL),
+            batch_size=config.RPC_BATCH_SIZE,
+            concurrency=config.ASYNC_RPC_CONCURRENCY,
+        )
+        self.label_concurrency = max(1, config.ASYNC_LABEL_CONCURRENCY)
+        self._arkham_clients: Optional[asyncio.Queue] = None
+        self.max_cached_labels = max(1, config.LABEL_CACHE_SIZE)
+        self._labels: "OrderedDict[str, Wallet]" = OrderedDict()
+        self._pending_labels: Dict[str, List[Wallet]] = defaultdict(list)
+
+    async def close(self) -> None:
+        """Release the async HTTP session."""
+        await self.async_rpc.close()
+
+    def extract_wallet_info(self, address: str) -> Wallet:
+        """Return a known label, or a placeholder resolved by `resolve_labels`."""
+        if self.label_enricher is not None:
+            return self.label_enricher.get_wallet(address)
+        known = self._labels.get(address.lower())
+        if known is not None:
+            return Wallet(
+                address=address,
+                friendly_name=known.friendly_name,
+                grp_name=known.grp_name,
+                grp_type=known.grp_type,
+            )
+        wallet = Wallet(address=address)
+        self._pending_labels[address.lower()].append(wallet)
+        return wallet
+
+    async def _get_arkham_clients(self) -> asyncio.Queue:
+        """Create one Arkham client per concurrent label lookup."""
+        if self._arkham_clients is None:
+            clients = [self.arkham_client]
+            for _ in range(self.label_concurrency - 1):
+                clients.append(await asyncio.to_thread(ArkhamClient))
+            self._arkham_clients = asyncio.Queue()
+            for client in clients:
+                self._arkham_clients.put_nowait(client)
+        return self._arkham_clients
+
+    async def lookup_label(self, address: str) -> Wallet:
+        """Look up one address on Arkham using a free client."""
+        clients = await self._get_arkham_clients()
+        client = await clients.get()
+        try:
+            response = await asyncio.to_thread(client.get_address_info, address)
+            if response and isinstance(response, dict):
+                return self.wallet_from_arkham(address, response)
+        except Exception as e:
+            logger.warning(f"Failed to extract wallet info for {address}: {e}")
+        finally:
+            clients.put_nowait(client)
+        return Wallet(address=address)
+
+    @timed("arkham")
+    async def resolve_labels(self) -> None:
+        """Resolve pending placeholder wallets concurrently."""
+        pending, self._pending_labels = self._pending_labels, defaultdict(list)
+        if not pending:
+            return
+
+        addresses = list(pending)
+        resolved = await asyncio.gather(*(self.lookup_label(a) for a in addresses))
+        for address, wallet in zip(addresses, resolved):
+            if wallet.friendly_name:
+                self._labels[address] = wallet
+                if len(self._labels) > self.max_cached_labels:
+                    self._labels.popitem(last=False)
+            for placeholder in pending[address]:
+                placeholder.friendly_name = wallet.friendly_name
+                placeholder.grp_name = wallet.grp_name
+                placeholder.grp_type = wallet.grp_type
+        logger.debug(f"Resolved {len(addresses)} labels")
+
+    @timed("blocks")
+    async def get_blocks_async(
+        self, block_numbers, bloom: Optional[TransferBloom] = None
+    ) -> List[BlockData]:
+        """Async counterpart of `get_blocks`."""
+        block_numbers = list(block_numbers)
+        if bloom is None:
+            results = await self.async_rpc.get_blocks_async(block_numbers)
+        else:
+            headers = await self.async_rpc.get_blocks_async(
+                block_numbers, full_transactions=False
+            )
+            wanted = self.bloom_matches(headers, bloom)
+            results = self.merge_headers(
+                headers, dict(zip(wanted, await self.async_rpc.get_blocks_async(wanted)))
+            )
+        return self.collect_blocks(block_numbers, results)
+
+    async def get_blocks_since_async(
+        self,
+        checkpoints: List[BlockCheckpoint],
+        max_blocks: int,
+        bloom: Optional[TransferBloom] = None,
+    ) -> Tuple[List[BlockData], Optional[int]]:
+        """Async counterpart of `get_blocks_since`."""
+        if not checkpoints:
+            return await asyncio.to_thread(self.get_blocks_since, checkpoints, max_blocks)
+
+        last = checkpoints[0]
+        block_range = self.next_range(
+            await self.async_web3.eth.block_number, last, max_blocks
+        )
+        if block_range is None:
+            return [], None
+        start, end = block_range
+
+        fork_block = None
+        fetched = await self.get_blocks_async(range(start, end + 1), bloom)
+        if fetched and fetched[0].number == start and fetched[0].parent_hash != last.block_hash:
+            fork_block = await asyncio.to_thread(self.find_fork_point, checkpoints)
+            logger.warning(
+                f"Reorg detected at block {start}, re-processing from {fork_block + 1}"
+            )
+            start = fork_block + 1
+            fetched = (
+                await self.get_blocks_async(range(start, fetched[0].number), bloom) + fetched
+            )
+
+        return self.link_blocks(fetched, start), fork_block
+
+    @timed("receipts")
+    async def get_block_receipts_async(
+        self, candidates: Dict[int, List[Transaction]]
+    ) -> Dict[str, TxReceipt]:
+        """Async counterpart of `get_block_receipts`."""
+        wanted = {
+            number: [tx.hash for tx in txs] for number, txs in candidates.items() if txs
+        }
+        if not wanted:
+            return {}
+
+        if (
+            self.config.BLOCK_RECEIPTS
+            and "eth_getBlockReceipts" not in self.async_rpc.unsupported_methods
+        ):
+            block_numbers = list(wanted)
+            receipts, missing = self.match_block_receipts(
+                wanted,
+                block_numbers,
+                await self.async_rpc.get_block_receipts_async(block_numbers),
+            )
+        else:
+            receipts, missing = {}, [h for hashes in wanted.values() for h in hashes]
+
+        if missing:
+            logger.debug(f"Falling back to per-tx receipts for {len(missing)} transactions")
+            for tx_hash, receipt in zip(
+                missing, await self.async_rpc.get_receipts_async(missing)
+            ):
+                if receipt is not None:
+                    receipts[tx_hash] = receipt
+        return receipts
+
+    @timed("logs")
+    async def get_transfer_logs_async(
+        self, from_block: int, to_block: int, addresses: List[str]
+    ) -> Dict[int, Dict[str, list]]:
+        """Async counterpart of `get_transfer_logs`."""
+        if not addresses:
+            return {}
+
+        filters = self.transfer_log_filters(from_block, to_block, addresses)
+        return self.group_transfer_logs(
+            from_block, to_block, filters, await self.async_rpc.get_logs_async(filters)
+        )
+
+    @timed("balances")
+    async def fill_balances_async(self, transactions: List[Transaction]) -> None:
+        """Async counterpart of `fill_balances`, aggregate3 calls run concurrently."""
+        if not transactions:
+            return
+
+        fetcher = self.balance_fetcher
+        keys = [key for tx in transactions for key in self.balance_keys(tx)]
+        balances, chunks = await asyncio.to_thread(fetcher.plan_chunks, keys)
+        if chunks:
+            responses = await self.async_rpc.call_async("eth_call", fetcher.chunk_params(chunks))
+            await asyncio.to_thread(fetcher.collect, chunks, responses, balances)
+        self.apply_balances(transactions, balances)
+
+    async def process_blocks_async(
+        self,
+        blocks: List[BlockData],
+        min_eth: float,
+        watch_addresses: Dict[str, Wallet],
+        full_addresses: Dict[str, Wallet],
+    ) -> List[Transaction]:
+        """Async counterpart of `process_blocks`."""
+        if not blocks:
+            return []
+
+        # Prices load in a worker thread while receipts/logs are fetched
+        prices = asyncio.create_task(
+            asyncio.to_thread(
+                self.price_store.ensure_range,
+                min(block.timestamp for block in blocks),
+                max(block.timestamp for block in blocks),
+            )
+        )
+
+        candidates = self.select_candidates(blocks, watch_addresses)
+        try:
+            if self.config.ERC20_SOURCE == "logs":
+                candidates = {
+                    number: [tx for tx in txs if tx.value]
+                    for number, txs in candidates.items()
+                }
+                transfer_logs = await self.get_transfer_logs_async(
+                    blocks[0].number, blocks[-1].number, list(watch_addresses)
+                )
+                receipts = {}
+            else:
+                transfer_logs = {}
+                receipts = await self.get_block_receipts_async(
+                    self.receipt_candidates(blocks, candidates)
+                )
+        finally:
+            await prices
+
+        all_transactions = self.extract_transfers(
+            blocks,
+            candidates,
+            receipts,
+            transfer_logs,
+            min_eth,
+            watch_addresses,
+            full_addresses,
+        )
+        await asyncio.gather(
+            self.resolve_labels(), self.fill_balances_async(all_transactions)
+        )
+        self.log_summary(all_transactions)
+        return all_transactions
@@ -0,0 +1,163 @@
+"""
+Asyncio JSON-RPC batch client with bounded concurrency.
+"""
+
+import asyncio
+import logging
+from typing import Any, Iterable, List, Optional, Sequence
+
+import aiohttp
+from metrics import RPC_ERRORS, count_rpc
+from rpc_batch import BatchRpcClient, BatchRpcError
+from web3 import AsyncWeb3, Web3
+from web3._utils.rpc_abi import RPC
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncBatchRpcClient(BatchRpcClient):
+    """Async counterpart of `BatchRpcClient`.
+
+    Chunks of `batch_size` calls are posted concurrently with aiohttp, at
+    most `concurrency` requests in flight against the node. Results keep the
+    order of the params and are formatted like the sync client's. Failed
+    entries fall back to individual calls through the `AsyncWeb3` provider.
+    """
+
+    def __init__(
+        self,
+        async_web3: AsyncWeb3,
+        web3: Web3,
+        endpoint_uri: str,
+        batch_size: int = 50,
+        concurrency: int = 8,
+        timeout: int = 30,
+    ):
+        super().__init__(web3, endpoint_uri, batch_size=batch_size, timeout=timeout)
+        self.async_web3 = async_web3
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Close the underlying aiohttp session."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _post_async(self, payload: List[dict]) -> List[dict]:
+        """Send one batch request and return the list of responses."""
+        session = await self._get_session()
+        async with self.semaphore:
+            async with session.post(self.endpoint_uri, json=payload) as resp:
+                resp.raise_for_status()
+                data = await resp.json(content_type=None)
+        if not isinstance(data, list):
+            raise BatchRpcError(f"Unexpected batch response: {str(data)[:200]}")
+        return data
+
+    async def call_single_async(self, method: str, params: Sequence[Any]) -> Optional[Any]:
+        """Make one call through the AsyncWeb3 provider, returning None on failure."""
+        count_rpc(method)
+        try:
+            async with self.semaphore:
+                response = await self.async_web3.provider.make_request(method, list(params))
+            if "error" in response:
+                self._check_unsupported(method, response["error"])
+                raise BatchRpcError(str(response["error"]))
+            return self._format(method, response.get("result"))
+        except Exception as e:
+            RPC_ERRORS.labels(method).inc()
+            logger.warning(f"{method}{list(params)} failed: {e}")
+            return None
+
+    async def _call_chunk_async(self, method: str, chunk: List[Sequence[Any]]) -> List[Any]:
+        """Call one chunk as a batch, falling back to individual calls."""
+        if method in self.unsupported_methods:
+            return [None] * len(chunk)
+        if len(chunk) == 1:
+            return [await self.call_single_async(method, chunk[0])]
+
+        payload = [
+            {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": list(params)}
+            for params in chunk
+        ]
+        count_rpc(method, len(chunk), "batch")
+        try:
+            responses = {
+                response.get("id"): response for response in await self._post_async(payload)
+            }
+        except Exception as e:
+            logger.warning(
+                f"Batch {method} of {len(chunk)} calls failed, "
+                f"falling back to individual calls: {e}"
+            )
+            return list(
+                await asyncio.gather(
+                    *(self.call_single_async(method, params) for params in chunk)
+                )
+            )
+
+        results: List[Any] = [None] * len(chunk)
+        retries = []
+        for index, (request, params) in enumerate(zip(payload, chunk)):
+            response = responses.get(request["id"])
+            if response is not None and "error" in response:
+                self._check_unsupported(method, response["error"])
+            if method in self.unsupported_methods:
+                continue
+            if response is None or "error" in response:
+                # Retry just the failed entry (e.g. per-item rate limit)
+                retries.append((index, params))
+            else:
+                results[index] = self._format(method, response.get("result"))
+
+        retried = await asyncio.gather(
+            *(self.call_single_async(method, params) for _, params in retries)
+        )
+        for (index, _), result in zip(retries, retried):
+            results[index] = result
+        return results
+
+    async def call_async(self, method: str, params_list: Sequence[Sequence[Any]]) -> List[Any]:
+        """Call `method` once per params entry, chunks posted concurrently.
+
+        Returns results in the order of `params_list`; failed calls yield None.
+        """
+        params_list = list(params_list)
+        chunks = await asyncio.gather(
+            *(
+                self._call_chunk_async(method, params_list[i : i + self.batch_size])
+                for i in range(0, len(params_list), self.batch_size)
+            )
+        )
+        return [result for chunk in chunks for result in chunk]
+
+    async def get_blocks_async(
+        self, block_numbers: Iterable[int], full_transactions: bool = True
+    ) -> List[Any]:
+        """Get blocks by number, in the given order."""
+        return await self.call_async(
+            RPC.eth_getBlockByNumber,
+            [[hex(number), full_transactions] for number in block_numbers],
+        )
+
+    async def get_receipts_async(self, tx_hashes: Iterable[str]) -> List[Any]:
+        """Get transaction receipts by hash, in the given order."""
+        return await self.call_async(RPC.eth_getTransactionReceipt, [[h] for h in tx_hashes])
+
+    async def get_block_receipts_async(self, block_numbers: Iterable[int]) -> List[Any]:
+        """Get all receipts of each block with eth_getBlockReceipts."""
+        return await self.call_async(
+            "eth_getBlockReceipts", [[hex(number)] for number in block_numbers]
+        )
+
+    async def get_logs_async(self, filters: Iterable[dict]) -> List[Any]:
+        """Run eth_getLogs for each filter; failed calls yield None."""
+        return await self.call_async(RPC.eth_getLogs, [[log_filter] for log_filter in filters])
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Parallel historical backfill of a block range.
+
+The range is split into shards that worker processes run through the block
+processing pipeline chunk by chunk. Each chunk's transactions and its shard
+progress (`backfill_shards`) are committed together, so an interrupted
+backfill resumes where it stopped when run again with the same range and
+shard size.
+
+    python backfill.py --from-block 18000000 --to-block 18200000 --workers 8
+"""
+
+import argparse
+import logging
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import replace
+from typing import List, Optional, Tuple
+
+from block_processor import BlockProcessor
+from config import Config, load_config
+from database import DatabaseManager
+from models import BlockData
+from partitions import maintain
+from watch_list import WatchList
+from web3 import HTTPProvider, Web3
+
+logger = logging.getLogger(__name__)
+
+
+def setup_logging(level: str) -> None:
+    """Configure logging (also called in each worker process)."""
+    logging.basicConfig(
+        level=getattr(logging, level),
+        format="%(asctime)s - %(processName)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+
+def fetch_range(processor: BlockProcessor, start: int, end: int, bloom) -> List[BlockData]:
+    """Fetch all blocks of [start, end], retrying failed ones once."""
+    blocks = processor.get_blocks(range(start, end + 1), bloom=bloom)
+    fetched = {block.number for block in blocks}
+    missing = [number for number in range(start, end + 1) if number not in fetched]
+    if missing:
+        blocks.extend(processor.get_blocks(missing, bloom=bloom))
+        blocks.sort(key=lambda block: block.number)
+    if len(blocks) != end - start + 1:
+        raise RuntimeError(f"Failed to fetch all blocks of {start}-{end}")
+    return blocks
+
+
+def backfill_shard(
+    config: Config,
+    shard: Tuple[int, int, int],
+    chunk_size: int,
+    group_name: Optional[str] = None,
+) -> Tuple[int, int, int]:
+    """Process one shard from its next block; returns (start, end, transactions stored)."""
+    start_block, end_block, next_block = shard
+    web3 = Web3(HTTPProvider(str(config.PUBLICNODE_URL)))
+    db_manager = DatabaseManager()
+    processor = BlockProcessor(web3, db_manager, config)
+    if processor.label_enricher is not None:
+        processor.label_enricher.start()
+    watch_list = WatchList(
+        db_manager,
+        full_reload_sec=config.WATCH_FULL_RELOAD_SEC,
+        overlap_sec=config.WATCH_REFRESH_OVERLAP_SEC,
+        label_index_path=config.LABEL_INDEX_PATH or None,
+    )
+
+    stored = 0
+    try:
+        while next_block <= end_block:
+            chunk_end = min(end_block, next_block + chunk_size - 1)
+            watch_list.refresh()
+            watch_addresses = watch_list.watch_addresses(group_name)
+            bloom = (
+                processor.watch_bloom(watch_addresses)
+                if config.BLOOM_PREFILTER == "blocks"
+                else None
+            )
+
+            blocks = fetch_range(processor, next_block, chunk_end, bloom)
+            transactions = processor.process_blocks(
+                blocks, config.MIN_ETH, watch_addresses, watch_list.full
+            )
+
+            # Data and shard progress commit together
+            with db_manager.get_connection() as conn:
+                db_manager.store_transactions_batch(conn, transactions)
+                db_manager.advance_backfill_shard(conn, start_block, end_block, chunk_end + 1)
+                conn.commit()
+
+            stored += len(transactions)
+            next_block = chunk_end + 1
+            logger.info(
+                f"Shard {start_block}-{end_block}: processed up to {chunk_end}, "
+                f"{len(transactions)} transactions"
+            )
+    finally:
+        if processor.label_enricher is not None:
+            processor.label_enricher.stop()
+        processor.price_store.save()
+
+    return start_block, end_block, stored
+
+
+def run_backfill(
+    config: Config,
+    from_block: int,
+    to_block: int,
+    workers: int,
+    shard_size: int,
+    chunk_size: int,
+    group_name: Optional[str] = None,
+) -> bool:
+    """Backfill [from_block, to_block]; returns False if any shard failed."""
+    w3 = Web3(HTTPProvider(str(config.PUBLICNODE_URL)))
+    head = w3.eth.block_number
+    safe_head = head - config.REORG_DEPTH
+    if to_block > safe_head:
+        logger.warning(
+            f"Clamping --to-block {to_block} to {safe_head}, "
+            f"newer blocks are left to the live monitor"
+        )
+        to_block = safe_head
+    if from_block > to_block:
+        logger.error(f"Empty range {from_block}-{to_block}")
+        return False
+
+    db_manager = DatabaseManager()
+    # Partitions of the backfilled months exist before their rows arrive,
+    # instead of the rows piling up in transactions_default
+    created, _ = maintain(
+        db_manager, config.PARTITION_MONTHS_AHEAD, since=w3.eth.get_block(from_block).timestamp
+    )
+    if created:
+        logger.info(f"Created partitions {created}")
+
+    with db_manager.get_connection() as conn:
+        shards = db_manager.plan_backfill_shards(conn, from_block, to_block, shard_size)
+        conn.commit()
+    if not shards:
+        logger.info(f"Range {from_block}-{to_block} is already backfilled")
+        return True
+
+    remaining = sum(end - next_block + 1 for _, end, next_block in shards)
+    logger.info(
+        f"Backfilling {remaining} blocks of {from_block}-{to_block} "
+        f"in {len(shards)} shards with {workers} workers"
+    )
+
+    # Workers share the Arkham budget
+    worker_config = replace(
+        config, LABEL_RATE_PER_SEC=config.LABEL_RATE_PER_SEC / max(1, workers)
+    )
+
+    started = time.monotonic()
+    failed = 0
+    total = 0
+    # Spawned workers do not inherit connections or threads of this process
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=setup_logging,
+        initargs=(config.LOG_LEVEL,),
+    ) as pool:
+        futures = {
+            pool.submit(backfill_shard, worker_config, shard, chunk_size, group_name): shard
+            for shard in shards
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            start_block, end_block, _ = futures[future]
+            try:
+                _, _, stored = future.result()
+                total += stored
+                logger.info(
+                    f"Shard {start_block}-{end_block} done ({done}/{len(shards)}), "
+                    f"{stored} transactions"
+                )
+            except Exception as e:
+                failed += 1
+                logger.error(
+                    f"Shard {start_block}-{end_block} failed, rerun to resume: {e}",
+                    exc_info=True,
+                )
+
+    elapsed = time.monotonic() - started
+    logger.info(
+        f"Backfill finished in {elapsed:.0f}s: {total} transactions, "
+        f"{len(shards) - failed}/{len(shards)} shards complete "
+        f"({remaining / max(elapsed, 1e-9):.1f} blocks/s)"
+    )
+    return failed == 0
+
+
+def main():
+    """Main entry point."""
+    config = load_config()
+    parser = argparse.ArgumentParser(
+        description="Backfill wallet transfers of a historical block range",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Backfill a range with 8 worker processes
+  python backfill.py --from-block 18000000 --to-block 18200000 --workers 8
+
+  # Resume an interrupted run (same range and shard size)
+  python backfill.py --from-block 18000000 --to-block 18200000 --workers 8
+        """,
+    )
+    parser.add_argument("--from-block", type=int, required=True, help="First block")
+    parser.add_argument("--to-block", type=int, required=True, help="Last block (inclusive)")
+    parser.add_argument(
+        "--workers", type=int, default=4, help="Worker processes (default: 4)"
+    )
+    parser.add_argument(
+        "--shard-size",
+        type=int,
+        default=10000,
+        help="Blocks per shard; keep it fixed to resume a run (default: 10000)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=config.MAX_BLOCKS_PER_CYCLE,
+        help="Blocks per fetch and commit (default: MAX_BLOCKS_PER_CYCLE)",
+    )
+    parser.add_argument("--group", type=str, help="Only watch wallets of this group")
+    args = parser.parse_args()
+
+    setup_logging(config.LOG_LEVEL)
+    ok = run_backfill(
+        config,
+        args.from_block,
+        args.to_block,
+        workers=max(1, args.workers),
+        shard_size=max(1, args.shard_size),
+        chunk_size=max(1, args.chunk_size),
+        group_name=args.group,
+    )
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark of ERC20 Transfer log decoding: per-log hex/checksum decoding (the
+previous `process_erc20_transfer` loop) against `Erc20Decoder`.
+
+Runs offline on synthetic receipts shaped like Web3's formatted logs.
+
+    python bench_erc20_decoder.py --logs 200000
+"""
+
+import argparse
+import os
+import random
+import time
+
+from block_processor import ERC20_TRANSFER_TOPIC, TARGET_CONTRACTS, TOKEN_DECIMALS
+from erc20_decoder import Erc20Decoder
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.datastructures import AttributeDict
+
+OTHER_TOPIC = Web3.keccak(text="Approval(address,address,uint256)")
+
+
+def make_logs(count: int, seed: int = 1) -> list:
+    """Logs with a realistic mix: mostly other contracts/events, small amounts."""
+    rng = random.Random(seed)
+    contracts = list(TARGET_CONTRACTS)
+    logs = []
+    for _ in range(count):
+        if rng.random() < 0.3:
+            address = rng.choice(contracts)
+        else:
+            address = Web3.to_checksum_address("0x" + os.urandom(20).hex())
+        topic0 = HexBytes(ERC20_TRANSFER_TOPIC) if rng.random() < 0.7 else OTHER_TOPIC
+        decimals = TOKEN_DECIMALS.get(TARGET_CONTRACTS.get(address), 18)
+        # Mostly small transfers, ~1% above a 100 ETH threshold
+        units = rng.choice([10, 1_000, 50_000, 1_000_000]) if rng.random() < 0.99 else 10_000_000
+        logs.append(
+            AttributeDict(
+                {
+                    "address": address,
+                    "topics": [
+                        topic0,
+                        HexBytes(b"\x00" * 12 + os.urandom(20)),
+                        HexBytes(b"\x00" * 12 + os.urandom(20)),
+                    ],
+                    "data": HexBytes(int(units * 10**decimals).to_bytes(32, "big")),
+                }
+            )
+        )
+    return logs
+
+
+def legacy_decode(logs: list, min_eth: float, eth_price: float) -> list:
+    """Decoding as done inline by process_erc20_transfer before Erc20Decoder."""
+    kept = []
+    for log in logs:
+        if (
+            log["address"] in TARGET_CONTRACTS
+            and log["topics"][0].hex() == ERC20_TRANSFER_TOPIC
+            and len(log["topics"]) == 3
+        ):
+            token_symbol = TARGET_CONTRACTS[log["address"]]
+            from_addr = Web3.to_checksum_address("0x" + log["topics"][1].hex()[-40:])
+            to_addr = Web3.to_checksum_address("0x" + log["topics"][2].hex()[-40:])
+            amount = int.from_bytes(log["data"], "big")
+            if token_symbol in ["USDT", "USDC"]:
+                amount = amount / 1e6
+            elif token_symbol == "WETH":
+                amount = eth_price * amount / 1e18
+            elif token_symbol == "DAI":
+                amount = amount / 1e18
+            if amount < min_eth * eth_price:
+                continue
+            kept.append((token_symbol, from_addr.lower(), to_addr.lower(), amount))
+    return kept
+
+
+def decoder_decode(decoder: Erc20Decoder, logs: list, min_eth: float, eth_price: float) -> list:
+    return [
+        (t.token.symbol, t.from_address, t.to_address, t.amount)
+        for t in decoder.decode(logs, min_eth, eth_price)
+    ]
+
+
+def bench(name: str, func, logs: list, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    print(f"{name:>10}: {best * 1000:8.1f} ms  ({len(logs) / best / 1e6:.2f} M logs/s)")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logs", type=int, default=100000, help="Number of logs")
+    parser.add_argument("--rounds", type=int, default=5, help="Rounds (best is reported)")
+    args = parser.parse_args()
+
+    min_eth, eth_price = 100.0, 2000.0
+    logs = make_logs(args.logs)
+    decoder = Erc20Decoder(TARGET_CONTRACTS, TOKEN_DECIMALS)
+
+    expected = legacy_decode(logs, min_eth, eth_price)
+    actual = decoder_decode(decoder, logs, min_eth, eth_price)
+    assert actual == expected, "decoder output differs from the legacy loop"
+    print(f"{len(logs)} logs, {len(expected)} transfers kept")
+
+    before = bench("legacy", lambda: legacy_decode(logs, min_eth, eth_price), logs, args.rounds)
+    after = bench(
+        "decoder", lambda: decoder_decode(decoder, logs, min_eth, eth_price), logs, args.rounds
+    )
+    print(f"speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
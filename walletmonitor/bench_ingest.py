@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of the ingest pipeline on recorded or synthetic blocks.
+
+Blocks are fetched and processed by `BlockProcessor` exactly as in a
+monitoring cycle, with a fake node (see bench_fixtures.py) answering all
+JSON-RPC calls and an Arkham stand-in that knows no labels. With
+--database-url the extracted transfers also go through
+`store_transactions_batch`, in a transaction that is rolled back unless
+--keep is given. Reports blocks/s, tx/s, memory and RPC call counts.
+
+    python bench_ingest.py --synthetic 2000
+    python bench_ingest.py --fixture mainnet.jsonl.gz --watch 5000 --tracemalloc
+    python bench_ingest.py --fixture mainnet.jsonl.gz --database-url postgresql://localhost/bench
+"""
+
+import argparse
+import gc
+import json
+import logging
+import resource
+import sys
+import time
+import tracemalloc
+from dataclasses import replace
+from typing import Dict, Optional
+
+import metrics
+from bench_fixtures import (
+    FAKE_NODE_URL,
+    FakeNode,
+    FakeNodeAdapter,
+    FakeProvider,
+    Fixture,
+    OfflineArkhamClient,
+    synthesize,
+)
+from block_processor import CONTRACT_ADDRESS, BlockProcessor
+from config import Config, load_config
+from database import DatabaseManager
+from models import Wallet
+from web3 import Web3
+
+
+def bench_config(args) -> Config:
+    """Monitor configuration with everything pointed at the fake node."""
+    config = replace(
+        load_config(),
+        PUBLICNODE_URL=FAKE_NODE_URL,
+        PRICE_STORE_PATH="",
+        PRICE_REFRESH_SEC=0,
+        LABEL_WORKERS=0,
+        DEBUG_MODE=False,
+        DEBUG_TRANSACTION_DETAILS=False,
+        DEBUG_WALLET_INFO=False,
+    )
+    overrides = {
+        "MIN_ETH": args.min_eth,
+        "MAX_BLOCKS_PER_CYCLE": args.chunk_size,
+        "ERC20_SOURCE": args.erc20_source,
+        "BLOOM_PREFILTER": args.bloom,
+        "RPC_BATCH_SIZE": args.batch_size,
+    }
+    return replace(config, **{key: value for key, value in overrides.items() if value is not None})
+
+
+def watch_list(fixture: Fixture, count: int) -> Dict[str, Wallet]:
+    """Watch the most active addresses of the fixture (token contracts excluded)."""
+    addresses = fixture.top_addresses(count, exclude=CONTRACT_ADDRESS.values())
+    return {
+        address: Wallet(
+            address=address,
+            friendly_name=f"bench {rank}",
+            grp_name="bench",
+            grp_type="bench",
+            id=rank,
+        )
+        for rank, address in enumerate(addresses, 1)
+    }
+
+
+def run(
+    fixture: Fixture,
+    config: Config,
+    watch_count: int,
+    database_url: Optional[str] = None,
+    keep: bool = False,
+    trace: bool = False,
+) -> dict:
+    """Run the pipeline over the whole fixture and return the measurements."""
+    node = FakeNode(fixture)
+    web3 = Web3(FakeProvider(node))
+    db_manager = DatabaseManager(database_url)
+    arkham = OfflineArkhamClient()
+    processor = BlockProcessor(web3, db_manager, config, arkham_client=arkham)
+    processor.rpc_batch.session.mount(FAKE_NODE_URL, FakeNodeAdapter(node))
+    processor.price_store.set_prices(fixture.prices)
+
+    watch_addresses = watch_list(fixture, watch_count)
+    bloom = (
+        processor.watch_bloom(watch_addresses) if config.BLOOM_PREFILTER == "blocks" else None
+    )
+
+    gc.collect()
+    gc_before = [stats["collections"] for stats in gc.get_stats()]
+    if trace:
+        tracemalloc.start()
+    metrics.start_cycle()
+
+    fetch_seconds = process_seconds = store_seconds = 0.0
+    blocks_done = transactions_scanned = transfers = 0
+    started = time.perf_counter()
+    chunk = max(1, config.MAX_BLOCKS_PER_CYCLE)
+    for start in range(fixture.first_block, fixture.last_block + 1, chunk):
+        end = min(fixture.last_block, start + chunk - 1)
+
+        t0 = time.perf_counter()
+        blocks = processor.get_blocks(range(start, end + 1), bloom=bloom)
+        t1 = time.perf_counter()
+        transactions = processor.process_blocks(
+            blocks, config.MIN_ETH, watch_addresses, watch_addresses
+        )
+        t2 = time.perf_counter()
+        if database_url:
+            with db_manager.get_connection() as conn:
+                db_manager.store_transactions_batch(conn, transactions)
+                if keep:
+                    conn.commit()
+                else:
+                    conn.rollback()
+            if not keep:
+                # Cached ids of rolled back rows must not be reused
+                db_manager.clear_cache()
+        t3 = time.perf_counter()
+
+        fetch_seconds += t1 - t0
+        process_seconds += t2 - t1
+        store_seconds += t3 - t2
+        blocks_done += len(blocks)
+        transactions_scanned += sum(len(block.transactions) for block in blocks)
+        transfers += len(transactions)
+    elapsed = time.perf_counter() - started
+
+    summary = metrics.end_cycle(blocks_done, transactions_scanned, transfers)
+    traced_peak = None
+    if trace:
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    gc_after = [stats["collections"] for stats in gc.get_stats()]
+
+    return {
+        "blocks": blocks_done,
+        "transactions": transactions_scanned,
+        "transfers": transfers,
+        "watched": len(watch_addresses),
+        "seconds": elapsed,
+        "blocks_per_sec": blocks_done / elapsed if elapsed else 0.0,
+        "tx_per_sec": transactions_scanned / elapsed if elapsed else 0.0,
+        "fetch_seconds": fetch_seconds,
+        "process_seconds": process_seconds,
+        "store_seconds": store_seconds if database_url else None,
+        "node_seconds": node.seconds,
+        "rpc_calls": dict(node.calls),
+        "rpc_requests": dict(node.requests),
+        "label_lookups": arkham.lookups,
+        "traced_peak_bytes": traced_peak,
+        "max_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "gc_collections": [after - before for before, after in zip(gc_before, gc_after)],
+        "summary": summary,
+    }
+
+
+def report(fixture: Fixture, config: Config, result: dict) -> None:
+    """Print the measurements."""
+    print(
+        f"Fixture: {len(fixture)} blocks {fixture.first_block}-{fixture.last_block}, "
+        f"{fixture.transaction_count} transactions ({fixture.source or 'unknown source'})"
+    )
+    print(
+        f"Config: ERC20_SOURCE={config.ERC20_SOURCE} BLOOM_PREFILTER={config.BLOOM_PREFILTER} "
+        f"MIN_ETH={config.MIN_ETH} chunk={config.MAX_BLOCKS_PER_CYCLE} "
+        f"batch={config.RPC_BATCH_SIZE} watched={result['watched']}"
+    )
+    print(
+        f"Processed {result['blocks']} blocks, {result['transactions']} txs -> "
+        f"{result['transfers']} transfers in {result['seconds']:.2f}s: "
+        f"{result['blocks_per_sec']:.1f} blocks/s, {result['tx_per_sec']:.0f} tx/s"
+    )
+    store = (
+        f"{result['store_seconds']:.2f}s" if result["store_seconds"] is not None else "skipped"
+    )
+    print(
+        f"  fetch {result['fetch_seconds']:.2f}s, process {result['process_seconds']:.2f}s, "
+        f"store {store} (fake node answering: {result['node_seconds']:.2f}s)"
+    )
+    print("RPC calls (requests):")
+    for method, calls in sorted(result["rpc_calls"].items(), key=lambda item: -item[1]):
+        print(f"  {method:<28} {calls:>8} ({result['rpc_requests'].get(method, 0)})")
+    print(f"Label lookups: {result['label_lookups']}")
+    traced = (
+        f"peak traced {result['traced_peak_bytes'] / 2**20:.1f} MiB, "
+        if result["traced_peak_bytes"] is not None
+        else ""
+    )
+    gen0, gen1, gen2 = result["gc_collections"]
+    print(
+        f"Memory: {traced}max RSS {result['max_rss_bytes'] / 2**20:.0f} MiB, "
+        f"gc collections {gen0}/{gen1}/{gen2}"
+    )
+    print(result["summary"])
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark block ingestion offline",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # 2000 synthetic blocks, generated in memory
+  python bench_ingest.py --synthetic 2000
+
+  # Recorded blocks, eth_getLogs path, allocation tracing
+  python bench_ingest.py --fixture mainnet.jsonl.gz --erc20-source logs --tracemalloc
+        """,
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--fixture", help="Fixture file from bench_fixtures.py")
+    source.add_argument("--synthetic", type=int, help="Generate this many blocks in memory")
+    parser.add_argument("--txs", type=int, default=150, help="Transactions per synthetic block")
+    parser.add_argument("--watch", type=int, default=2000, help="Watched addresses (default: 2000)")
+    parser.add_argument("--min-eth", type=float, help="Override MIN_ETH")
+    parser.add_argument("--chunk-size", type=int, help="Blocks per cycle (MAX_BLOCKS_PER_CYCLE)")
+    parser.add_argument("--batch-size", type=int, help="Override RPC_BATCH_SIZE")
+    parser.add_argument("--erc20-source", choices=["receipts", "logs"], help="Override ERC20_SOURCE")
+    parser.add_argument(
+        "--bloom", choices=["off", "receipts", "blocks"], help="Override BLOOM_PREFILTER"
+    )
+    parser.add_argument("--database-url", help="Also store transfers in this Postgres database")
+    parser.add_argument(
+        "--keep", action="store_true", help="Commit stored transfers instead of rolling back"
+    )
+    parser.add_argument(
+        "--tracemalloc", action="store_true", help="Trace allocations (slows the run down)"
+    )
+    parser.add_argument("--json", help="Also write the measurements to this file")
+    parser.add_argument("--log-level", default="WARNING", help="Log level (default: WARNING)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, args.log_level.upper()))
+
+    started = time.monotonic()
+    if args.fixture:
+        fixture = Fixture.load(args.fixture)
+    else:
+        fixture = Fixture.from_entries(synthesize(args.synthetic, args.txs))
+    if not len(fixture):
+        print("Fixture has no blocks", file=sys.stderr)
+        sys.exit(1)
+    print(f"Loaded fixture in {time.monotonic() - started:.1f}s")
+
+    config = bench_config(args)
+    result = run(
+        fixture,
+        config,
+        args.watch,
+        database_url=args.database_url,
+        keep=args.keep,
+        trace=args.tracemalloc,
+    )
+    report(fixture, config, result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
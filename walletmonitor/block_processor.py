@@ -4,14 +4,22 @@ Optimized block processor for extracting and processing transactions.
 
 import logging
 import time
+from collections import defaultdict
 from decimal import Decimal
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple
 
 import requests
 from arkham import ArkhamClient
+from bloom import TransferBloom
 from config import Config
 from database import DatabaseManager
-from models import BlockData, Transaction, Wallet
+from erc20_decoder import Erc20Decoder
+from metrics import HEAD_LAG_BLOCKS, rpc_middleware, stage, timed
+from label_enricher import LabelEnricher
+from models import BlockCheckpoint, BlockData, RawTransaction, Transaction, Wallet
+from multicall import BalanceFetcher
+from price_store import PriceStore
+from rpc_batch import BatchRpcClient
 from web3 import Web3
 from web3.types import TxReceipt
 
@@ -41,69 +49,71 @@ CONTRACT_ADDRESS = {
     "WETH": "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2",
     "DAI": "0x6B175474E89094C44Da98b954EedeAC495271d0F",
 }
+TOKEN_DECIMALS = {"ETH": 18, "USDT": 6, "USDC": 6, "WETH": 18, "DAI": 18}
 
 
 class BlockProcessor:
     """Optimized block processor for transaction extraction and processing."""
 
-    def __init__(self, web3: Web3, db_manager: DatabaseManager, config: Config):
+    def __init__(
+        self,
+        web3: Web3,
+        db_manager: DatabaseManager,
+        config: Config,
+        arkham_client: Optional[ArkhamClient] = None,
+    ):
         self.web3 = web3
         self.db_manager = db_manager
         self.config = config
-        self.arkham_client = ArkhamClient()
+        if "rpc_metrics" not in web3.middleware_onion:
+            web3.middleware_onion.add(rpc_middleware, "rpc_metrics")
+        self.arkham_client = arkham_client or ArkhamClient()
+        self.rpc_batch = BatchRpcClient(
+            web3, str(config.PUBLICNODE_URL), batch_size=config.RPC_BATCH_SIZE
+        )
+        self.balance_fetcher = BalanceFetcher(
+            web3, self.rpc_batch, chunk_size=config.MULTICALL_CHUNK_SIZE
+        )
+        self.price_store = PriceStore("ETHUSDT", path=config.PRICE_STORE_PATH or None)
+        self.transfer_bloom = TransferBloom(TARGET_CONTRACTS, ERC20_TRANSFER_TOPIC)
+        self.erc20_decoder = Erc20Decoder(TARGET_CONTRACTS, TOKEN_DECIMALS)
+        self.label_enricher = (
+            LabelEnricher.from_config(db_manager, config, self.wallet_from_arkham)
+            if config.LABEL_WORKERS > 0
+            else None
+        )
+        self._watch_bloom: Optional[Tuple[frozenset, TransferBloom]] = None
         self._eth_price_cache = 0.0
         self._last_price_update = 0
         logger.debug(f"BlockProcessor initialized with debug mode: {config.DEBUG_MODE}")
 
     def get_eth_usdt_price_at_unix(self, unix_ts: int) -> float:
         """
-        使用 Binance K线接口获取指定 unix_ts（秒）时间点的 ETH/USDT 开盘价格。
-        精度为 1 分钟，返回 float（价格）或 None。
+        获取指定 unix_ts（秒）时间点的 ETH/USDT 开盘价格（1 分钟精度）。
+        价格来自本地分钟价格库，缺失时批量加载 Binance K线；失败时返回最近价格。
         """
-        ms = unix_ts * 1000  # Binance 使用毫秒单位
-        url = "https://api.binance.com/api/v3/klines"
-        params = {
-            "symbol": "ETHUSDT",
-            "interval": "1m",
-            "startTime": ms - 60_000,
-            "endTime": ms,
-        }
-
-        try:
-            resp = requests.get(url, params=params, timeout=5)
-            data = resp.json()
-
-            if isinstance(data, list) and len(data) > 0:
-                open_price = float(data[0][1])  # [1] 是 open
-                self._eth_price_cache = open_price
-                return open_price
-            else:
-                print("No data returned for that timestamp.")
-                return self._eth_price_cache
-        except Exception as e:
-            print("Error:", e)
+        price = self.price_store.price_at(unix_ts)
+        if price is None:
+            logger.warning(f"No ETH price for timestamp {unix_ts}, using last known price")
             return self._eth_price_cache
+        self._eth_price_cache = price
+        return price
 
     def get_usd_balance(
         self, address: str, token_address: str, block_number: int
     ) -> float:
         """Get USD balance of a token for a given address."""
-        ERC20_ABI = '[{"constant":true,"inputs":[{"name":"_owner","type":"address"}],"name":"balanceOf","outputs":[{"name":"","type":"uint256"}],"type":"function"}]'
-
-        contract = self.web3.eth.contract(
-            address=Web3.to_checksum_address(token_address), abi=ERC20_ABI
+        return self.balance_fetcher.get_balance(
+            (address, token_address, block_number)
         )
 
-        wallet = Web3.to_checksum_address(address)
-
-        balance = contract.functions.balanceOf(wallet).call(
-            block_identifier=block_number
-        )
-        return balance
-
     def get_eth_price(self) -> float:
         """Get ETH price with caching."""
         current_time = time.time()
+        price = self.price_store.get_price(int(current_time))
+        if price is not None:
+            self._eth_price_cache = price
+            return price
         if current_time - self._last_price_update > 60:  # Cache for 1 minute
             try:
                 resp = requests.get(
@@ -142,46 +152,22 @@ class BlockProcessor:
         }
 
     def extract_wallet_info(self, address: str) -> Wallet:
-        """Extract wallet information from Arkham API."""
+        """Extract wallet information from Arkham API.
+
+        With the label enricher enabled this never waits for Arkham: unknown
+        addresses get a placeholder wallet and are labelled in the background.
+        """
+        if self.label_enricher is not None:
+            return self.label_enricher.get_wallet(address)
+
         if self.config.DEBUG_WALLET_INFO:
             logger.debug(f"Extracting wallet info for address: {address}")
 
         try:
-            response = self.arkham_client.get_address_info(address)
+            with stage("arkham"):
+                response = self.arkham_client.get_address_info(address)
             if response and isinstance(response, dict):
-                if self.config.DEBUG_WALLET_INFO:
-                    logger.debug(f"Arkham API response for {address}: {response}")
-
-                # Process Arkham response
-                friendly_name = "UNK"
-                grp_name = "UNK"
-                grp_type = "UNK"
-
-                for key, value in response.items():
-                    if key.lower().startswith("arkham") and isinstance(value, dict):
-                        if key == "arkhamEntity":
-                            friendly_name = value.get("name", "UNK")
-                            grp_name = value.get("id", "UNK")
-                            grp_type = value.get("type", "UNK")
-                        elif key == "arkhamLabel":
-                            if not friendly_name or friendly_name == "UNK":
-                                friendly_name = value.get("name", "UNK")
-                            if not grp_name or grp_name == "UNK":
-                                grp_name = friendly_name.split(" ")[0]
-
-                wallet = Wallet(
-                    address=address,
-                    friendly_name=friendly_name,
-                    grp_name=grp_name,
-                    grp_type=grp_type,
-                )
-
-                if self.config.DEBUG_WALLET_INFO:
-                    logger.debug(
-                        f"Created wallet info: {wallet.friendly_name} ({wallet.grp_name}) for {address}"
-                    )
-
-                return wallet
+                return self.wallet_from_arkham(address, response)
         except Exception as e:
             logger.warning(f"Failed to extract wallet info for {address}: {e}")
 
@@ -189,6 +175,42 @@ class BlockProcessor:
             logger.debug(f"Using default wallet info for {address}")
         return Wallet(address=address)
 
+    def wallet_from_arkham(self, address: str, response: dict) -> Wallet:
+        """Build a Wallet from an Arkham address info response."""
+        if self.config.DEBUG_WALLET_INFO:
+            logger.debug(f"Arkham API response for {address}: {response}")
+
+        # Process Arkham response
+        friendly_name = "UNK"
+        grp_name = "UNK"
+        grp_type = "UNK"
+
+        for key, value in response.items():
+            if key.lower().startswith("arkham") and isinstance(value, dict):
+                if key == "arkhamEntity":
+                    friendly_name = value.get("name", "UNK")
+                    grp_name = value.get("id", "UNK")
+                    grp_type = value.get("type", "UNK")
+                elif key == "arkhamLabel":
+                    if not friendly_name or friendly_name == "UNK":
+                        friendly_name = value.get("name", "UNK")
+                    if not grp_name or grp_name == "UNK":
+                        grp_name = friendly_name.split(" ")[0]
+
+        wallet = Wallet(
+            address=address,
+            friendly_name=friendly_name,
+            grp_name=grp_name,
+            grp_type=grp_type,
+        )
+
+        if self.config.DEBUG_WALLET_INFO:
+            logger.debug(
+                f"Created wallet info: {wallet.friendly_name} ({wallet.grp_name}) for {address}"
+            )
+
+        return wallet
+
     def process_eth_transfer(
         self,
         tx: Transaction,
@@ -222,19 +244,9 @@ class BlockProcessor:
                 )
             return None
 
-        # Get wallet information
+        # Get wallet information (balances are resolved per block later)
         from_address = tx.from_address.lower()
         to_address = tx.to_address.lower()
-        from_balance = self.web3.eth.get_balance(
-            Web3.to_checksum_address(from_address),
-            block_identifier=tx.block_number,
-        )
-        to_balance = self.web3.eth.get_balance(
-            Web3.to_checksum_address(to_address),
-            block_identifier=tx.block_number,
-        )
-        tx.from_balance = Decimal(self.web3.from_wei(from_balance, "ether"))
-        tx.to_balance = Decimal(self.web3.from_wei(to_balance, "ether"))
         if self.config.DEBUG_TRANSACTION_DETAILS:
             logger.debug(f"  Processing from address: {from_address}")
             logger.debug(f"  Processing to address: {to_address}")
@@ -283,123 +295,64 @@ class BlockProcessor:
         watch_addresses: Dict[str, Wallet],
         full_addresses: Dict[str, Wallet],
     ) -> List[Transaction]:
-        """Process ERC20 token transfers."""
+        """Process ERC20 token transfers.
+
+        Logs are decoded and filtered by `Erc20Decoder`; only transfers above
+        the threshold reach the wallet lookups below.
+        """
         transactions = []
+        logs = receipt["logs"]
 
         if self.config.DEBUG_TRANSACTION_DETAILS:
             logger.debug(f"Processing ERC20 transfers for tx: {tx.hash}")
-            logger.debug(f"  Number of logs: {len(receipt.get('logs', []))}")
-
-        for i, log in enumerate(receipt["logs"]):
-            if self.config.DEBUG_TRANSACTION_DETAILS:
-                logger.debug(f"  Processing log {i+1}/{len(receipt['logs'])}")
-                logger.debug(f"    Contract: {log.get('address', 'unknown')}")
-                logger.debug(
-                    f"    Topic0: {log.get('topics', [''])[0].hex() if log.get('topics') else 'none'}"
-                )
-
-            if (
-                log["address"] in TARGET_CONTRACTS
-                and log["topics"][0].hex() == ERC20_TRANSFER_TOPIC
-                and len(log["topics"]) == 3
-            ):
-                token_symbol = TARGET_CONTRACTS[log["address"]]
-
-                if self.config.DEBUG_TRANSACTION_DETAILS:
-                    logger.debug(f"    Found {token_symbol} transfer")
-
-                # Decode transfer parameters
-                from_addr = Web3.to_checksum_address(
-                    "0x" + log["topics"][1].hex()[-40:]
-                )
-                to_addr = Web3.to_checksum_address("0x" + log["topics"][2].hex()[-40:])
-                amount = int.from_bytes(log["data"], "big")
+            logger.debug(f"  Number of logs: {len(logs)}")
 
-                if self.config.DEBUG_TRANSACTION_DETAILS:
-                    logger.debug(f"    From: {from_addr}")
-                    logger.debug(f"    To: {to_addr}")
-                    logger.debug(f"    Raw amount: {amount}")
-
-                # Convert to proper units
-                if token_symbol in ["USDT", "USDC"]:
-                    amount = amount / 1e6
-                elif token_symbol == "WETH":
-                    amount = eth_price * amount / 1e18
-                elif token_symbol == "DAI":
-                    amount = amount / 1e18
-
-                if self.config.DEBUG_TRANSACTION_DETAILS:
-                    logger.debug(f"    Converted amount: {amount} {token_symbol}")
-
-                # Check minimum amount
-                if token_symbol in ["USDT", "USDC"]:
-                    min_amount = min_eth * eth_price
-                else:
-                    min_amount = min_eth * eth_price
-
-                if self.config.DEBUG_TRANSACTION_DETAILS:
-                    logger.debug(f"    Minimum required: {min_amount} USD")
-
-                if amount < min_amount:
-                    if self.config.DEBUG_TRANSACTION_DETAILS:
-                        logger.debug(
-                            f"    Skipping: Amount below minimum threshold, {amount} < {min_amount}"
-                        )
-                    continue
+        for transfer in self.erc20_decoder.decode(logs, min_eth, eth_price):
+            token_symbol = transfer.token.symbol
+            amount = transfer.amount
+            from_address = transfer.from_address
+            to_address = transfer.to_address
 
-                # Get wallet information
-                from_address = from_addr.lower()
-                to_address = to_addr.lower()
-                from_balance = self.get_usd_balance(
-                    from_address, CONTRACT_ADDRESS[token_symbol], tx.block_number
-                )
-                to_balance = self.get_usd_balance(
-                    to_address, CONTRACT_ADDRESS[token_symbol], tx.block_number
-                )
+            if self.config.DEBUG_TRANSACTION_DETAILS:
+                logger.debug(f"    Found {token_symbol} transfer")
+                logger.debug(f"    From: {from_address}")
+                logger.debug(f"    To: {to_address}")
+                logger.debug(f"    Raw amount: {transfer.raw_amount}")
+                logger.debug(f"    Converted amount: {amount} {token_symbol}")
+
+            # Get wallet information (balances are resolved per block later)
+            from_wallet = watch_addresses.get(from_address) or full_addresses.get(
+                from_address
+            )
+            if not from_wallet:
+                from_addr = Erc20Decoder.checksum(from_address)
                 if self.config.DEBUG_TRANSACTION_DETAILS:
-                    logger.debug(f"    Processing from address: {from_address}")
-                    logger.debug(f"    Processing to address: {to_address}")
-
-                from_wallet = watch_addresses.get(from_address) or full_addresses.get(
-                    from_address
-                )
-                if not from_wallet:
-                    if self.config.DEBUG_TRANSACTION_DETAILS:
-                        logger.info(
-                            f"    From address not in watch list, extracting info... {from_addr}"
-                        )
-                    from_wallet = self.extract_wallet_info(from_addr)
+                    logger.info(
+                        f"    From address not in watch list, extracting info... {from_addr}"
+                    )
+                from_wallet = self.extract_wallet_info(from_addr)
 
-                to_wallet = watch_addresses.get(to_address) or full_addresses.get(
-                    to_address
-                )
-                if not to_wallet:
-                    if self.config.DEBUG_TRANSACTION_DETAILS:
-                        logger.info(
-                            f"    To address not in watch list, extracting info... {to_addr}"
-                        )
-                    to_wallet = self.extract_wallet_info(to_addr)
-                tx.from_wallet = from_wallet
-                tx.to_wallet = to_wallet
-                tx.timestamp = block_timestamp
-                tx.usd_value = Decimal(amount)
-                tx.amount = Decimal(amount)
-                tx.token = token_symbol
-                if token_symbol == "USDT" or token_symbol == "USDC":
-                    tx.from_balance = Decimal(from_balance) / Decimal("1e6")
-                    tx.to_balance = Decimal(to_balance) / Decimal("1e6")
-                else:
-                    tx.from_balance = Decimal(from_balance) / Decimal("1e18")
-                    tx.to_balance = Decimal(to_balance) / Decimal("1e18")
+            to_wallet = watch_addresses.get(to_address) or full_addresses.get(to_address)
+            if not to_wallet:
+                to_addr = Erc20Decoder.checksum(to_address)
                 if self.config.DEBUG_TRANSACTION_DETAILS:
-                    logger.debug(f"    Created {token_symbol} transaction: {tx.hash}")
-                    logger.debug(
-                        f"      From: {from_wallet.friendly_name} ({from_address})"
+                    logger.info(
+                        f"    To address not in watch list, extracting info... {to_addr}"
                     )
-                    logger.debug(f"      To: {to_wallet.friendly_name} ({to_address})")
-                    logger.debug(f"      Amount: {amount} {token_symbol}")
+                to_wallet = self.extract_wallet_info(to_addr)
+            tx.from_wallet = from_wallet
+            tx.to_wallet = to_wallet
+            tx.timestamp = block_timestamp
+            tx.usd_value = Decimal(amount)
+            tx.amount = Decimal(amount)
+            tx.token = token_symbol
+            if self.config.DEBUG_TRANSACTION_DETAILS:
+                logger.debug(f"    Created {token_symbol} transaction: {tx.hash}")
+                logger.debug(f"      From: {from_wallet.friendly_name} ({from_address})")
+                logger.debug(f"      To: {to_wallet.friendly_name} ({to_address})")
+                logger.debug(f"      Amount: {amount} {token_symbol}")
 
-                transactions.append(tx)
+            transactions.append(tx)
 
         if self.config.DEBUG_TRANSACTION_DETAILS:
             logger.debug(f"  Total ERC20 transactions found: {len(transactions)}")
@@ -414,8 +367,13 @@ class BlockProcessor:
         eth_price: float,
         watch_addresses: Dict[str, Wallet],
         full_addresses: Dict[str, Wallet],
+        receipt: Optional[TxReceipt] = None,
     ) -> List[Transaction]:
-        """Process a single transaction."""
+        """Process a single transaction.
+
+        A receipt prefetched by `process_blocks` is used for the ERC20 path;
+        without one it is fetched individually.
+        """
         if self.config.DEBUG_TRANSACTION_DETAILS:
             logger.debug(f"Processing transaction: {tx.hash}")
 
@@ -444,7 +402,8 @@ class BlockProcessor:
             # Process ERC20 transfers
             if self.config.DEBUG_TRANSACTION_DETAILS:
                 logger.debug(f" No ETH transfer found, checking for ERC20 transfers...")
-            receipt = self.web3.eth.get_transaction_receipt(tx.hash)
+            if receipt is None:
+                receipt = self.web3.eth.get_transaction_receipt(tx.hash)
             if receipt:
                 erc20_txs = self.process_erc20_transfer(
                     tx,
@@ -479,38 +438,139 @@ class BlockProcessor:
         full_addresses: Dict[str, Wallet],
     ) -> List[Transaction]:
         """Process multiple blocks and extract transactions."""
-        all_transactions = []
-
         logger.debug(
             f"Processing {len(blocks)} blocks with {len(watch_addresses)} watch addresses"
         )
 
         logger.debug(f"Minimum ETH threshold: {min_eth} ETH")
 
+        use_logs = self.config.ERC20_SOURCE == "logs" and bool(blocks)
+
+        # Load prices of the whole range at once, lookups below are local
+        if blocks:
+            with stage("prices"):
+                self.price_store.ensure_range(
+                    min(block.timestamp for block in blocks),
+                    max(block.timestamp for block in blocks),
+                )
+
+        candidates = self.select_candidates(blocks, watch_addresses)
+
+        if use_logs:
+            # Token transfers come from eth_getLogs, only ETH transfers are
+            # taken from the block transactions
+            candidates = {
+                number: [tx for tx in txs if tx.value]
+                for number, txs in candidates.items()
+            }
+            transfer_logs = self.get_transfer_logs(
+                min(block.number for block in blocks),
+                max(block.number for block in blocks),
+                list(watch_addresses),
+            )
+            receipts = {}
+        else:
+            # Prefetch receipts for the token transfer path
+            transfer_logs = {}
+            receipts = self.get_block_receipts(self.receipt_candidates(blocks, candidates))
+
+        all_transactions = self.extract_transfers(
+            blocks,
+            candidates,
+            receipts,
+            transfer_logs,
+            min_eth,
+            watch_addresses,
+            full_addresses,
+        )
+        self.fill_balances(all_transactions)
+        self.log_summary(all_transactions)
+        return all_transactions
+
+    def select_candidates(
+        self, blocks: List[BlockData], watch_addresses: Dict[str, Wallet]
+    ) -> Dict[int, List[Transaction]]:
+        """Keep only transactions touching a watched address, per block.
+
+        The test runs on the raw block transactions; only matches are
+        materialized as `Transaction`.
+        """
+        return {
+            block.number: [
+                tx.to_transaction() if isinstance(tx, RawTransaction) else tx
+                for tx in block.transactions
+                if tx.touches(watch_addresses)
+            ]
+            for block in blocks
+        }
+
+    def receipt_candidates(
+        self, blocks: List[BlockData], candidates: Dict[int, List[Transaction]]
+    ) -> Dict[int, List[Transaction]]:
+        """Get candidates whose receipts may hold a target token transfer.
+
+        Token transfers have no ETH value, and blocks whose logsBloom rules out
+        Transfer logs of the target contracts are skipped entirely.
+        """
+        use_bloom = self.config.BLOOM_PREFILTER != "off"
+        selected = {}
+        skipped = 0
+        for block in blocks:
+            txs = [tx for tx in candidates[block.number] if not tx.value]
+            if txs and use_bloom and not self.transfer_bloom.may_have_transfer(block.logs_bloom):
+                skipped += 1
+                txs = []
+            selected[block.number] = txs
+        if skipped:
+            logger.debug(f"logsBloom ruled out token transfers in {skipped} blocks")
+        return selected
+
+    def watch_bloom(self, watch_addresses: Dict[str, Wallet]) -> TransferBloom:
+        """Get the bloom test for target transfers touching watched addresses."""
+        addresses = frozenset(watch_addresses)
+        if self._watch_bloom is None or self._watch_bloom[0] != addresses:
+            self._watch_bloom = (
+                addresses,
+                TransferBloom(TARGET_CONTRACTS, ERC20_TRANSFER_TOPIC, addresses),
+            )
+        return self._watch_bloom[1]
+
+    @timed("extract")
+    def extract_transfers(
+        self,
+        blocks: List[BlockData],
+        candidates: Dict[int, List[Transaction]],
+        receipts: Dict[str, TxReceipt],
+        transfer_logs: Dict[int, Dict[str, list]],
+        min_eth: float,
+        watch_addresses: Dict[str, Wallet],
+        full_addresses: Dict[str, Wallet],
+    ) -> List[Transaction]:
+        """Extract relevant transfers from prefetched candidates, in block order."""
+        all_transactions = []
         for block_idx, block in enumerate(blocks):
+            # Lazy %-formatting: this runs once per block
             logger.info(
-                f"Processing block {block.number} ({block_idx + 1}/{len(blocks)}) with {len(block.transactions)} transactions"
+                "Processing block %s (%s/%s) with %s transactions",
+                block.number,
+                block_idx + 1,
+                len(blocks),
+                len(block.transactions),
             )
             eth_price = self.get_eth_usdt_price_at_unix(block.timestamp)
-            logger.info(f"ETH price: ${eth_price:.2f}")
+            logger.info("ETH price: $%.2f", eth_price)
             if self.config.DEBUG_MODE:
                 logger.debug(f"  Block timestamp: {block.timestamp}")
                 logger.debug(f"  Block hash: {block.number}")
 
             block_transactions = 0
+            block_candidates = candidates[block.number]
 
-            for tx_idx, transaction in enumerate(block.transactions):
+            for tx_idx, transaction in enumerate(block_candidates):
                 if self.config.DEBUG_MODE:
                     logger.debug(
-                        f"    Processing transaction {tx_idx + 1}/{len(block.transactions)}: {transaction.hash}"
+                        f"    Processing transaction {tx_idx + 1}/{len(block_candidates)}: {transaction.hash}"
                     )
-                if (
-                    transaction.from_address not in watch_addresses
-                    and transaction.to_address not in watch_addresses
-                ):
-                    continue
-                if transaction.from_address is None or transaction.to_address is None:
-                    continue
                 transactions = self.process_transaction(
                     transaction,
                     block.timestamp,
@@ -518,6 +578,7 @@ class BlockProcessor:
                     eth_price,
                     watch_addresses,
                     full_addresses,
+                    receipt=receipts.get(transaction.hash),
                 )
                 all_transactions.extend(transactions)
                 block_transactions += len(transactions)
@@ -525,11 +586,28 @@ class BlockProcessor:
                 if self.config.DEBUG_MODE and transactions:
                     logger.debug(f"    Found {len(transactions)} relevant transactions")
 
+            for tx_hash, logs in transfer_logs.get(block.number, {}).items():
+                transactions = self.process_erc20_transfer(
+                    self.transaction_from_logs(tx_hash, block.number, logs),
+                    {"logs": logs},
+                    block.timestamp,
+                    min_eth,
+                    eth_price,
+                    watch_addresses,
+                    full_addresses,
+                )
+                all_transactions.extend(transactions)
+                block_transactions += len(transactions)
+
             if self.config.DEBUG_MODE:
                 logger.debug(
                     f"  Block {block.number} summary: {block_transactions} relevant transactions"
                 )
 
+        return all_transactions
+
+    def log_summary(self, all_transactions: List[Transaction]) -> None:
+        """Log the extracted transactions of a processing run."""
         logger.info(f"Extracted {len(all_transactions)} transactions")
 
         if self.config.DEBUG_MODE:
@@ -539,7 +617,374 @@ class BlockProcessor:
                     f"  {tx.hash}: {tx.from_wallet.friendly_name if tx.from_wallet else 'Unknown'} -> {tx.to_wallet.friendly_name if tx.to_wallet else 'Unknown'} ({tx.amount} {tx.token})"
                 )
 
-        return all_transactions
+    def get_receipts(self, tx_hashes: List[str]) -> Dict[str, TxReceipt]:
+        """Get receipts for many transactions using batched RPC calls."""
+        if not tx_hashes:
+            return {}
+
+        results = self.rpc_batch.get_receipts(tx_hashes)
+        receipts = {
+            tx_hash: receipt
+            for tx_hash, receipt in zip(tx_hashes, results)
+            if receipt is not None
+        }
+        logger.debug(f"Fetched {len(receipts)}/{len(tx_hashes)} receipts")
+        return receipts
+
+    def balance_keys(self, tx: Transaction):
+        """Get the normalized (from, to) balance keys of a processed transfer."""
+        token = None if tx.token == "ETH" else CONTRACT_ADDRESS[tx.token].lower()
+        from_address = tx.from_wallet.address if tx.from_wallet else tx.from_address
+        to_address = tx.to_wallet.address if tx.to_wallet else tx.to_address
+        return (
+            (from_address.lower(), token, tx.block_number),
+            (to_address.lower(), token, tx.block_number),
+        )
+
+    @timed("balances")
+    def fill_balances(self, transactions: List[Transaction]) -> None:
+        """Set from/to balances of processed transfers at their block.
+
+        All lookups of all blocks are deduplicated and resolved with one
+        Multicall3 aggregate3 call per block.
+        """
+        if not transactions:
+            return
+
+        keys = [key for tx in transactions for key in self.balance_keys(tx)]
+        self.apply_balances(transactions, self.balance_fetcher.get_balances(keys))
+
+    def apply_balances(self, transactions: List[Transaction], balances: dict) -> None:
+        """Set from/to balances of transfers from resolved raw balances."""
+        for tx in transactions:
+            scale = Decimal(10) ** TOKEN_DECIMALS.get(tx.token, 18)
+            from_key, to_key = self.balance_keys(tx)
+            from_balance = balances.get(from_key)
+            to_balance = balances.get(to_key)
+            tx.from_balance = (
+                Decimal(from_balance) / scale if from_balance is not None else None
+            )
+            tx.to_balance = Decimal(to_balance) / scale if to_balance is not None else None
+
+    @timed("logs")
+    def get_transfer_logs(
+        self, from_block: int, to_block: int, addresses: List[str]
+    ) -> Dict[int, Dict[str, list]]:
+        """Get Transfer logs of target tokens touching watched addresses.
+
+        Filtering is done by the node: target contracts as `address`, the
+        Transfer topic, and the padded watched addresses as topic1 (sender) or
+        topic2 (receiver). Addresses and block ranges are chunked to respect
+        provider limits, and all calls go out as one JSON-RPC batch.
+
+        Returns:
+            Logs grouped as {block_number: {tx_hash: [logs]}}
+        """
+        if not addresses:
+            return {}
+
+        filters = self.transfer_log_filters(from_block, to_block, addresses)
+        return self.group_transfer_logs(
+            from_block, to_block, filters, self.rpc_batch.get_logs(filters)
+        )
+
+    def transfer_log_filters(
+        self, from_block: int, to_block: int, addresses: List[str]
+    ) -> List[dict]:
+        """Build the chunked eth_getLogs filters of `get_transfer_logs`."""
+        transfer_topic = Web3.to_hex(hexstr=ERC20_TRANSFER_TOPIC)
+        padded = ["0x" + "0" * 24 + address[2:].lower() for address in addresses]
+        contracts = list(TARGET_CONTRACTS)
+        chunk_size = max(1, self.config.LOGS_ADDRESS_CHUNK)
+        range_size = max(1, self.config.LOGS_BLOCK_RANGE)
+
+        filters = []
+        for start in range(from_block, to_block + 1, range_size):
+            end = min(to_block, start + range_size - 1)
+            for i in range(0, len(padded), chunk_size):
+                topic_chunk = padded[i : i + chunk_size]
+                for topics in (
+                    [transfer_topic, topic_chunk],
+                    [transfer_topic, None, topic_chunk],
+                ):
+                    filters.append(
+                        {
+                            "fromBlock": hex(start),
+                            "toBlock": hex(end),
+                            "address": contracts,
+                            "topics": topics,
+                        }
+                    )
+        return filters
+
+    def group_transfer_logs(
+        self, from_block: int, to_block: int, filters: List[dict], results: list
+    ) -> Dict[int, Dict[str, list]]:
+        """Dedupe eth_getLogs results and group them by block and tx hash."""
+        if any(result is None for result in results):
+            # Missing logs would silently drop transfers, retry the whole cycle
+            raise RuntimeError(
+                f"eth_getLogs failed for blocks {from_block}-{to_block}"
+            )
+
+        # Dedupe logs matched by both the sender and receiver filters
+        unique_logs = {}
+        for logs in results:
+            for log in logs:
+                unique_logs[(Web3.to_hex(log["transactionHash"]), log["logIndex"])] = log
+
+        grouped: Dict[int, Dict[str, list]] = defaultdict(lambda: defaultdict(list))
+        for (tx_hash, _), log in sorted(
+            unique_logs.items(), key=lambda item: (item[1]["blockNumber"], item[1]["logIndex"])
+        ):
+            grouped[log["blockNumber"]][tx_hash].append(log)
+
+        logger.info(
+            f"Fetched {len(unique_logs)} transfer logs for blocks {from_block}-{to_block} "
+            f"with {len(filters)} eth_getLogs calls"
+        )
+        return grouped
+
+    def transaction_from_logs(
+        self, tx_hash: str, block_number: int, logs: list
+    ) -> Transaction:
+        """Create a Transaction shell for token transfers found via eth_getLogs."""
+        first = logs[0]
+        return Transaction(
+            hash=tx_hash,
+            block_number=block_number,
+            from_address="0x" + first["topics"][1].hex()[-40:],
+            to_address="0x" + first["topics"][2].hex()[-40:],
+            value=0,
+            block_hash=Web3.to_hex(first["blockHash"]),
+            transaction_index=first["transactionIndex"],
+        )
+
+    @timed("receipts")
+    def get_block_receipts(
+        self, candidates: Dict[int, List[Transaction]]
+    ) -> Dict[str, TxReceipt]:
+        """Get receipts of candidate transactions, indexed by tx hash.
+
+        Blocks with at least one candidate get all their receipts with a single
+        eth_getBlockReceipts call. Transactions not covered that way (method
+        unsupported, failed call) fall back to per-tx receipts.
+        """
+        wanted = {
+            number: [tx.hash for tx in txs] for number, txs in candidates.items() if txs
+        }
+        if not wanted:
+            return {}
+
+        if (
+            not self.config.BLOCK_RECEIPTS
+            or "eth_getBlockReceipts" in self.rpc_batch.unsupported_methods
+        ):
+            return self.get_receipts([h for hashes in wanted.values() for h in hashes])
+
+        block_numbers = list(wanted)
+        receipts, missing = self.match_block_receipts(
+            wanted, block_numbers, self.rpc_batch.get_block_receipts(block_numbers)
+        )
+        if missing:
+            logger.debug(f"Falling back to per-tx receipts for {len(missing)} transactions")
+            receipts.update(self.get_receipts(missing))
+        return receipts
+
+    def match_block_receipts(
+        self, wanted: Dict[int, List[str]], block_numbers: List[int], results: list
+    ) -> Tuple[Dict[str, TxReceipt], List[str]]:
+        """Pick wanted receipts out of eth_getBlockReceipts results.
+
+        Returns the receipts found and the tx hashes still missing.
+        """
+        receipts = {}
+        missing = []
+        for number, block_receipts in zip(block_numbers, results):
+            if block_receipts is None:
+                missing.extend(wanted[number])
+                continue
+            indexed = {
+                Web3.to_hex(receipt["transactionHash"]): receipt
+                for receipt in block_receipts
+            }
+            for tx_hash in wanted[number]:
+                if tx_hash in indexed:
+                    receipts[tx_hash] = indexed[tx_hash]
+                else:
+                    missing.append(tx_hash)
+        return receipts, missing
+
+    @timed("blocks")
+    def get_blocks(
+        self, block_numbers, bloom: Optional[TransferBloom] = None
+    ) -> List[BlockData]:
+        """Get full blocks using batched RPC calls, skipping failed ones.
+
+        With a bloom, headers are fetched first and only blocks whose
+        logsBloom may match are downloaded with transactions; the others are
+        returned without transactions.
+        """
+        block_numbers = list(block_numbers)
+        if bloom is None:
+            results = self.rpc_batch.get_blocks(block_numbers)
+        else:
+            headers = self.rpc_batch.get_blocks(block_numbers, full_transactions=False)
+            wanted = self.bloom_matches(headers, bloom)
+            results = self.merge_headers(
+                headers, dict(zip(wanted, self.rpc_batch.get_blocks(wanted)))
+            )
+        return self.collect_blocks(block_numbers, results)
+
+    def bloom_matches(self, headers: list, bloom: TransferBloom) -> List[int]:
+        """Get numbers of headers whose logsBloom may match."""
+        wanted = [
+            header["number"]
+            for header in headers
+            if header is not None and bloom.may_match(bytes(header["logsBloom"]))
+        ]
+        fetched = sum(header is not None for header in headers)
+        logger.debug(
+            f"logsBloom prefilter: {len(wanted)}/{fetched} blocks need full transactions"
+        )
+        return wanted
+
+    def merge_headers(self, headers: list, full_blocks: Dict[int, object]) -> list:
+        """Replace matched headers by their full blocks, strip the others."""
+        results = []
+        for header in headers:
+            if header is None:
+                results.append(None)
+            elif header["number"] in full_blocks:
+                # None if the full download failed, so the chain stops there
+                results.append(full_blocks[header["number"]])
+            else:
+                results.append(dict(header, transactions=[]))
+        return results
+
+    def collect_blocks(self, block_numbers: List[int], results: list) -> List[BlockData]:
+        """Convert fetched blocks, skipping failed ones."""
+        blocks = []
+        for block_num, block in zip(block_numbers, results):
+            if block is None:
+                logger.warning(f"Failed to get block {block_num}")
+                continue
+            blocks.append(self.to_block_data(block))
+        return blocks
+
+    def to_block_data(self, block) -> BlockData:
+        """Convert a full Web3 block into the BlockData model.
+
+        Transactions are kept as `RawTransaction`; `select_candidates`
+        materializes the few that touch a watched address.
+        """
+        return BlockData(
+            number=block["number"],
+            timestamp=block["timestamp"],
+            transactions=[RawTransaction.from_web3(tx) for tx in block["transactions"]],
+            hash=Web3.to_hex(block["hash"]),
+            parent_hash=Web3.to_hex(block["parentHash"]),
+            logs_bloom=bytes(block["logsBloom"]) if block.get("logsBloom") else None,
+        )
+
+    def find_fork_point(self, checkpoints: List[BlockCheckpoint]) -> int:
+        """Find the newest checkpoint that is still on the canonical chain.
+
+        Checkpoints are expected newest first. Returns the block number of the
+        common ancestor; everything after it has to be re-processed.
+        """
+        for checkpoint in checkpoints:
+            header = self.web3.eth.get_block(checkpoint.block_number)
+            if Web3.to_hex(header["hash"]) == checkpoint.block_hash:
+                return checkpoint.block_number
+            logger.warning(
+                f"Block {checkpoint.block_number} was reorged: "
+                f"stored {checkpoint.block_hash}, canonical {Web3.to_hex(header['hash'])}"
+            )
+
+        # Reorg is deeper than the retained checkpoints
+        return checkpoints[-1].block_number - 1
+
+    def get_blocks_since(
+        self,
+        checkpoints: List[BlockCheckpoint],
+        max_blocks: int,
+        bloom: Optional[TransferBloom] = None,
+    ) -> Tuple[List[BlockData], Optional[int]]:
+        """Get blocks newer than the last processed checkpoint.
+
+        Args:
+            checkpoints: Processed block checkpoints, newest first
+            max_blocks: Upper bound of blocks fetched in one call
+            bloom: Optional logsBloom prefilter, see `get_blocks`
+
+        Returns:
+            Tuple of (blocks in ascending order, fork block number or None).
+            A fork block number means a reorg was detected and all data after
+            that block has to be discarded before storing the new blocks.
+        """
+        if not checkpoints:
+            logger.info("No block checkpoint found, starting from recent blocks")
+            return sorted(self.get_recent_blocks(minutes=10), key=lambda b: b.number), None
+
+        last = checkpoints[0]
+        block_range = self.next_range(self.web3.eth.block_number, last, max_blocks)
+        if block_range is None:
+            return [], None
+        start, end = block_range
+
+        fork_block = None
+        fetched = self.get_blocks(range(start, end + 1), bloom)
+        if fetched and fetched[0].number == start and fetched[0].parent_hash != last.block_hash:
+            fork_block = self.find_fork_point(checkpoints)
+            logger.warning(
+                f"Reorg detected at block {start}, re-processing from {fork_block + 1}"
+            )
+            start = fork_block + 1
+            fetched = self.get_blocks(range(start, fetched[0].number), bloom) + fetched
+
+        return self.link_blocks(fetched, start), fork_block
+
+    def next_range(
+        self, head: int, last: BlockCheckpoint, max_blocks: int
+    ) -> Optional[Tuple[int, int]]:
+        """Get the (start, end) block range of the next cycle, None if up to date."""
+        if head <= last.block_number:
+            logger.debug(f"No new blocks since {last.block_number} (head {head})")
+            HEAD_LAG_BLOCKS.set(0)
+            return None
+
+        start = last.block_number + 1
+        end = min(head, last.block_number + max_blocks)
+        HEAD_LAG_BLOCKS.set(head - end)
+        if end < head:
+            logger.info(
+                f"Cursor is {head - last.block_number} blocks behind head, "
+                f"fetching {start}-{end} this cycle"
+            )
+        return start, end
+
+    def link_blocks(self, fetched: List[BlockData], start: int) -> List[BlockData]:
+        """Keep the leading run of fetched blocks that forms a chain from `start`."""
+        blocks = []
+        for block in fetched:
+            # Stop at a gap or discontinuity, the next cycle resumes from there
+            expected = blocks[-1].number + 1 if blocks else start
+            if block.number != expected or (
+                blocks and block.parent_hash != blocks[-1].hash
+            ):
+                logger.warning(
+                    f"Block {block.number} does not extend block {expected - 1}, "
+                    f"stopping at the previous block"
+                )
+                break
+            blocks.append(block)
+
+        logger.info(
+            f"Retrieved {len(blocks)} new blocks "
+            f"({blocks[0].number if blocks else start}-{blocks[-1].number if blocks else start - 1})"
+        )
+        return blocks
 
     def get_recent_blocks(self, minutes: int = 10) -> List[BlockData]:
         """Get recent blocks within specified time range."""
@@ -561,56 +1006,43 @@ class BlockProcessor:
             blocks_checked = 0
             max_blocks_to_check = 1000000  # Limit to prevent infinite loops
 
-            for block_num in range(
-                current_block, max(0, current_block - max_blocks_to_check), -1
+            lowest_block = max(0, current_block - max_blocks_to_check)
+            reached_target = False
+
+            # Walk backwards one batch of blocks at a time
+            for chunk_end in range(
+                current_block, lowest_block, -self.rpc_batch.batch_size
             ):
-                try:
+                chunk = list(
+                    range(
+                        chunk_end,
+                        max(lowest_block, chunk_end - self.rpc_batch.batch_size),
+                        -1,
+                    )
+                )
+                for block in self.get_blocks(chunk):
                     blocks_checked += 1
                     if self.config.DEBUG_MODE:
                         logger.debug(
-                            f"  Checking block {block_num} ({blocks_checked}/{max_blocks_to_check})"
-                        )
-
-                    block = self.web3.eth.get_block(block_num, full_transactions=True)
-                    block_timestamp = block["timestamp"]
-
-                    if self.config.DEBUG_MODE:
-                        logger.debug(
-                            f"    Block {block_num} timestamp: {block_timestamp}"
+                            f"  Checking block {block.number} ({blocks_checked}/{max_blocks_to_check}), timestamp {block.timestamp}"
                         )
 
-                    if block_timestamp < target_timestamp:
+                    if block.timestamp < target_timestamp:
                         if self.config.DEBUG_MODE:
                             logger.debug(
-                                f"    Block {block_num} is too old (timestamp {block_timestamp} < target {target_timestamp})"
+                                f"    Block {block.number} is too old (timestamp {block.timestamp} < target {target_timestamp})"
                             )
+                        reached_target = True
                         break
-                    transactions = []
-                    for raw_tx in block["transactions"]:
-                        tx = Transaction.from_dict(raw_tx)
-                        transactions.append(tx)
-
-                    # Create block data dictionary
-                    block_data = {
-                        "number": block["number"],
-                        "timestamp": block["timestamp"],
-                        "transactions": transactions,
-                    }
-
-                    # Convert to BlockData model
-
-                    blocks.append(BlockData.from_dict(block_data))
+                    blocks.append(block)
 
                     if self.config.DEBUG_MODE:
                         logger.debug(
-                            f"    Added block {block_num} with {len(block['transactions'])} transactions"
+                            f"    Added block {block.number} with {len(block.transactions)} transactions"
                         )
 
-                except Exception as e:
-                    logger.warning(f"Failed to get block {block_num}: {e}")
-                    if self.config.DEBUG_MODE:
-                        logger.debug(f"    Exception details: {e}")
-                    continue
+                if reached_target:
+                    break
 
             logger.info(
                 f"Retrieved {len(blocks)} blocks from the last {minutes} minutes (checked {blocks_checked} blocks)"
@@ -0,0 +1,72 @@
+"""
+Ethereum logsBloom membership tests.
+"""
+
+from typing import Iterable, List, Optional, Tuple
+
+from eth_utils import keccak
+
+BLOOM_BYTES = 256  # 2048-bit bloom in block headers and receipts
+
+# (byte index, bit mask) of the three bits an item sets
+BloomBits = Tuple[Tuple[int, int], ...]
+
+
+def bloom_bits(item: bytes) -> BloomBits:
+    """Get the bloom bits set by a log address or topic."""
+    digest = keccak(item)
+    bits = []
+    for i in (0, 2, 4):
+        bit = ((digest[i] << 8) | digest[i + 1]) & 2047
+        bits.append((BLOOM_BYTES - 1 - bit // 8, 1 << (bit % 8)))
+    return tuple(bits)
+
+
+def bloom_contains(bloom: bytes, bits: BloomBits) -> bool:
+    """Test whether all bits of an item are set; False means definitely absent."""
+    return all(bloom[index] & mask for index, mask in bits)
+
+
+def address_topic(address: str) -> bytes:
+    """Pad a 0x address to a 32-byte indexed topic."""
+    return bytes(12) + bytes.fromhex(address[2:])
+
+
+class TransferBloom:
+    """Tests block blooms for Transfer logs of given token contracts.
+
+    `may_have_transfer` is true when the bloom may contain a Transfer log of
+    one of the contracts. `may_match` additionally requires one of the
+    watched addresses as an indexed topic (sender or receiver). Bloom false
+    positives are possible, negatives are exact.
+    """
+
+    def __init__(
+        self,
+        contracts: Iterable[str],
+        transfer_topic: str,
+        addresses: Optional[Iterable[str]] = None,
+    ):
+        self.contract_bits: List[BloomBits] = [
+            bloom_bits(bytes.fromhex(contract[2:])) for contract in contracts
+        ]
+        self.topic_bits = bloom_bits(bytes.fromhex(transfer_topic[2:]))
+        self.address_bits: List[BloomBits] = [
+            bloom_bits(address_topic(address)) for address in addresses or ()
+        ]
+
+    def may_have_transfer(self, bloom: Optional[bytes]) -> bool:
+        """Test for a Transfer log of a target contract. Missing blooms match."""
+        if not bloom:
+            return True
+        return bloom_contains(bloom, self.topic_bits) and any(
+            bloom_contains(bloom, bits) for bits in self.contract_bits
+        )
+
+    def may_match(self, bloom: Optional[bytes]) -> bool:
+        """Test for a Transfer log of a target contract touching a watched address."""
+        if not bloom:
+            return True
+        return self.may_have_transfer(bloom) and any(
+            bloom_contains(bloom, bits) for bits in self.address_bits
+        )
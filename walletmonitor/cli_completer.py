@@ -35,16 +35,18 @@ def setup_logging(verbose: bool = False, debug: bool = False) -> None:
 
 def check_incomplete_transactions(completer: DataCompleter) -> None:
     """检查不完整的交易数量"""
-    incomplete_transactions = completer.get_incomplete_transactions()
-    print(f"Found {len(incomplete_transactions)} transactions with missing wallet info")
+    total = completer.count_incomplete_transactions()
+    print(f"Found {total} transactions with missing wallet info")
 
-    if incomplete_transactions:
+    if total:
+        with completer.db_manager.get_connection() as conn:
+            first = completer.get_incomplete_page(conn, 0, 5)
         print("\nFirst 5 incomplete transactions:")
-        for i, (tx_id, tx_hash) in enumerate(incomplete_transactions[:5]):
+        for i, (tx_id, tx_hash, _, _) in enumerate(first):
             print(f"  {i+1}. ID: {tx_id}, Hash: {tx_hash}")
 
-        if len(incomplete_transactions) > 5:
-            print(f"  ... and {len(incomplete_transactions) - 5} more")
+        if total > 5:
+            print(f"  ... and {total - 5} more")
 
 
 def test_single_transaction(completer: DataCompleter, tx_hash: str) -> None:
@@ -159,11 +161,11 @@ def main():
   # 检查不完整的交易
   python cli_completer.py --check
   
-  # 运行数据补齐（默认批处理大小100）
+  # 运行数据补齐（默认每页1000条，4个并发RPC请求）
   python cli_completer.py --run
   
-  # 运行数据补齐（批处理大小50）
-  python cli_completer.py --run --batch-size 50
+  # 运行数据补齐（每页5000条，8个并发RPC请求）
+  python cli_completer.py --run --batch-size 5000 --workers 8
   
   # 测试单个交易
   python cli_completer.py --test-tx 0x1234567890abcdef...
@@ -191,7 +193,11 @@ def main():
     )
 
     parser.add_argument(
-        "--batch-size", type=int, default=100, help="批处理大小 (默认: 100)"
+        "--batch-size", type=int, default=1000, help="每页交易数 (默认: 1000)"
+    )
+
+    parser.add_argument(
+        "--workers", type=int, default=4, help="并发RPC请求数 (默认: 4)"
     )
 
     parser.add_argument("--verbose", "-v", action="store_true", help="详细日志输出")
@@ -238,7 +244,7 @@ def main():
                 check_incomplete_transactions(completer)
             else:
                 print("🚀 开始运行数据补齐程序...")
-                completer.run(batch_size=args.batch_size)
+                completer.run(batch_size=args.batch_size, workers=args.workers)
                 print("✅ 数据补齐程序运行完成")
 
     except KeyboardInterrupt:
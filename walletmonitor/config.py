@@ -25,8 +25,63 @@ class Config:
     MIN_ETH: float = 100.0  # Minimum ETH amount to monitor
     POLL_INTERVAL_SEC: int = 120  # Polling interval in seconds
 
+    # Block streaming configuration
+    STREAM_BLOCKS: bool = False  # Run a cycle per newHeads notification
+    WS_URL: str = "wss://ethereum-rpc.publicnode.com"  # Websocket endpoint for newHeads
+    BLOCK_TIME_SEC: float = 12.0  # Initial block time estimate for fallback polling
+    STREAM_MIN_POLL_SEC: float = 2.0  # Shortest fallback poll interval
+
+    # Watch list configuration
+    WATCH_FULL_RELOAD_SEC: int = 3600  # Full wallets reload interval (drops deleted rows)
+    WATCH_REFRESH_OVERLAP_SEC: int = 300  # updated_at overlap of incremental refreshes
+    LABEL_INDEX_PATH: str = ""  # Memory-mapped label index for all wallets ("" keeps a dict)
+
+    # Block cursor configuration
+    MAX_BLOCKS_PER_CYCLE: int = 300  # Upper bound of blocks fetched per cycle
+    REORG_DEPTH: int = 64  # Number of processed block hashes kept for reorg checks
+
+    # Storage configuration
+    WRITE_BEHIND: bool = True  # Store cycles from a writer thread with group commits
+    WRITE_BEHIND_WAL: str = "write_behind.wal"  # Local log of cycles not yet stored
+    WRITE_BATCH_SIZE: int = 5000  # Pending transactions that trigger a group commit
+    WRITE_MAX_DELAY_SEC: float = 10.0  # Max age of a pending cycle before a commit
+    WRITE_MAX_PENDING: int = 100000  # Pending transactions at which ingest pauses
+    WRITE_MAX_ATTEMPTS: int = 3  # Failed stores of a cycle before it is dead-lettered
+    PARTITION_MONTHS_AHEAD: int = 3  # Monthly transactions partitions created in advance
+    RETENTION_MONTHS: int = 0  # Months of transactions kept by partitions.py (0 keeps all)
+
+    # RPC configuration
+    RPC_BATCH_SIZE: int = 50  # JSON-RPC calls per batch request (1 disables batching)
+    BLOCK_RECEIPTS: bool = True  # Use eth_getBlockReceipts for blocks with candidates
+
+    # ERC20 extraction configuration
+    ERC20_SOURCE: str = "receipts"  # "receipts" (per-tx logs) or "logs" (eth_getLogs)
+    LOGS_BLOCK_RANGE: int = 500  # Blocks per eth_getLogs call
+    LOGS_ADDRESS_CHUNK: int = 200  # Watched addresses per topic filter
+    MULTICALL_CHUNK_SIZE: int = 500  # Balance lookups per Multicall3 aggregate3 call
+    BLOOM_PREFILTER: str = "receipts"  # "off", "receipts" or "blocks" (see README)
+
+    # Price configuration
+    PRICE_STORE_PATH: str = "eth_price_1m.bin"  # Persisted minute prices ("" disables)
+    PRICE_REFRESH_SEC: float = 15.0  # Current-minute refresh interval (0 disables)
+
+    # Engine configuration
+    ENGINE: str = "sync"  # "sync" (BlockProcessor) or "async" (AsyncBlockProcessor)
+    ASYNC_RPC_CONCURRENCY: int = 8  # Concurrent JSON-RPC requests of the async engine
+    ASYNC_LABEL_CONCURRENCY: int = 4  # Concurrent Arkham lookups of the async engine
+
     # Arkham API configuration
     ARKHAM_API_KEY: Optional[str] = None  # Optional: Add your Arkham API key
+    LABEL_WORKERS: int = 4  # Background label lookup threads (0 = inline lookups)
+    LABEL_RATE_PER_SEC: float = 2.0  # Arkham lookups per second across workers
+    LABEL_NEGATIVE_TTL_SEC: int = 21600  # Retry delay for addresses without label
+    LABEL_FLUSH_SEC: float = 10.0  # Interval of bulk label writes to wallets
+    LABEL_SWEEP_SEC: float = 300.0  # Interval of placeholder wallet re-lookups (0 disables)
+    LABEL_SWEEP_BATCH: int = 1000  # Placeholder wallets queued per sweep
+    LABEL_CACHE_SIZE: int = 100000  # Resolved and unlabelled addresses kept in memory
+
+    # Metrics configuration
+    METRICS_PORT: int = 9108  # Port of the Prometheus /metrics endpoint (0 disables)
 
     # Logging configuration
     LOG_LEVEL: str = "INFO"  # Changed to DEBUG for detailed logging
@@ -45,7 +100,70 @@ def load_config() -> Config:
         PUBLICNODE_URL=os.getenv("PUBLICNODE_URL", Config.PUBLICNODE_URL),
         MIN_ETH=float(os.getenv("MIN_ETH", Config.MIN_ETH)),
         POLL_INTERVAL_SEC=int(os.getenv("POLL_INTERVAL_SEC", Config.POLL_INTERVAL_SEC)),
+        STREAM_BLOCKS=os.getenv("STREAM_BLOCKS", "false").lower() == "true",
+        WS_URL=os.getenv("WS_URL", Config.WS_URL),
+        BLOCK_TIME_SEC=float(os.getenv("BLOCK_TIME_SEC", Config.BLOCK_TIME_SEC)),
+        STREAM_MIN_POLL_SEC=float(
+            os.getenv("STREAM_MIN_POLL_SEC", Config.STREAM_MIN_POLL_SEC)
+        ),
+        WATCH_FULL_RELOAD_SEC=int(
+            os.getenv("WATCH_FULL_RELOAD_SEC", Config.WATCH_FULL_RELOAD_SEC)
+        ),
+        WATCH_REFRESH_OVERLAP_SEC=int(
+            os.getenv("WATCH_REFRESH_OVERLAP_SEC", Config.WATCH_REFRESH_OVERLAP_SEC)
+        ),
+        LABEL_INDEX_PATH=os.getenv("LABEL_INDEX_PATH", Config.LABEL_INDEX_PATH),
+        MAX_BLOCKS_PER_CYCLE=int(
+            os.getenv("MAX_BLOCKS_PER_CYCLE", Config.MAX_BLOCKS_PER_CYCLE)
+        ),
+        REORG_DEPTH=int(os.getenv("REORG_DEPTH", Config.REORG_DEPTH)),
+        WRITE_BEHIND=os.getenv("WRITE_BEHIND", "true").lower() == "true",
+        WRITE_BEHIND_WAL=os.getenv("WRITE_BEHIND_WAL", Config.WRITE_BEHIND_WAL),
+        WRITE_BATCH_SIZE=int(os.getenv("WRITE_BATCH_SIZE", Config.WRITE_BATCH_SIZE)),
+        WRITE_MAX_DELAY_SEC=float(
+            os.getenv("WRITE_MAX_DELAY_SEC", Config.WRITE_MAX_DELAY_SEC)
+        ),
+        WRITE_MAX_PENDING=int(os.getenv("WRITE_MAX_PENDING", Config.WRITE_MAX_PENDING)),
+        WRITE_MAX_ATTEMPTS=int(os.getenv("WRITE_MAX_ATTEMPTS", Config.WRITE_MAX_ATTEMPTS)),
+        PARTITION_MONTHS_AHEAD=int(
+            os.getenv("PARTITION_MONTHS_AHEAD", Config.PARTITION_MONTHS_AHEAD)
+        ),
+        RETENTION_MONTHS=int(os.getenv("RETENTION_MONTHS", Config.RETENTION_MONTHS)),
+        RPC_BATCH_SIZE=int(os.getenv("RPC_BATCH_SIZE", Config.RPC_BATCH_SIZE)),
+        BLOCK_RECEIPTS=os.getenv("BLOCK_RECEIPTS", "true").lower() == "true",
+        ERC20_SOURCE=os.getenv("ERC20_SOURCE", Config.ERC20_SOURCE).lower(),
+        LOGS_BLOCK_RANGE=int(os.getenv("LOGS_BLOCK_RANGE", Config.LOGS_BLOCK_RANGE)),
+        LOGS_ADDRESS_CHUNK=int(
+            os.getenv("LOGS_ADDRESS_CHUNK", Config.LOGS_ADDRESS_CHUNK)
+        ),
+        MULTICALL_CHUNK_SIZE=int(
+            os.getenv("MULTICALL_CHUNK_SIZE", Config.MULTICALL_CHUNK_SIZE)
+        ),
+        BLOOM_PREFILTER=os.getenv("BLOOM_PREFILTER", Config.BLOOM_PREFILTER).lower(),
+        PRICE_STORE_PATH=os.getenv("PRICE_STORE_PATH", Config.PRICE_STORE_PATH),
+        PRICE_REFRESH_SEC=float(
+            os.getenv("PRICE_REFRESH_SEC", Config.PRICE_REFRESH_SEC)
+        ),
+        ENGINE=os.getenv("ENGINE", Config.ENGINE).lower(),
+        ASYNC_RPC_CONCURRENCY=int(
+            os.getenv("ASYNC_RPC_CONCURRENCY", Config.ASYNC_RPC_CONCURRENCY)
+        ),
+        ASYNC_LABEL_CONCURRENCY=int(
+            os.getenv("ASYNC_LABEL_CONCURRENCY", Config.ASYNC_LABEL_CONCURRENCY)
+        ),
         ARKHAM_API_KEY=os.getenv("ARKHAM_API_KEY", Config.ARKHAM_API_KEY),
+        LABEL_WORKERS=int(os.getenv("LABEL_WORKERS", Config.LABEL_WORKERS)),
+        LABEL_RATE_PER_SEC=float(
+            os.getenv("LABEL_RATE_PER_SEC", Config.LABEL_RATE_PER_SEC)
+        ),
+        LABEL_NEGATIVE_TTL_SEC=int(
+            os.getenv("LABEL_NEGATIVE_TTL_SEC", Config.LABEL_NEGATIVE_TTL_SEC)
+        ),
+        LABEL_FLUSH_SEC=float(os.getenv("LABEL_FLUSH_SEC", Config.LABEL_FLUSH_SEC)),
+        LABEL_SWEEP_SEC=float(os.getenv("LABEL_SWEEP_SEC", Config.LABEL_SWEEP_SEC)),
+        LABEL_SWEEP_BATCH=int(os.getenv("LABEL_SWEEP_BATCH", Config.LABEL_SWEEP_BATCH)),
+        LABEL_CACHE_SIZE=int(os.getenv("LABEL_CACHE_SIZE", Config.LABEL_CACHE_SIZE)),
+        METRICS_PORT=int(os.getenv("METRICS_PORT", Config.METRICS_PORT)),
         LOG_LEVEL=os.getenv("LOG_LEVEL", Config.LOG_LEVEL),
         LOG_FORMAT=os.getenv("LOG_FORMAT", Config.LOG_FORMAT),
         DEBUG_MODE=os.getenv("DEBUG_MODE", "true").lower() == "true",
@@ -3,16 +3,25 @@
 """
 
 import logging
-from typing import List, Optional, Tuple
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 from block_processor import BlockProcessor
 from config import Config, load_config
 from database import DatabaseManager
 from models import Wallet
+from psycopg2.extras import execute_values
 from web3 import Web3
 
 logger = logging.getLogger(__name__)
 
+# 缺失钱包信息的交易条件（与 idx_transactions_incomplete 部分索引的谓词一致）
+INCOMPLETE_CONDITION = "(from_wallet_id IS NULL OR to_wallet_id IS NULL)"
+
+# (id, hash, from_wallet_id, to_wallet_id)
+IncompleteRow = Tuple[int, str, Optional[int], Optional[int]]
+
 
 class DataCompleter:
     """数据补齐器，用于补充数据库中缺失的钱包信息"""
@@ -30,6 +39,49 @@ class DataCompleter:
 
         logger.info("DataCompleter initialized successfully")
 
+    def count_incomplete_transactions(self) -> int:
+        """统计缺失钱包信息的交易数量（走部分索引）"""
+        with self.db_manager.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"SELECT COUNT(*) FROM transactions WHERE {INCOMPLETE_CONDITION}")
+                return cur.fetchone()[0]
+
+    def get_incomplete_page(self, conn, after_id: int, limit: int) -> List[IncompleteRow]:
+        """
+        按 id 做 keyset 分页，获取 id > after_id 的一页不完整交易
+
+        Args:
+            conn: 数据库连接
+            after_id: 上一页最后一条交易的 id（第一页传 0）
+            limit: 每页条数
+
+        Returns:
+            List[IncompleteRow]: 按 id 升序的 (id, hash, from_wallet_id, to_wallet_id)
+        """
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT id, hash, from_wallet_id, to_wallet_id
+                FROM transactions
+                WHERE {INCOMPLETE_CONDITION} AND id > %s
+                ORDER BY id
+                LIMIT %s
+                """,
+                (after_id, limit),
+            )
+            return cur.fetchall()
+
+    def iter_incomplete_pages(self, page_size: int):
+        """逐页返回不完整交易，每页单独查询，不会一次加载全部记录"""
+        after_id = 0
+        while True:
+            with self.db_manager.get_connection() as conn:
+                page = self.get_incomplete_page(conn, after_id, page_size)
+            if not page:
+                return
+            yield page
+            after_id = page[-1][0]
+
     def get_incomplete_transactions(self) -> List[Tuple[int, str]]:
         """
         获取数据库中缺失钱包信息的交易记录
@@ -37,22 +89,9 @@ class DataCompleter:
         Returns:
             List[Tuple[int, str]]: 包含 (transaction_id, hash) 的列表
         """
-        incomplete_transactions = []
-
-        with self.db_manager.get_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    SELECT id, hash 
-                    FROM transactions 
-                    WHERE from_wallet_id IS NULL OR to_wallet_id IS NULL
-                    ORDER BY id
-                """
-                )
-
-                for row in cur.fetchall():
-                    incomplete_transactions.append((row[0], row[1]))
-
+        incomplete_transactions = [
+            (row[0], row[1]) for page in self.iter_incomplete_pages(10000) for row in page
+        ]
         logger.info(
             f"Found {len(incomplete_transactions)} transactions with missing wallet info"
         )
@@ -329,50 +368,175 @@ class DataCompleter:
                 logger.error(f"Error processing transaction {tx_id}: {e}")
                 return False
 
-    def run(self, batch_size: int = 100) -> None:
+    def fetch_transactions(
+        self, pool: ThreadPoolExecutor, page: List[IncompleteRow]
+    ) -> List[Future]:
+        """按 RPC 批次并发获取一页交易的详情，返回各批次的 Future"""
+        rpc_batch = self.block_processor.rpc_batch
+        hashes = [row[1] for row in page]
+        step = rpc_batch.batch_size
+        return [
+            pool.submit(rpc_batch.get_transactions, hashes[i : i + step])
+            for i in range(0, len(hashes), step)
+        ]
+
+    def resolve_wallet_ids(self, conn, addresses: List[str]) -> Dict[str, int]:
         """
-        运行数据补齐程序
+        批量解析一页中所有地址的钱包ID
+
+        已有钱包一次查询得到；新地址经 extract_wallet_info 获取标签（启用
+        LabelEnricher 时为占位钱包，标签在后台补齐），再一次性批量写入。
+
+        Returns:
+            Dict[str, int]: 小写地址 -> 钱包ID
+        """
+        addresses = list(dict.fromkeys(address.lower() for address in addresses if address))
+        if not addresses:
+            return {}
+        known = self.db_manager.get_wallets_batch(conn, addresses)
+        wallets = [known[address] for address in addresses if address in known]
+        wallets.extend(
+            self.block_processor.extract_wallet_info(address)
+            for address in addresses
+            if address not in known
+        )
+        return self.db_manager.upsert_wallets(conn, wallets)
+
+    def update_page(self, conn, updates: List[Tuple[int, Optional[int], Optional[int]]]) -> int:
+        """
+        一条语句批量更新一页交易的钱包ID，只填充仍为空的字段
 
         Args:
-            batch_size: 批处理大小
+            conn: 数据库连接
+            updates: (transaction_id, from_wallet_id, to_wallet_id) 列表
+
+        Returns:
+            int: 更新的行数
         """
-        logger.info("Starting data completion process...")
+        if not updates:
+            return 0
+        with conn.cursor() as cur:
+            execute_values(
+                cur,
+                """
+                UPDATE transactions AS t
+                SET from_wallet_id = COALESCE(t.from_wallet_id, v.from_wallet_id),
+                    to_wallet_id = COALESCE(t.to_wallet_id, v.to_wallet_id)
+                FROM (VALUES %s) AS v(id, from_wallet_id, to_wallet_id)
+                WHERE t.id = v.id
+                """,
+                updates,
+                template="(%s::bigint, %s::bigint, %s::bigint)",
+                page_size=len(updates),
+            )
+            return cur.rowcount
+
+    def complete_page(
+        self, page: List[IncompleteRow], details: List[Optional[dict]]
+    ) -> Tuple[int, int]:
+        """
+        补齐一页交易：地址去重后统一解析，单个事务内批量更新并提交
+
+        Returns:
+            Tuple[int, int]: (更新的交易数, 失败的交易数)
+        """
+        resolved = []
+        addresses = []
+        failed = 0
+        for (tx_id, tx_hash, from_wallet_id, to_wallet_id), tx in zip(page, details):
+            if not tx:
+                logger.warning(f"Failed to get transaction details for {tx_hash}")
+                failed += 1
+                continue
+            from_address = tx.get("from") if from_wallet_id is None else None
+            to_address = tx.get("to") if to_wallet_id is None else None
+            resolved.append((tx_id, from_address, to_address))
+            addresses.extend(address for address in (from_address, to_address) if address)
 
-        # 获取所有不完整的交易
-        incomplete_transactions = self.get_incomplete_transactions()
+        with self.db_manager.get_connection() as conn:
+            try:
+                wallet_ids = self.resolve_wallet_ids(conn, addresses)
+                updates = [
+                    (
+                        tx_id,
+                        wallet_ids.get(from_address.lower()) if from_address else None,
+                        wallet_ids.get(to_address.lower()) if to_address else None,
+                    )
+                    for tx_id, from_address, to_address in resolved
+                ]
+                updates = [update for update in updates if update[1] or update[2]]
+                updated = self.update_page(conn, updates)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                # 缓存中可能有回滚掉的新钱包
+                self.db_manager.clear_cache()
+                logger.error(f"Error completing transactions {page[0][0]}-{page[-1][0]}: {e}")
+                return 0, len(page)
+        return updated, failed
 
-        if not incomplete_transactions:
+    def run(self, batch_size: int = 1000, workers: int = 4) -> None:
+        """
+        运行数据补齐程序
+
+        按 id 做 keyset 分页（每页 batch_size 条），交易详情由 workers 个线程
+        按 RPC 批次并发获取；下一页的详情在处理当前页时预取。每页的地址统一
+        去重解析，并用一条 UPDATE 写回。
+
+        Args:
+            batch_size: 每页交易数
+            workers: 并发 RPC 请求数
+        """
+        logger.info("Starting data completion process...")
+        total = self.count_incomplete_transactions()
+        if not total:
             logger.info("No incomplete transactions found")
             return
+        logger.info(f"Found {total} incomplete transactions to process")
 
-        logger.info(
-            f"Found {len(incomplete_transactions)} incomplete transactions to process"
-        )
+        enricher = self.block_processor.label_enricher
+        if enricher is not None:
+            enricher.start()
 
-        # 分批处理
         success_count = 0
         error_count = 0
-
-        for i in range(0, len(incomplete_transactions), batch_size):
-            batch = incomplete_transactions[i : i + batch_size]
-            logger.info(
-                f"Processing batch {i//batch_size + 1}/{(len(incomplete_transactions) + batch_size - 1)//batch_size}"
-            )
-
-            for tx_id, tx_hash in batch:
-                try:
-                    if self.process_transaction(tx_id, tx_hash):
-                        success_count += 1
-                    else:
-                        error_count += 1
-                except Exception as e:
-                    logger.error(f"Error processing transaction {tx_id}: {e}")
-                    error_count += 1
+        processed = 0
+        started = time.monotonic()
+        pages = self.iter_incomplete_pages(max(1, batch_size))
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                page = next(pages, None)
+                futures = self.fetch_transactions(pool, page) if page else []
+                while page:
+                    next_page = next(pages, None)
+                    next_futures = self.fetch_transactions(pool, next_page) if next_page else []
+
+                    details = [tx for future in futures for tx in future.result()]
+                    updated, failed = self.complete_page(page, details)
+                    success_count += updated
+                    error_count += failed
+                    processed += len(page)
+
+                    elapsed = time.monotonic() - started
+                    logger.info(
+                        f"Processed {processed}/{total} transactions up to id {page[-1][0]} "
+                        f"({updated} updated, {failed} failed, {processed / elapsed:.0f} tx/s)"
+                    )
+                    page, futures = next_page, next_futures
+        finally:
+            if enricher is not None:
+                pending = enricher.pending()
+                enricher.stop()
+                if pending:
+                    logger.warning(
+                        f"{pending} addresses were still waiting for labels, "
+                        f"the monitor's placeholder sweep will retry them"
+                    )
 
         logger.info(f"Data completion process finished:")
         logger.info(f"  Successfully processed: {success_count}")
         logger.info(f"  Failed: {error_count}")
-        logger.info(f"  Total: {len(incomplete_transactions)}")
+        logger.info(f"  Total: {processed}")
 
 
 def main():
@@ -391,7 +555,7 @@ def main():
         completer = DataCompleter(config)
 
         # 运行数据补齐
-        completer.run(batch_size=50)
+        completer.run()
 
     except Exception as e:
         logger.error(f"Data completion process failed: {e}", exc_info=True)
@@ -3,22 +3,121 @@ Optimized database operations for wallet monitoring system.
 """
 
 import logging
+import re
 from contextlib import contextmanager
+from datetime import datetime
 from decimal import Decimal
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
-import psycopg2
 from config import DATABASE_URL
-from models import Transaction, Wallet
-from psycopg2.extras import execute_batch
+from db_pool import get_pool
+from metrics import stage, timed
+from models import BlockCheckpoint, Transaction, Wallet
+from psycopg2 import sql
+from psycopg2.extras import execute_batch, execute_values
 
 logger = logging.getLogger(__name__)
 
+# Number of processed block hashes kept for reorg detection
+DEFAULT_CHECKPOINT_RETENTION = 64
+
+# Bounds of a range partition as printed by pg_get_expr(relpartbound)
+PARTITION_BOUND_RE = re.compile(r"FROM \('?(-?\d+)'?\) TO \('?(-?\d+)'?\)")
+
+# Flow rollup tables and their bucket size in seconds, per group and per wallet type
+FLOW_ROLLUPS = {"flow_rollup_1m": 60, "flow_rollup_1h": 3600, "flow_rollup_1d": 86400}
+WALLET_TYPE_ROLLUPS = {
+    "wallet_type_rollup_1m": 60,
+    "wallet_type_rollup_1h": 3600,
+    "wallet_type_rollup_1d": 86400,
+}
+ROLLUP_TABLES = {**FLOW_ROLLUPS, **WALLET_TYPE_ROLLUPS}
+
+
+def _rollup_upsert(table: str, size: int, key: str, flows: str) -> str:
+    """CTE upserting the `flows` CTE, keyed by `key`, into one rollup table."""
+    return f"""
+        {table} AS (
+            INSERT INTO {table} (bucket, {key}, token_id, direction, amount, usd_value, tx_count)
+            SELECT (timestamp / {size}) * {size}, {key}, token_id, direction,
+                   sum(amount), COALESCE(sum(usd_value), 0), count(*)
+            FROM {flows}
+            GROUP BY 1, 2, 3, 4
+            ON CONFLICT (bucket, {key}, token_id, direction) DO UPDATE
+            SET amount = {table}.amount + EXCLUDED.amount,
+                usd_value = {table}.usd_value + EXCLUDED.usd_value,
+                tx_count = {table}.tx_count + EXCLUDED.tx_count
+            RETURNING 1
+        )"""
+
+
+def flow_rollup_sql(source: str) -> str:
+    """One statement adding the transfers of `source` to all flow rollups.
+
+    `source` selects (timestamp, from_wallet_id, to_wallet_id, token_id,
+    amount, usd_value). Each transfer counts as 'out' for the sender's
+    grp_name and wallet type and 'in' for the receiver's; unlabelled
+    wallets and transfers within one group (or type) are left out.
+    """
+    upserts = [
+        _rollup_upsert(table, size, "grp_name", "flows")
+        for table, size in FLOW_ROLLUPS.items()
+    ] + [
+        _rollup_upsert(table, size, "wallet_type", "type_flows")
+        for table, size in WALLET_TYPE_ROLLUPS.items()
+    ]
+    return f"""
+        WITH source AS ({source}),
+        labelled AS (
+            SELECT s.timestamp, s.token_id, s.amount, s.usd_value,
+                   fw.grp_name AS from_grp, tw.grp_name AS to_grp,
+                   lower(fwt.name) AS from_type, lower(twt.name) AS to_type
+            FROM source s
+            LEFT JOIN wallets fw ON fw.id = s.from_wallet_id
+            LEFT JOIN wallets tw ON tw.id = s.to_wallet_id
+            LEFT JOIN wallet_types fwt ON fwt.id = fw.wallet_type_id
+            LEFT JOIN wallet_types twt ON twt.id = tw.wallet_type_id
+        ),
+        flows AS (
+            SELECT timestamp, to_grp AS grp_name, token_id, 'in' AS direction, amount, usd_value
+            FROM labelled
+            WHERE to_grp IS NOT NULL AND to_grp <> 'UNK' AND from_grp IS DISTINCT FROM to_grp
+            UNION ALL
+            SELECT timestamp, from_grp, token_id, 'out', amount, usd_value
+            FROM labelled
+            WHERE from_grp IS NOT NULL AND from_grp <> 'UNK' AND from_grp IS DISTINCT FROM to_grp
+        ),
+        type_flows AS (
+            SELECT timestamp, to_type AS wallet_type, token_id, 'in' AS direction, amount, usd_value
+            FROM labelled
+            WHERE to_type IS NOT NULL AND to_type <> 'unk' AND from_type IS DISTINCT FROM to_type
+            UNION ALL
+            SELECT timestamp, from_type, token_id, 'out', amount, usd_value
+            FROM labelled
+            WHERE from_type IS NOT NULL AND from_type <> 'unk'
+              AND from_type IS DISTINCT FROM to_type
+        ),
+        {",".join(upserts)}
+        SELECT count(*) FROM flows
+    """
+
+
+def address_bytes(address: str) -> Optional[bytes]:
+    """20-byte form of a hex address (`wallets.address_bytes`), None if not hex."""
+    if len(address) != 42 or address[:2].lower() != "0x":
+        return None
+    try:
+        key = bytes.fromhex(address[2:])
+    except ValueError:
+        return None
+    return key if len(key) == 20 else None
+
 
 class DatabaseManager:
     """Optimized database manager with batch operations and caching."""
 
-    def __init__(self):
+    def __init__(self, database_url: Optional[str] = None):
+        self.database_url = database_url or DATABASE_URL
         self._wallet_cache: Dict[str, Wallet] = {}
         self._token_cache: Dict[str, int] = {}
         self._chain_cache: Dict[str, int] = {}
@@ -26,12 +125,12 @@ class DatabaseManager:
 
     @contextmanager
     def get_connection(self):
-        """Get database connection with context manager."""
-        conn = psycopg2.connect(DATABASE_URL)
-        try:
+        """Get a pooled database connection with context manager.
+
+        Uncommitted work is rolled back when the connection is returned.
+        """
+        with get_pool(self.database_url).connection() as conn:
             yield conn
-        finally:
-            conn.close()
 
     def clear_cache(self):
         """Clear all caches."""
@@ -219,12 +318,14 @@ class DatabaseManager:
             result = cur.fetchone()
             if result is None:
                 # If no new record was inserted, get the existing one
+                key = address_bytes(wallet.address)
+                column = "address" if key is None else "address_bytes"
                 cur.execute(
-                    """
-                    SELECT id FROM wallets  
-                    WHERE lower(address) = %s AND chain_id = (SELECT id FROM chains WHERE name = %s)
+                    f"""
+                    SELECT id FROM wallets
+                    WHERE {column} = %s AND chain_id = (SELECT id FROM chains WHERE name = %s)
                     """,
-                    (wallet.address, wallet.chain_id),
+                    (wallet.address if key is None else key, wallet.chain_id),
                 )
                 result = cur.fetchone()
                 if result is None:
@@ -237,6 +338,100 @@ class DatabaseManager:
             self._wallet_cache[wallet.address] = wallet
             return wallet_id
 
+    @timed("db_labels", cycle=False)
+    def upsert_wallet_labels(self, conn, wallets: List[Wallet]) -> int:
+        """Store resolved labels in bulk, returning the number of rows written.
+
+        Missing wallets are inserted; existing rows are only overwritten while
+        they still carry the placeholder name from `get_or_create_wallet`, so
+        curated labels are kept.
+        """
+        if not wallets:
+            return 0
+
+        rows = {}
+        for wallet in wallets:
+            wallet.wallet_type = self.determine_wallet_type(wallet.friendly_name)
+            wallet_type_id = self.get_or_create_wallet_type(conn, wallet.wallet_type)
+            if wallet_type_id == 2:
+                wallet.grp_type = "Hot"
+            rows[wallet.address.lower()] = (
+                wallet.address.lower(),
+                wallet.chain_id,
+                wallet.friendly_name,
+                wallet.grp_type or "UNK",
+                wallet.grp_name or "UNK",
+                wallet_type_id,
+            )
+
+        with conn.cursor() as cur:
+            execute_values(
+                cur,
+                """
+                INSERT INTO wallets (address, chain_id, friendly_name, grp_type, grp_name, wallet_type_id)
+                SELECT v.address, c.id, v.friendly_name, v.grp_type, v.grp_name, v.wallet_type_id
+                FROM (VALUES %s) AS v(address, chain, friendly_name, grp_type, grp_name, wallet_type_id)
+                JOIN chains c ON c.name = v.chain
+                ON CONFLICT (address, chain_id) DO UPDATE
+                SET friendly_name = EXCLUDED.friendly_name,
+                    grp_type = EXCLUDED.grp_type,
+                    grp_name = EXCLUDED.grp_name,
+                    wallet_type_id = EXCLUDED.wallet_type_id
+                WHERE wallets.friendly_name IS NULL
+                   OR wallets.friendly_name = 'Wallet ' || left(wallets.address, 8)
+                """,
+                list(rows.values()),
+                page_size=len(rows),
+            )
+            updated = cur.rowcount
+
+        for wallet in wallets:
+            cached = self._wallet_cache.get(wallet.address.lower())
+            if cached is not None:
+                cached.friendly_name = wallet.friendly_name
+                cached.grp_name = wallet.grp_name
+                cached.grp_type = wallet.grp_type
+        return updated
+
+    def record_label_checks(self, conn, addresses: List[str]) -> None:
+        """Remember that label lookups of these addresses found nothing."""
+        if not addresses:
+            return
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO wallet_label_checks (wallet_id, checked_at)
+                SELECT id, CURRENT_TIMESTAMP FROM wallets WHERE address = ANY(%s)
+                ON CONFLICT (wallet_id) DO UPDATE SET checked_at = EXCLUDED.checked_at
+                """,
+                ([address.lower() for address in addresses],),
+            )
+
+    def get_placeholder_wallets(
+        self, conn, before_id: int, retry_after_sec: float, limit: int
+    ) -> List[Tuple[int, str]]:
+        """Placeholder wallets below `before_id`, newest first, as (id, address).
+
+        Wallets whose last lookup found nothing less than `retry_after_sec`
+        ago are skipped.
+        """
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT w.id, w.address
+                FROM wallets w
+                LEFT JOIN wallet_label_checks c ON c.wallet_id = w.id
+                WHERE (w.friendly_name IS NULL OR w.friendly_name = 'Wallet ' || left(w.address, 8))
+                  AND w.id < %s
+                  AND (c.checked_at IS NULL
+                       OR c.checked_at < CURRENT_TIMESTAMP - %s * interval '1 second')
+                ORDER BY w.id DESC
+                LIMIT %s
+                """,
+                (before_id, retry_after_sec, limit),
+            )
+            return cur.fetchall()
+
     def get_wallets_batch(self, conn, addresses: List[str]) -> Dict[str, Wallet]:
         """Get multiple wallets in batch."""
         if not addresses:
@@ -258,17 +453,27 @@ class DatabaseManager:
         if not uncached_addresses:
             return result
 
+        # Hex addresses are matched on the address_bytes index, anything
+        # else (e.g. Tron) on the text column
+        keys, others = [], []
+        for addr in uncached_addresses:
+            key = address_bytes(addr)
+            if key is None:
+                others.append(addr)
+            else:
+                keys.append(key)
+
         # Query database for uncached addresses
         with conn.cursor() as cur:
-            placeholders = ",".join(["%s"] * len(uncached_addresses))
             cur.execute(
-                f"""
-                SELECT w.id, w.address, w.chain_id, w.friendly_name, w.grp_type, w.grp_name, wt.name as wallet_type
+                """
+                SELECT w.id, lower(w.address), w.chain_id, w.friendly_name, w.grp_type, w.grp_name,
+                       wt.name as wallet_type
                 FROM wallets w
                 LEFT JOIN wallet_types wt ON w.wallet_type_id = wt.id
-                WHERE LOWER(w.address) IN ({placeholders})
+                WHERE w.address_bytes = ANY(%s::bytea[]) OR w.address = ANY(%s::text[])
                 """,
-                uncached_addresses,
+                (keys, others),
             )
 
             for row in cur.fetchall():
@@ -286,36 +491,126 @@ class DatabaseManager:
 
         return result
 
+    def upsert_wallets(self, conn, wallets: List[Wallet]) -> Dict[str, int]:
+        """Get or create many wallets in one statement, returning ids by address.
+
+        Wallets are expected to be deduplicated by address. New rows get the
+        same defaults as `get_or_create_wallet`; existing rows are left as is.
+        """
+        ids: Dict[str, int] = {}
+        rows = []
+        for wallet in wallets:
+            wallet.address = wallet.address.lower() if wallet.address else ""
+            cached = self._wallet_cache.get(wallet.address)
+            if cached is not None and cached.id is not None:
+                wallet.id = cached.id
+                ids[wallet.address] = cached.id
+                continue
+
+            if wallet.wallet_type is None:
+                wallet.wallet_type = self.determine_wallet_type(wallet.friendly_name)
+            wallet_type_id = self.get_or_create_wallet_type(conn, wallet.wallet_type)
+            if wallet_type_id == 2:
+                wallet.grp_type = "Hot"
+            rows.append(
+                (
+                    wallet.address,
+                    wallet.chain_id,
+                    wallet.friendly_name or f"Wallet {wallet.address[:8]}",
+                    wallet.grp_type or "UNK",
+                    wallet.grp_name or "UNK",
+                    wallet_type_id,
+                )
+            )
+
+        if not rows:
+            return ids
+
+        columns = list(zip(*rows))
+        with conn.cursor() as cur:
+            # The final SELECT sees the snapshot before the INSERT, so existing
+            # rows come from it and new rows from RETURNING
+            cur.execute(
+                """
+                WITH input AS (
+                    SELECT t.address, c.id AS chain_id, t.friendly_name, t.grp_type,
+                           t.grp_name, t.wallet_type_id
+                    FROM unnest(%s::text[], %s::text[], %s::text[], %s::text[],
+                                %s::text[], %s::bigint[])
+                         AS t(address, chain, friendly_name, grp_type, grp_name, wallet_type_id)
+                    JOIN chains c ON c.name = t.chain
+                ),
+                inserted AS (
+                    INSERT INTO wallets (address, chain_id, friendly_name, grp_type, grp_name, wallet_type_id)
+                    SELECT address, chain_id, friendly_name, grp_type, grp_name, wallet_type_id
+                    FROM input
+                    ON CONFLICT (address, chain_id) DO NOTHING
+                    RETURNING id, address
+                )
+                SELECT id, address FROM inserted
+                UNION ALL
+                SELECT w.id, w.address
+                FROM wallets w
+                JOIN input i ON w.address = i.address AND w.chain_id = i.chain_id
+                """,
+                [list(column) for column in columns],
+            )
+            for wallet_id, address in cur.fetchall():
+                ids[address] = wallet_id
+
+            # A row committed by another writer after the snapshot was taken
+            # is skipped by the INSERT and not seen by the SELECT; a new
+            # statement sees it
+            missing = [row[:2] for row in rows if row[0] not in ids]
+            if missing:
+                cur.execute(
+                    """
+                    SELECT w.id, w.address
+                    FROM unnest(%s::text[], %s::text[]) AS t(address, chain)
+                    JOIN chains c ON c.name = t.chain
+                    JOIN wallets w ON w.address = t.address AND w.chain_id = c.id
+                    """,
+                    [list(column) for column in zip(*missing)],
+                )
+                for wallet_id, address in cur.fetchall():
+                    ids[address] = wallet_id
+                logger.debug(f"Re-read {len(missing)} wallets inserted concurrently")
+
+        for wallet in wallets:
+            wallet_id = ids.get(wallet.address)
+            if wallet_id is None:
+                raise ValueError(f"Failed to get wallet: {wallet.address}")
+            wallet.id = wallet_id
+            self._wallet_cache[wallet.address] = wallet
+
+        logger.debug(f"Upserted {len(rows)} wallets ({len(wallets) - len(rows)} cached)")
+        return ids
+
+    @timed("db_write")
     def store_transactions_batch(self, conn, transactions: List[Transaction]) -> None:
-        """Store transactions in batch with optimized queries."""
+        """Store transactions in batch with set-based queries.
+
+        Wallets are deduplicated by address and resolved with one upsert,
+        transactions are inserted with multi-row INSERTs.
+        """
         if not transactions:
             return
 
-        # First, ensure all wallet objects from transactions are stored in the database
-        all_wallets = (
-            []
-        )  # Use list instead of set since Wallet objects are not hashable
-        for tx in transactions:
-            if tx.from_wallet and tx.from_wallet not in all_wallets:
-                all_wallets.append(tx.from_wallet)
-            if tx.to_wallet and tx.to_wallet not in all_wallets:
-                all_wallets.append(tx.to_wallet)
-
-        # Store all wallet objects first
-        for wallet in all_wallets:
-            self.get_or_create_wallet(conn, wallet)
-        conn.commit()
-        # Get all unique addresses (for wallets that might not have Wallet objects)
-        all_addresses = set()
+        # Dedupe wallets by address, labelled Wallet objects take precedence
+        wallets: Dict[str, Wallet] = {}
         for tx in transactions:
-            # Only add addresses that don't have Wallet objects
-            if not tx.from_wallet:
-                all_addresses.add(tx.from_address.lower() if tx.from_address else "")
-            if not tx.to_wallet:
-                all_addresses.add(tx.to_address.lower() if tx.to_address else "")
+            for wallet, address in (
+                (tx.from_wallet, tx.from_address),
+                (tx.to_wallet, tx.to_address),
+            ):
+                if wallet is None:
+                    wallet = Wallet(address=address or "")
+                key = wallet.address.lower()
+                known = wallets.get(key)
+                if known is None or (not known.friendly_name and wallet.friendly_name):
+                    wallets[key] = wallet
 
-        # Get or create wallets for addresses without Wallet objects
-        address_wallets = self.get_wallets_batch(conn, list(all_addresses))
+        wallet_ids = self.upsert_wallets(conn, list(wallets.values()))
 
         # Get or create chain and tokens
         chain_id = self.get_or_create_chain(conn, "ethereum")
@@ -327,30 +622,8 @@ class DatabaseManager:
         # Prepare transaction data for batch insert
         tx_data = []
         for tx in transactions:
-            # Get wallet IDs - prioritize Wallet objects over address lookups
-            if tx.from_wallet and tx.from_wallet.id:
-                from_wallet_id = tx.from_wallet.id
-            else:
-                from_address = tx.from_address.lower() if tx.from_address else ""
-                from_wallet = address_wallets.get(from_address)
-                if from_wallet:
-                    from_wallet_id = from_wallet.id
-                else:
-                    # Create a new wallet for this address
-                    temp_wallet = Wallet(address=from_address)
-                    from_wallet_id = self.get_or_create_wallet(conn, temp_wallet)
-
-            if tx.to_wallet and tx.to_wallet.id:
-                to_wallet_id = tx.to_wallet.id
-            else:
-                to_address = tx.to_address.lower() if tx.to_address else ""
-                to_wallet = address_wallets.get(to_address)
-                if to_wallet:
-                    to_wallet_id = to_wallet.id
-                else:
-                    # Create a new wallet for this address
-                    temp_wallet = Wallet(address=to_address)
-                    to_wallet_id = self.get_or_create_wallet(conn, temp_wallet)
+            from_address = tx.from_wallet.address if tx.from_wallet else tx.from_address
+            to_address = tx.to_wallet.address if tx.to_wallet else tx.to_address
 
             # Handle None amount values
             amount_value = tx.amount if tx.amount is not None else Decimal(0.0)
@@ -359,8 +632,8 @@ class DatabaseManager:
                 (
                     tx.hash.hex() if isinstance(tx.hash, bytes) else tx.hash,
                     tx.block_number,
-                    from_wallet_id,
-                    to_wallet_id,
+                    wallet_ids[(from_address or "").lower()],
+                    wallet_ids[(to_address or "").lower()],
                     token_ids[tx.token],
                     amount_value,
                     tx.timestamp,
@@ -371,22 +644,66 @@ class DatabaseManager:
                 )
             )
 
-        # Batch insert transactions
+        # Multi-row insert of all transactions
         with conn.cursor() as cur:
-            execute_batch(
+            inserted = execute_values(
                 cur,
                 """
-                INSERT INTO transactions (hash, block_number, from_wallet_id, to_wallet_id, 
+                INSERT INTO transactions (hash, block_number, from_wallet_id, to_wallet_id,
                                         token_id, amount, timestamp, chain_id, usd_value, from_balance, to_balance)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (hash) DO NOTHING
+                VALUES %s
+                ON CONFLICT (hash, timestamp) DO NOTHING
+                RETURNING timestamp, from_wallet_id, to_wallet_id, token_id, amount, usd_value
                 """,
                 tx_data,
-                page_size=100,
+                page_size=1000,
+                fetch=True,
             )
 
+        # Only rows that were new count, in the same database transaction
+        self.update_flow_rollups(conn, inserted)
         logger.info(f"Stored {len(transactions)} transactions in batch")
 
+    @timed("db_rollups")
+    def update_flow_rollups(self, conn, rows: List[tuple]) -> int:
+        """Add stored transfers to the flow rollup tables, returning the flow rows added.
+
+        `rows` are (timestamp, from_wallet_id, to_wallet_id, token_id, amount,
+        usd_value) tuples of newly inserted transactions.
+        """
+        if not rows:
+            return 0
+        source = """
+            SELECT * FROM unnest(%s::bigint[], %s::bigint[], %s::bigint[], %s::bigint[],
+                                 %s::numeric[], %s::numeric[])
+                AS t(timestamp, from_wallet_id, to_wallet_id, token_id, amount, usd_value)
+        """
+        with conn.cursor() as cur:
+            cur.execute(flow_rollup_sql(source), [list(column) for column in zip(*rows)])
+            return cur.fetchone()[0]
+
+    def rebuild_flow_rollups(self, conn, start: int, end: int) -> int:
+        """Recompute the flow rollups of [start, end) from transactions.
+
+        `start` and `end` must be day aligned so every bucket is rebuilt
+        whole. The rollup tables stay locked against concurrent ingest until
+        the caller commits. Returns the number of flow rows aggregated.
+        """
+        if start % 86400 or end % 86400:
+            raise ValueError(f"Rebuild range {start}-{end} is not day aligned")
+        with conn.cursor() as cur:
+            for table in ROLLUP_TABLES:
+                # Ingest waits here, so no increment is lost or counted twice
+                cur.execute(f"LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE")
+                cur.execute(f"DELETE FROM {table} WHERE bucket >= %s AND bucket < %s", (start, end))
+            source = """
+                SELECT timestamp, from_wallet_id, to_wallet_id, token_id, amount, usd_value
+                FROM transactions
+                WHERE timestamp >= %s AND timestamp < %s
+            """
+            cur.execute(flow_rollup_sql(source), (start, end))
+            return cur.fetchone()[0]
+
     def get_hot_wallets(self, conn, all_addresses: bool = False) -> Dict[str, Wallet]:
         """Get hot wallets with caching."""
         with conn.cursor() as cur:
@@ -423,15 +740,330 @@ class DatabaseManager:
 
             return wallets
 
-    def store_all_data(self, transactions: List[Transaction]) -> None:
-        """Store all data in a single transaction with batch operations."""
+    @timed("db_watch_list")
+    def get_wallets_since(
+        self, conn, since: Optional[datetime] = None, hot_only: bool = False
+    ) -> List[Tuple[Wallet, Optional[str], datetime]]:
+        """Get wallets updated at or after `since` (all wallets if None).
+
+        With `hot_only` only wallets with grp_type 'Hot' are returned.
+        Returns (wallet, chain name, updated_at) rows.
+        """
+        query = """
+            SELECT w.id, lower(w.address), w.grp_name, w.friendly_name, w.grp_type,
+                   wt.name as wallet_type, c.name, w.updated_at
+            FROM wallets w
+            LEFT JOIN wallet_types wt ON w.wallet_type_id = wt.id
+            LEFT JOIN chains c ON w.chain_id = c.id
+        """
+        conditions, params = [], []
+        if since is not None:
+            conditions.append("w.updated_at >= %s")
+            params.append(since)
+        if hot_only:
+            conditions.append("w.grp_type = 'Hot'")
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        with conn.cursor() as cur:
+            cur.execute(query, params)
+
+            rows = []
+            for row in cur.fetchall():
+                wallet = Wallet(
+                    id=row[0],
+                    address=row[1] or "",
+                    grp_name=row[2],
+                    friendly_name=row[3],
+                    grp_type=row[4],
+                    wallet_type=row[5],
+                )
+                self._wallet_cache[wallet.address] = wallet
+                rows.append((wallet, row[6], row[7]))
+            return rows
+
+    def get_block_checkpoints(
+        self,
+        conn,
+        chain_name: str = "ethereum",
+        limit: int = DEFAULT_CHECKPOINT_RETENTION,
+    ) -> List[BlockCheckpoint]:
+        """Get the most recently processed blocks, newest first."""
+        chain_id = self.get_or_create_chain(conn, chain_name)
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT block_number, block_hash, parent_hash
+                FROM block_checkpoints
+                WHERE chain_id = %s
+                ORDER BY block_number DESC
+                LIMIT %s
+                """,
+                (chain_id, limit),
+            )
+            return [
+                BlockCheckpoint(
+                    block_number=row[0],
+                    block_hash=row[1],
+                    parent_hash=row[2],
+                    chain=chain_name,
+                )
+                for row in cur.fetchall()
+            ]
+
+    @timed("db_checkpoints")
+    def store_block_checkpoints(
+        self,
+        conn,
+        checkpoints: List[BlockCheckpoint],
+        retain: int = DEFAULT_CHECKPOINT_RETENTION,
+    ) -> None:
+        """Store processed block checkpoints and prune old ones."""
+        if not checkpoints:
+            return
+
+        chain_name = checkpoints[0].chain
+        chain_id = self.get_or_create_chain(conn, chain_name)
+        with conn.cursor() as cur:
+            execute_batch(
+                cur,
+                """
+                INSERT INTO block_checkpoints (chain_id, block_number, block_hash, parent_hash)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (chain_id, block_number) DO UPDATE
+                SET block_hash = EXCLUDED.block_hash,
+                    parent_hash = EXCLUDED.parent_hash,
+                    created_at = CURRENT_TIMESTAMP
+                """,
+                [
+                    (chain_id, cp.block_number, cp.block_hash, cp.parent_hash)
+                    for cp in checkpoints
+                ],
+                page_size=100,
+            )
+            newest = max(cp.block_number for cp in checkpoints)
+            cur.execute(
+                "DELETE FROM block_checkpoints WHERE chain_id = %s AND block_number <= %s",
+                (chain_id, newest - retain),
+            )
+
+        logger.debug(f"Stored {len(checkpoints)} block checkpoints up to {newest}")
+
+    def plan_backfill_shards(
+        self,
+        conn,
+        from_block: int,
+        to_block: int,
+        shard_size: int,
+        chain_name: str = "ethereum",
+    ) -> List[Tuple[int, int, int]]:
+        """Register the shards of a backfill range and get the unfinished ones.
+
+        Shards already registered by an earlier run keep their progress.
+        Returns (start_block, end_block, next_block) tuples.
+        """
+        chain_id = self.get_or_create_chain(conn, chain_name)
+        shards = [
+            (chain_id, start, min(start + shard_size - 1, to_block), start)
+            for start in range(from_block, to_block + 1, shard_size)
+        ]
+        with conn.cursor() as cur:
+            execute_values(
+                cur,
+                """
+                INSERT INTO backfill_shards (chain_id, start_block, end_block, next_block)
+                VALUES %s
+                ON CONFLICT (chain_id, start_block, end_block) DO NOTHING
+                """,
+                shards,
+                page_size=1000,
+            )
+            cur.execute(
+                """
+                SELECT start_block, end_block, next_block
+                FROM backfill_shards
+                WHERE chain_id = %s
+                  AND start_block >= %s AND end_block <= %s
+                  AND next_block <= end_block
+                ORDER BY start_block
+                """,
+                (chain_id, from_block, to_block),
+            )
+            return [tuple(row) for row in cur.fetchall()]
+
+    def advance_backfill_shard(
+        self,
+        conn,
+        start_block: int,
+        end_block: int,
+        next_block: int,
+        chain_name: str = "ethereum",
+    ) -> None:
+        """Record that a shard was processed up to next_block - 1."""
+        chain_id = self.get_or_create_chain(conn, chain_name)
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE backfill_shards
+                SET next_block = %s,
+                    updated_at = CURRENT_TIMESTAMP,
+                    completed_at = CASE WHEN %s > end_block THEN CURRENT_TIMESTAMP END
+                WHERE chain_id = %s AND start_block = %s AND end_block = %s
+                """,
+                (next_block, next_block, chain_id, start_block, end_block),
+            )
+
+    def get_transaction_partitions(
+        self, conn
+    ) -> Optional[List[Tuple[str, Optional[int], Optional[int]]]]:
+        """Get (name, start, end) of the transactions partitions, ordered by start.
+
+        The default partition has no bounds. Returns None if transactions is
+        not partitioned (migrations/006 not applied).
+        """
+        with conn.cursor() as cur:
+            cur.execute("SELECT relkind FROM pg_class WHERE oid = 'transactions'::regclass")
+            if cur.fetchone()[0] != "p":
+                return None
+            cur.execute(
+                """
+                SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'transactions'::regclass
+                """
+            )
+            partitions = []
+            for name, bound in cur.fetchall():
+                match = PARTITION_BOUND_RE.search(bound)
+                if match:
+                    partitions.append((name, int(match.group(1)), int(match.group(2))))
+                else:
+                    partitions.append((name, None, None))
+        return sorted(partitions, key=lambda p: (p[1] is not None, p[1] or 0))
+
+    def get_default_partition_start(self, conn) -> Optional[int]:
+        """Get the oldest timestamp in transactions_default (None if it is empty or missing)."""
+        with conn.cursor() as cur:
+            cur.execute("SELECT to_regclass('transactions_default') IS NOT NULL")
+            if not cur.fetchone()[0]:
+                return None
+            cur.execute("SELECT min(timestamp) FROM transactions_default")
+            return cur.fetchone()[0]
+
+    def create_transaction_partition(self, conn, name: str, start: int, end: int) -> int:
+        """Attach a transactions partition for timestamps in [start, end).
+
+        Rows of that range already in the default partition are moved into
+        it. Returns the number of moved rows.
+        """
+        table = sql.Identifier(name)
+        with conn.cursor() as cur:
+            cur.execute(
+                sql.SQL(
+                    "CREATE TABLE {} (LIKE transactions INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+                ).format(table)
+            )
+            cur.execute("SELECT to_regclass('transactions_default') IS NOT NULL")
+            moved = 0
+            if cur.fetchone()[0]:
+                cur.execute(
+                    sql.SQL(
+                        """
+                        WITH moved AS (
+                            DELETE FROM transactions_default
+                            WHERE timestamp >= %s AND timestamp < %s
+                            RETURNING *
+                        )
+                        INSERT INTO {} SELECT * FROM moved
+                        """
+                    ).format(table),
+                    (start, end),
+                )
+                moved = cur.rowcount
+            # Attaching creates the partitioned indexes on the new table
+            cur.execute(
+                sql.SQL(
+                    "ALTER TABLE transactions ATTACH PARTITION {} FOR VALUES FROM (%s) TO (%s)"
+                ).format(table),
+                (start, end),
+            )
+        logger.info(f"Created partition {name} ({moved} rows moved from default)")
+        return moved
+
+    def detach_transaction_partition(self, conn, name: str, drop: bool = False) -> None:
+        """Detach a transactions partition, dropping it if `drop` is set."""
+        table = sql.Identifier(name)
+        with conn.cursor() as cur:
+            cur.execute(sql.SQL("ALTER TABLE transactions DETACH PARTITION {}").format(table))
+            if drop:
+                cur.execute(sql.SQL("DROP TABLE {}").format(table))
+        logger.info(f"{'Dropped' if drop else 'Detached'} partition {name}")
+
+    @timed("db_rollback")
+    def rollback_to_block(
+        self, conn, fork_block: int, chain_name: str = "ethereum"
+    ) -> int:
+        """Remove data of blocks orphaned by a reorg (everything after fork_block).
+
+        The flow rollups of the days the removed transfers fell on are
+        rebuilt in the same database transaction, so storing the canonical
+        blocks again does not count them twice. Rebuilding rather than
+        subtracting uses the same labels for every transfer of the day, even
+        if a wallet was relabelled after its transfers were added.
+        """
+        chain_id = self.get_or_create_chain(conn, chain_name)
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                DELETE FROM transactions WHERE chain_id = %s AND block_number > %s
+                RETURNING timestamp
+                """,
+                (chain_id, fork_block),
+            )
+            timestamps = [row[0] for row in cur.fetchall()]
+            removed = len(timestamps)
+            if timestamps:
+                self.rebuild_flow_rollups(
+                    conn, min(timestamps) // 86400 * 86400, max(timestamps) // 86400 * 86400 + 86400
+                )
+            cur.execute(
+                "DELETE FROM block_checkpoints WHERE chain_id = %s AND block_number > %s",
+                (chain_id, fork_block),
+            )
+
+        logger.warning(
+            f"Rolled back to block {fork_block}, removed {removed} orphaned transactions"
+        )
+        return removed
+
+    def store_all_data(
+        self,
+        transactions: List[Transaction],
+        checkpoints: Optional[List[BlockCheckpoint]] = None,
+        reorg_block: Optional[int] = None,
+        checkpoint_retention: int = DEFAULT_CHECKPOINT_RETENTION,
+    ) -> None:
+        """Store all data in a single transaction with batch operations.
+
+        Orphaned blocks are rolled back and the block cursor is advanced in the
+        same database transaction, so a crash never leaves them out of sync.
+        """
         try:
             with self.get_connection() as conn:
 
+                if reorg_block is not None:
+                    self.rollback_to_block(conn, reorg_block)
+
                 # Store transactions
                 self.store_transactions_batch(conn, transactions)
 
-                conn.commit()
+                if checkpoints:
+                    self.store_block_checkpoints(
+                        conn, checkpoints, retain=checkpoint_retention
+                    )
+
+                with stage("db_commit"):
+                    conn.commit()
                 logger.info(f"Successfully stored {len(transactions)} transactions")
 
         except Exception as e:
@@ -0,0 +1,132 @@
+"""
+Table-driven decoding of ERC20 Transfer logs.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from eth_utils import keccak, to_checksum_address
+
+# keccak("Transfer(address,address,uint256)") as raw bytes
+TRANSFER_TOPIC = keccak(text="Transfer(address,address,uint256)")
+
+
+class TokenInfo:
+    """Metadata of a decoded token."""
+
+    __slots__ = ("symbol", "contract", "decimals", "scale", "priced_in_eth")
+
+    def __init__(self, symbol: str, contract: str, decimals: int, priced_in_eth: bool = False):
+        self.symbol = symbol
+        self.contract = contract
+        self.decimals = decimals
+        self.scale = float(10**decimals)
+        self.priced_in_eth = priced_in_eth
+
+    def amount(self, raw_amount: int, eth_price: float) -> float:
+        """Amount in the units the monitor stores (USD for ETH-priced tokens)."""
+        if self.priced_in_eth:
+            return eth_price * raw_amount / self.scale
+        return raw_amount / self.scale
+
+
+class Erc20Transfer:
+    """A kept Transfer log; addresses are only formatted when read."""
+
+    __slots__ = ("token", "from_topic", "to_topic", "raw_amount", "amount")
+
+    def __init__(self, token: TokenInfo, from_topic: bytes, to_topic: bytes, raw_amount: int, amount: float):
+        self.token = token
+        self.from_topic = from_topic
+        self.to_topic = to_topic
+        self.raw_amount = raw_amount
+        self.amount = amount
+
+    @property
+    def from_address(self) -> str:
+        """Lowercase sender address."""
+        return "0x" + bytes(self.from_topic[12:]).hex()
+
+    @property
+    def to_address(self) -> str:
+        """Lowercase recipient address."""
+        return "0x" + bytes(self.to_topic[12:]).hex()
+
+
+class Erc20Decoder:
+    """Decodes Transfer logs of a fixed set of tokens in one pass.
+
+    Token metadata is looked up by the log's contract address in every form
+    a provider returns it (checksummed or lowercase hex, 20 raw bytes), so
+    no address is converted per log. topic0 is compared as raw bytes, and
+    amounts are filtered against per-token thresholds in raw units that are
+    computed once per (min_eth, eth_price). Only kept transfers get their
+    amount converted; addresses are formatted when read and checksummed
+    only on request.
+    """
+
+    def __init__(
+        self,
+        contracts: Dict[str, str],
+        decimals: Dict[str, int],
+        eth_priced: Iterable[str] = ("WETH",),
+    ):
+        eth_priced = set(eth_priced)
+        self.tokens: Dict[object, TokenInfo] = {}
+        for contract, symbol in contracts.items():
+            token = TokenInfo(
+                symbol,
+                to_checksum_address(contract),
+                decimals.get(symbol, 18),
+                symbol in eth_priced,
+            )
+            self.tokens[token.contract] = token
+            self.tokens[token.contract.lower()] = token
+            self.tokens[bytes.fromhex(token.contract[2:])] = token
+        self._thresholds_key: Optional[Tuple[float, float]] = None
+        self._thresholds: Dict[str, float] = {}
+
+    def thresholds(self, min_eth: float, eth_price: float) -> Dict[str, float]:
+        """Minimum raw amount per token symbol for transfers worth min_eth."""
+        key = (min_eth, eth_price)
+        if key != self._thresholds_key:
+            min_usd = min_eth * eth_price
+            thresholds = {}
+            for token in self.tokens.values():
+                if token.priced_in_eth:
+                    # eth_price * raw / scale >= min_usd
+                    thresholds[token.symbol] = (
+                        min_usd * token.scale / eth_price if eth_price else float("inf")
+                    )
+                else:
+                    thresholds[token.symbol] = min_usd * token.scale
+            self._thresholds = thresholds
+            self._thresholds_key = key
+        return self._thresholds
+
+    def decode(self, logs: Iterable, min_eth: float, eth_price: float) -> List[Erc20Transfer]:
+        """Decode target token transfers worth at least min_eth, in log order."""
+        tokens = self.tokens
+        thresholds = self.thresholds(min_eth, eth_price)
+        transfer_topic = TRANSFER_TOPIC
+        kept = []
+        for log in logs:
+            token = tokens.get(log["address"])
+            if token is None:
+                continue
+            topics = log["topics"]
+            if len(topics) != 3 or topics[0] != transfer_topic:
+                continue
+            raw_amount = int.from_bytes(log["data"], "big")
+            if raw_amount < thresholds[token.symbol]:
+                continue
+            kept.append(
+                Erc20Transfer(
+                    token, topics[1], topics[2], raw_amount, token.amount(raw_amount, eth_price)
+                )
+            )
+        return kept
+
+    @staticmethod
+    def checksum(address: str) -> str:
+        """Checksummed form of a decoded (lowercase) address."""
+        return to_checksum_address(address)
@@ -0,0 +1,178 @@
+"""
+newHeads websocket subscription used to trigger cycles as blocks arrive.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Optional
+
+import websockets
+
+logger = logging.getLogger(__name__)
+
+
+class HeadStream:
+    """Tracks the chain head from an `eth_subscribe("newHeads")` websocket.
+
+    The subscription runs in a background thread with its own event loop and
+    reconnects with backoff when it drops. `wait` blocks until a head newer
+    than a given block is seen. While the subscription is down,
+    `next_poll_delay` gives the time until the next block is expected, based
+    on the last block timestamp and the observed block time, so polling
+    stays about one block behind.
+    """
+
+    def __init__(
+        self,
+        ws_url: str,
+        block_time: float = 12.0,
+        min_poll: float = 2.0,
+        max_reconnect_delay: float = 60.0,
+    ):
+        self.ws_url = ws_url
+        self.block_time = block_time
+        self.min_poll = min_poll
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self.connected = False
+        self.head: Optional[int] = None
+        self.head_timestamp: Optional[int] = None
+        self.heads_received = 0
+        self.reconnects = 0
+
+        self._reconnect_delay = 1.0
+        self._cond = threading.Condition()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._closing = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def observe(self, number: int, timestamp: int) -> None:
+        """Record a block seen by the subscription or by polling."""
+        with self._cond:
+            if self.head is not None and number <= self.head:
+                return
+            if self.head is not None and self.head_timestamp is not None:
+                # Smoothed seconds per block, robust to missed heads
+                per_block = (timestamp - self.head_timestamp) / (number - self.head)
+                if per_block > 0:
+                    self.block_time = 0.8 * self.block_time + 0.2 * per_block
+            self.head = number
+            self.head_timestamp = timestamp
+            self._cond.notify_all()
+
+    def wait(self, after: Optional[int], timeout: float) -> Optional[int]:
+        """Wait up to `timeout` seconds for a head above `after`; returns it or None."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self.head is None or (after is not None and self.head <= after):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            return self.head
+
+    def next_poll_delay(self, now: Optional[float] = None) -> float:
+        """Seconds until the next block is expected, for polling without a subscription."""
+        if self.head_timestamp is None:
+            return self.block_time
+        now = time.time() if now is None else now
+        expected = self.head_timestamp + self.block_time - now
+        if expected < self.min_poll:
+            # Late block: poll again soon without hammering the node
+            return self.min_poll
+        return min(expected, self.block_time)
+
+    def _on_message(self, message: str) -> None:
+        data = json.loads(message)
+        header = data.get("params", {}).get("result")
+        if not isinstance(header, dict) or "number" not in header:
+            return
+        self.heads_received += 1
+        self.observe(int(header["number"], 16), int(header["timestamp"], 16))
+
+    async def _subscribe(self) -> None:
+        """Subscribe and consume heads until the connection drops or stop is set."""
+        async with websockets.connect(self.ws_url, ping_interval=20) as ws:
+            await ws.send(
+                json.dumps(
+                    {"jsonrpc": "2.0", "id": 1, "method": "eth_subscribe", "params": ["newHeads"]}
+                )
+            )
+            response = json.loads(await asyncio.wait_for(ws.recv(), timeout=10))
+            if "error" in response:
+                raise RuntimeError(f"eth_subscribe failed: {response['error']}")
+
+            with self._cond:
+                self.connected = True
+                self._cond.notify_all()
+            # A confirmed subscription starts the next drop's backoff over
+            self._reconnect_delay = 1.0
+            logger.info(f"Subscribed to newHeads on {self.ws_url}")
+
+            stop = asyncio.ensure_future(self._stop.wait())
+            try:
+                while not self._stop.is_set():
+                    recv = asyncio.ensure_future(ws.recv())
+                    await asyncio.wait({recv, stop}, return_when=asyncio.FIRST_COMPLETED)
+                    if not recv.done():
+                        recv.cancel()
+                        break
+                    self._on_message(recv.result())
+            finally:
+                stop.cancel()
+
+    async def _run(self) -> None:
+        self._stop = asyncio.Event()
+        self._reconnect_delay = 1.0
+        while not self._stop.is_set() and not self._closing.is_set():
+            try:
+                await self._subscribe()
+            except Exception as e:
+                logger.warning(
+                    f"newHeads subscription lost, polling every ~{self.block_time:.0f}s "
+                    f"and reconnecting in {self._reconnect_delay:.0f}s: {e}"
+                )
+            finally:
+                with self._cond:
+                    self.connected = False
+                    self._cond.notify_all()
+            if self._stop.is_set():
+                break
+            self.reconnects += 1
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self._reconnect_delay)
+            except asyncio.TimeoutError:
+                pass
+            self._reconnect_delay = min(self._reconnect_delay * 2, self.max_reconnect_delay)
+
+    def _thread_main(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._run())
+        finally:
+            self._loop.close()
+
+    def start(self) -> None:
+        """Start the subscription thread."""
+        if self._thread is not None:
+            return
+        self._closing.clear()
+        self._thread = threading.Thread(target=self._thread_main, name="head-stream", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Close the subscription and stop the thread."""
+        if self._thread is None:
+            return
+        self._closing.set()
+        if self._loop is not None and self._stop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._stop.set)
+            except RuntimeError:
+                pass  # loop already finished
+        self._thread.join(timeout=timeout)
+        self._thread = None
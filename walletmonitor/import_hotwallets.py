@@ -1,17 +1,60 @@
 """
 Import hot wallet data from CSV to database.
+
+The CSV is streamed into a staging table with COPY, normalized and merged
+into `wallets` with set-based SQL in a single transaction:
+
+    python import_hotwallets.py hotwallet.csv
+    python import_hotwallets.py hotwallet.csv --dry-run --show 50
 """
 
+import argparse
 import csv
 import logging
-from typing import Dict, List
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Optional
 
 from database import DatabaseManager
+from psycopg2 import sql
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Chains whose wallets are imported (Tron addresses are skipped for now)
+IMPORTED_CHAINS = ("ethereum",)
+
+REQUIRED_COLUMNS = ("address", "chain_id", "friendly_name", "grp_type", "grp_name")
+
+# Wallet types resolved from friendly_name, same rules as
+# DatabaseManager.determine_wallet_type
+WALLET_TYPES = ("cold", "hot", "deposit", "internal", "regular")
+WALLET_TYPE_SQL = """
+    CASE
+        WHEN lower(friendly_name) LIKE '%%cold%%' THEN 'cold'
+        WHEN lower(friendly_name) LIKE '%%hot%%' THEN 'hot'
+        WHEN lower(friendly_name) LIKE '%%deposit%%' THEN 'deposit'
+        WHEN lower(friendly_name) LIKE '%%internal%%' THEN 'internal'
+        ELSE 'regular'
+    END
+"""
+
+# Label columns compared to decide whether an existing wallet changes
+LABEL_COLUMNS = ("friendly_name", "grp_type", "grp_name", "wallet_type_id")
+
+
+@dataclass
+class ImportStats:
+    """Outcome of an import (or of a dry run)."""
+
+    rows: int = 0  # CSV data rows
+    skipped: int = 0  # Rows of other chains or with invalid addresses
+    duplicates: int = 0  # Repeated (address, chain) rows, the last one wins
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
 
 def get_chain_mapping() -> Dict[int, str]:
     """Get mapping from CSV chain_id to database chain name."""
@@ -21,119 +64,238 @@ def get_chain_mapping() -> Dict[int, str]:
     }
 
 
-def import_hotwallets(csv_file: str = "hotwallet.csv"):
-    """Import hot wallet data from CSV file."""
-    try:
-        db_manager = DatabaseManager()
-        chain_mapping = get_chain_mapping()
-
-        # First, ensure we have all required chains in the database
-        with db_manager.get_connection() as conn:
-            with conn.cursor() as cur:
-                # Insert chains if they don't exist
-                for chain_id, chain_name in chain_mapping.items():
-                    cur.execute(
-                        "INSERT INTO chains (name, native_sym) VALUES (%s, %s) ON CONFLICT (name) DO NOTHING",
-                        (chain_name, "ETH" if chain_name == "ethereum" else "TRX"),
-                    )
-
-                # Get chain ID mappings from database
-                cur.execute(
-                    "SELECT id, name FROM chains WHERE name IN %s",
-                    (tuple(chain_mapping.values()),),
-                )
-                db_chains = {row[1]: row[0] for row in cur.fetchall()}
-
-                logger.info(f"Found chains in database: {db_chains}")
-
-        # Read CSV and prepare data for insertion
-        wallets_to_insert = []
-
-        with open(csv_file, "r", encoding="utf-8") as file:
-            reader = csv.DictReader(file)
-
-            for row in reader:
-                csv_chain_id = int(row["chain_id"])
-                if csv_chain_id not in chain_mapping:
-                    logger.warning(f"Skipping unknown chain_id: {csv_chain_id}")
-                    continue
-
-                chain_name = chain_mapping[csv_chain_id]
-                db_chain_id = db_chains.get(chain_name)
-
-                if not db_chain_id:
-                    logger.error(f"Chain {chain_name} not found in database")
-                    continue
-
-                # Skip Tron addresses for now (chain_id = 7)
-                if csv_chain_id == 7:
-                    logger.info(f"Skipping Tron address: {row['address']}")
-                    continue
-
-                # Validate address length (max 42 characters for Ethereum)
-                address = row["address"]
-                if len(address) > 42:
-                    logger.warning(f"Address too long, skipping: {address}")
-                    continue
-
-                wallet_data = {
-                    "address": address,
-                    "chain_id": db_chain_id,
-                    "friendly_name": row["friendly_name"],
-                    "grp_type": row["grp_type"],
-                    "grp_name": row["grp_name"].lower() if row["grp_name"] else None,
-                }
-
-                wallets_to_insert.append(wallet_data)
-
-        logger.info(f"Prepared {len(wallets_to_insert)} wallets for insertion")
+def ensure_chains(cur) -> None:
+    """Make sure all chains of the CSV mapping exist."""
+    for chain_name in get_chain_mapping().values():
+        cur.execute(
+            "INSERT INTO chains (name, native_sym) VALUES (%s, %s) ON CONFLICT (name) DO NOTHING",
+            (chain_name, "ETH" if chain_name == "ethereum" else "TRX"),
+        )
 
-        # Insert wallets in batches
-        batch_size = 100
-        inserted_count = 0
-        skipped_count = 0
 
+def copy_csv(cur, file, delimiter: str) -> int:
+    """COPY the CSV into the `wallet_import_raw` staging table; returns the row count.
+
+    Staging columns follow the CSV header, so extra columns are accepted
+    (and ignored) in any order.
+    """
+    header = next(csv.reader([file.readline()], delimiter=delimiter), [])
+    columns = [name.strip().lower() for name in header]
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        raise ValueError(f"CSV header lacks columns: {', '.join(missing)}")
+    columns = [
+        name if name in REQUIRED_COLUMNS and name not in columns[:i] else f"extra_{i}"
+        for i, name in enumerate(columns)
+    ]
+
+    # Temporary tables are never WAL-logged and disappear with the transaction
+    cur.execute(
+        sql.SQL(
+            "CREATE TEMP TABLE wallet_import_raw (line BIGSERIAL, {}) ON COMMIT DROP"
+        ).format(
+            sql.SQL(", ").join(sql.SQL("{} TEXT").format(sql.Identifier(c)) for c in columns)
+        )
+    )
+    cur.copy_expert(
+        sql.SQL("COPY wallet_import_raw ({}) FROM STDIN WITH (FORMAT csv, DELIMITER {})")
+        .format(sql.SQL(", ").join(map(sql.Identifier, columns)), sql.Literal(delimiter))
+        .as_string(cur),
+        file,
+    )
+    cur.execute("SELECT count(*) FROM wallet_import_raw")
+    return cur.fetchone()[0]
+
+
+def stage_wallets(cur, stats: ImportStats) -> int:
+    """Normalize staged rows into `wallet_import`; returns the wallet count.
+
+    Addresses are lowercased and validated, CSV chain ids mapped to chains,
+    grp_name lowercased and wallet_type_id resolved from friendly_name.
+    Repeated (address, chain) rows keep the last one.
+    """
+    mapping = {str(k): v for k, v in get_chain_mapping().items() if v in IMPORTED_CHAINS}
+    cur.execute(
+        "INSERT INTO wallet_types (name) SELECT unnest(%s::text[]) ON CONFLICT (name) DO NOTHING",
+        (list(WALLET_TYPES),),
+    )
+    cur.execute(
+        f"""
+        CREATE TEMP TABLE wallet_import ON COMMIT DROP AS
+        WITH normalized AS (
+            SELECT r.line,
+                   lower(trim(r.address)) AS address,
+                   c.id AS chain_id,
+                   NULLIF(trim(r.friendly_name), '') AS friendly_name,
+                   NULLIF(trim(r.grp_type), '') AS grp_type,
+                   lower(NULLIF(trim(r.grp_name), '')) AS grp_name
+            FROM wallet_import_raw r
+            JOIN unnest(%s::text[], %s::text[]) AS m(csv_chain_id, chain)
+                 ON m.csv_chain_id = trim(r.chain_id)
+            JOIN chains c ON c.name = m.chain
+            WHERE lower(trim(r.address)) ~ '^0x[0-9a-f]{{40}}$'
+        ),
+        typed AS (
+            SELECT n.*, wt.id AS wallet_type_id, wt.name AS wallet_type
+            FROM normalized n
+            JOIN wallet_types wt ON wt.name = {WALLET_TYPE_SQL}
+        )
+        SELECT DISTINCT ON (address, chain_id)
+               address, decode(substr(address, 3), 'hex') AS address_bytes,
+               chain_id, friendly_name,
+               CASE WHEN wallet_type = 'hot' THEN 'Hot' ELSE grp_type END AS grp_type,
+               grp_name, wallet_type_id, count(*) OVER (PARTITION BY address, chain_id) AS copies
+        FROM typed
+        ORDER BY address, chain_id, line DESC
+        """,
+        (list(mapping), list(mapping.values())),
+    )
+    cur.execute("SELECT count(*), COALESCE(sum(copies), 0) FROM wallet_import")
+    staged, accepted = cur.fetchone()
+    stats.skipped = stats.rows - accepted
+    stats.duplicates = accepted - staged
+    return staged
+
+
+def label_changed(old: str, new: str) -> sql.Composable:
+    """SQL test whether any label column differs between two row aliases."""
+    return sql.SQL("({}) IS DISTINCT FROM ({})").format(
+        sql.SQL(", ").join(sql.Identifier(old, c) for c in LABEL_COLUMNS),
+        sql.SQL(", ").join(sql.Identifier(new, c) for c in LABEL_COLUMNS),
+    )
+
+
+def diff_wallets(cur, stats: ImportStats, show: int) -> List[tuple]:
+    """Count what a merge would do and return up to `show` changed rows."""
+    changed = label_changed("w", "i")
+    cur.execute(
+        sql.SQL(
+            """
+            SELECT count(*) FILTER (WHERE w.id IS NULL),
+                   count(*) FILTER (WHERE w.id IS NOT NULL AND {changed}),
+                   count(*) FILTER (WHERE w.id IS NOT NULL AND NOT {changed})
+            FROM wallet_import i
+            LEFT JOIN wallets w ON w.address_bytes = i.address_bytes AND w.chain_id = i.chain_id
+            """
+        ).format(changed=changed)
+    )
+    stats.inserted, stats.updated, stats.unchanged = cur.fetchone()
+
+    cur.execute(
+        sql.SQL(
+            """
+            SELECT i.address, w.id IS NULL,
+                   w.friendly_name, w.grp_type, w.grp_name, wto.name,
+                   i.friendly_name, i.grp_type, i.grp_name, wtn.name
+            FROM wallet_import i
+            LEFT JOIN wallets w ON w.address_bytes = i.address_bytes AND w.chain_id = i.chain_id
+            LEFT JOIN wallet_types wto ON wto.id = w.wallet_type_id
+            JOIN wallet_types wtn ON wtn.id = i.wallet_type_id
+            WHERE w.id IS NULL OR {changed}
+            ORDER BY i.address
+            LIMIT %s
+            """
+        ).format(changed=changed),
+        (show,),
+    )
+    return cur.fetchall()
+
+
+def merge_wallets(cur, stats: ImportStats) -> None:
+    """Insert new wallets and update changed labels in one statement.
+
+    Rows are matched on `address_bytes`, so wallets stored checksummed are
+    updated rather than inserted a second time.
+    """
+    columns = ("address", "chain_id") + LABEL_COLUMNS
+    cur.execute(
+        sql.SQL(
+            """
+            WITH merged AS (
+                INSERT INTO wallets ({columns})
+                SELECT {columns} FROM wallet_import
+                ON CONFLICT (address_bytes, chain_id) DO UPDATE
+                SET {updates}
+                WHERE {changed}
+                RETURNING (xmax = 0) AS inserted
+            )
+            SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted)
+            FROM merged
+            """
+        ).format(
+            columns=sql.SQL(", ").join(map(sql.Identifier, columns)),
+            updates=sql.SQL(", ").join(
+                sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(c)) for c in LABEL_COLUMNS
+            ),
+            changed=label_changed("wallets", "excluded"),
+        )
+    )
+    stats.inserted, stats.updated = cur.fetchone()
+
+
+def import_hotwallets(
+    csv_file: str = "hotwallet.csv",
+    dry_run: bool = False,
+    show: int = 20,
+    delimiter: str = ",",
+    statement_timeout_ms: int = 0,
+) -> Optional[ImportStats]:
+    """Import hot wallet data from CSV file.
+
+    New wallets are inserted and existing wallets get changed labels
+    (friendly_name, grp_type, grp_name, wallet type) updated. With
+    `dry_run` the changes are only reported and nothing is written.
+    The COPY and the merge run with `statement_timeout_ms` (0 = none)
+    whatever DB_STATEMENT_TIMEOUT_MS the pool uses. Returns None if the
+    import failed.
+    """
+    stats = ImportStats()
+    try:
+        db_manager = DatabaseManager()
         with db_manager.get_connection() as conn:
             with conn.cursor() as cur:
-                for i in range(0, len(wallets_to_insert), batch_size):
-                    batch = wallets_to_insert[i : i + batch_size]
-
-                    # Use ON CONFLICT to skip duplicates
-                    for wallet in batch:
-                        try:
-                            cur.execute(
-                                """
-                                INSERT INTO wallets (address, chain_id, friendly_name, grp_type, grp_name)
-                                VALUES (%(address)s, %(chain_id)s, %(friendly_name)s, %(grp_type)s, %(grp_name)s)
-                                ON CONFLICT (address, chain_id) DO NOTHING
-                            """,
-                                wallet,
-                            )
-
-                            if cur.rowcount > 0:
-                                inserted_count += 1
-                            else:
-                                skipped_count += 1
-
-                        except Exception as e:
-                            logger.error(
-                                f"Error inserting wallet {wallet['address']}: {e}"
-                            )
-                            skipped_count += 1
-
+                # Large files outlast the pool's statement timeout
+                cur.execute("SET LOCAL statement_timeout = %s", (max(0, statement_timeout_ms),))
+                ensure_chains(cur)
+                with open(csv_file, "r", encoding="utf-8-sig", newline="") as file:
+                    stats.rows = copy_csv(cur, file, delimiter)
+                staged = stage_wallets(cur, stats)
+
+                if dry_run:
+                    changes = diff_wallets(cur, stats, show)
+                    conn.rollback()
+                    log_changes(changes)
+                else:
+                    merge_wallets(cur, stats)
+                    stats.unchanged = staged - stats.inserted - stats.updated
                     conn.commit()
-                    logger.info(
-                        f"Processed batch {i//batch_size + 1}, inserted: {inserted_count}, skipped: {skipped_count}"
-                    )
-
-        logger.info(
-            f"Import completed! Inserted: {inserted_count}, Skipped: {skipped_count}"
-        )
-        return True
-
     except Exception as e:
         logger.error(f"Import failed: {e}")
-        return False
+        return None
+
+    logger.info(
+        f"{'Dry run' if dry_run else 'Import'} of {csv_file}: {stats.rows} rows, "
+        f"{stats.inserted} inserted, {stats.updated} updated, {stats.unchanged} unchanged, "
+        f"{stats.skipped} skipped, {stats.duplicates} duplicates"
+    )
+    return stats
+
+
+def log_changes(changes: List[tuple]) -> None:
+    """Log the wallets a dry run would insert or update."""
+    for address, new, *labels in changes:
+        old_labels, new_labels = labels[:4], labels[4:]
+        if new:
+            logger.info(f"  + {address}: {' | '.join(str(v) for v in new_labels)}")
+            continue
+        diffs = [
+            f"{name}: {old!r} -> {value!r}"
+            for name, old, value in zip(
+                ("friendly_name", "grp_type", "grp_name", "wallet_type"), old_labels, new_labels
+            )
+            if old != value
+        ]
+        logger.info(f"  ~ {address}: {', '.join(diffs)}")
 
 
 def verify_import():
@@ -151,10 +313,10 @@ def verify_import():
                 # Count by group
                 cur.execute(
                     """
-                    SELECT grp_name, COUNT(*) 
-                    FROM wallets 
-                    WHERE grp_name IS NOT NULL 
-                    GROUP BY grp_name 
+                    SELECT grp_name, COUNT(*)
+                    FROM wallets
+                    WHERE grp_name IS NOT NULL
+                    GROUP BY grp_name
                     ORDER BY COUNT(*) DESC
                 """
                 )
@@ -163,9 +325,9 @@ def verify_import():
                 # Count by chain
                 cur.execute(
                     """
-                    SELECT c.name, COUNT(*) 
-                    FROM wallets w 
-                    JOIN chains c ON w.chain_id = c.id 
+                    SELECT c.name, COUNT(*)
+                    FROM wallets w
+                    JOIN chains c ON w.chain_id = c.id
                     GROUP BY c.name
                 """
                 )
@@ -186,17 +348,42 @@ def verify_import():
 
 def main():
     """Main function."""
+    parser = argparse.ArgumentParser(description="Import hot wallet labels from a CSV file")
+    parser.add_argument("csv_file", nargs="?", default="hotwallet.csv", help="CSV file")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Report inserts and label changes without writing"
+    )
+    parser.add_argument(
+        "--show", type=int, default=20, help="Changed wallets listed by --dry-run (default: 20)"
+    )
+    parser.add_argument("--delimiter", default=",", help="CSV delimiter (default: ,)")
+    parser.add_argument(
+        "--statement-timeout",
+        type=int,
+        default=0,
+        help="Statement timeout of the import in ms, 0 disables (default: 0)",
+    )
+    parser.add_argument(
+        "--verify", action="store_true", help="Also print wallet counts by group and chain"
+    )
+    args = parser.parse_args()
+
     logger.info("Starting hot wallet import...")
 
-    # Import data
-    success = import_hotwallets()
+    stats = import_hotwallets(
+        args.csv_file,
+        dry_run=args.dry_run,
+        show=max(0, args.show),
+        delimiter=args.delimiter,
+        statement_timeout_ms=args.statement_timeout,
+    )
+    if stats is None:
+        logger.error("Import failed!")
+        sys.exit(1)
 
-    if success:
-        # Verify import
+    if args.verify:
         logger.info("Verifying import...")
         verify_import()
-    else:
-        logger.error("Import failed!")
 
 
 if __name__ == "__main__":
@@ -32,15 +32,45 @@ CREATE TABLE IF NOT EXISTS wallets (
     friendly_name VARCHAR(255),
     grp_type VARCHAR(50),
     grp_name VARCHAR(100),
+    address_bytes BYTEA,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     UNIQUE(address, chain_id)
 );
 
--- Transactions table
+-- Keep hex addresses lowercase and address_bytes as their 20-byte form
+-- (NULL otherwise)
+CREATE OR REPLACE FUNCTION set_wallet_address_bytes()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.address ~* '^0x[0-9a-f]{40}$' THEN
+        -- One spelling per address, so text lookups and ON CONFLICT
+        -- (address, chain_id) agree with the address_bytes index
+        NEW.address = lower(NEW.address);
+        NEW.address_bytes = decode(substr(NEW.address, 3), 'hex');
+    ELSE
+        NEW.address_bytes = NULL;
+    END IF;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER set_wallets_address_bytes BEFORE INSERT OR UPDATE OF address ON wallets
+    FOR EACH ROW EXECUTE FUNCTION set_wallet_address_bytes();
+
+-- Label lookups of placeholder wallets that found nothing (retried after
+-- LABEL_NEGATIVE_TTL_SEC); kept apart so they do not touch wallets.updated_at
+CREATE TABLE IF NOT EXISTS wallet_label_checks (
+    wallet_id BIGINT PRIMARY KEY REFERENCES wallets(id) ON DELETE CASCADE,
+    checked_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Transactions table, range-partitioned by month on timestamp (UTC).
+-- Partition keys must be part of unique constraints, hence (id, timestamp)
+-- and (hash, timestamp). Future partitions come from partitions.py.
 CREATE TABLE IF NOT EXISTS transactions (
-    id BIGSERIAL PRIMARY KEY,
-    hash VARCHAR(66) UNIQUE NOT NULL,
+    id BIGSERIAL,
+    hash VARCHAR(66) NOT NULL,
     block_number BIGINT NOT NULL,
     from_wallet_id BIGINT REFERENCES wallets(id),
     to_wallet_id BIGINT REFERENCES wallets(id),
@@ -49,21 +79,137 @@ CREATE TABLE IF NOT EXISTS transactions (
     timestamp BIGINT NOT NULL,
     chain_id BIGINT REFERENCES chains(id),
     usd_value NUMERIC(30, 2),
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    from_balance NUMERIC(30, 18),
+    to_balance NUMERIC(30, 18),
+    PRIMARY KEY (id, timestamp),
+    UNIQUE (hash, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+-- Rows outside the monthly partitions
+CREATE TABLE IF NOT EXISTS transactions_default PARTITION OF transactions DEFAULT;
+
+-- Monthly partitions for the current and the next three months
+DO $$
+DECLARE
+    month_start TIMESTAMP := date_trunc('month', now() AT TIME ZONE 'UTC');
+BEGIN
+    FOR i IN 0..3 LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF transactions FOR VALUES FROM (%s) TO (%s)',
+            'transactions_' || to_char(month_start, 'YYYY_MM'),
+            extract(epoch FROM month_start)::BIGINT,
+            extract(epoch FROM month_start + interval '1 month')::BIGINT
+        );
+        month_start := month_start + interval '1 month';
+    END LOOP;
+END
+$$;
+
+-- Transfer totals per bucket (start, unix seconds), group, token and
+-- direction ('in' to / 'out' of grp_name), kept up to date on ingest
+CREATE TABLE IF NOT EXISTS flow_rollup_1m (
+    bucket BIGINT NOT NULL,
+    grp_name VARCHAR(100) NOT NULL,
+    token_id BIGINT NOT NULL REFERENCES tokens(id),
+    direction VARCHAR(3) NOT NULL CHECK (direction IN ('in', 'out')),
+    amount NUMERIC(38, 18) NOT NULL,
+    usd_value NUMERIC(30, 2) NOT NULL DEFAULT 0,
+    tx_count BIGINT NOT NULL,
+    PRIMARY KEY (bucket, grp_name, token_id, direction)
+);
+
+CREATE TABLE IF NOT EXISTS flow_rollup_1h (
+    bucket BIGINT NOT NULL,
+    grp_name VARCHAR(100) NOT NULL,
+    token_id BIGINT NOT NULL REFERENCES tokens(id),
+    direction VARCHAR(3) NOT NULL CHECK (direction IN ('in', 'out')),
+    amount NUMERIC(38, 18) NOT NULL,
+    usd_value NUMERIC(30, 2) NOT NULL DEFAULT 0,
+    tx_count BIGINT NOT NULL,
+    PRIMARY KEY (bucket, grp_name, token_id, direction)
+);
+
+CREATE TABLE IF NOT EXISTS flow_rollup_1d (
+    bucket BIGINT NOT NULL,
+    grp_name VARCHAR(100) NOT NULL,
+    token_id BIGINT NOT NULL REFERENCES tokens(id),
+    direction VARCHAR(3) NOT NULL CHECK (direction IN ('in', 'out')),
+    amount NUMERIC(38, 18) NOT NULL,
+    usd_value NUMERIC(30, 2) NOT NULL DEFAULT 0,
+    tx_count BIGINT NOT NULL,
+    PRIMARY KEY (bucket, grp_name, token_id, direction)
+);
+
+-- The same totals per wallet type (lower(wallet_types.name)) instead of group
+CREATE TABLE IF NOT EXISTS wallet_type_rollup_1m (
+    bucket BIGINT NOT NULL,
+    wallet_type VARCHAR(50) NOT NULL,
+    token_id BIGINT NOT NULL REFERENCES tokens(id),
+    direction VARCHAR(3) NOT NULL CHECK (direction IN ('in', 'out')),
+    amount NUMERIC(38, 18) NOT NULL,
+    usd_value NUMERIC(30, 2) NOT NULL DEFAULT 0,
+    tx_count BIGINT NOT NULL,
+    PRIMARY KEY (bucket, wallet_type, token_id, direction)
+);
+
+CREATE TABLE IF NOT EXISTS wallet_type_rollup_1h (
+    bucket BIGINT NOT NULL,
+    wallet_type VARCHAR(50) NOT NULL,
+    token_id BIGINT NOT NULL REFERENCES tokens(id),
+    direction VARCHAR(3) NOT NULL CHECK (direction IN ('in', 'out')),
+    amount NUMERIC(38, 18) NOT NULL,
+    usd_value NUMERIC(30, 2) NOT NULL DEFAULT 0,
+    tx_count BIGINT NOT NULL,
+    PRIMARY KEY (bucket, wallet_type, token_id, direction)
+);
+
+CREATE TABLE IF NOT EXISTS wallet_type_rollup_1d (
+    bucket BIGINT NOT NULL,
+    wallet_type VARCHAR(50) NOT NULL,
+    token_id BIGINT NOT NULL REFERENCES tokens(id),
+    direction VARCHAR(3) NOT NULL CHECK (direction IN ('in', 'out')),
+    amount NUMERIC(38, 18) NOT NULL,
+    usd_value NUMERIC(30, 2) NOT NULL DEFAULT 0,
+    tx_count BIGINT NOT NULL,
+    PRIMARY KEY (bucket, wallet_type, token_id, direction)
+);
+
+-- Processed block checkpoints (cursor + recent hashes for reorg detection)
+CREATE TABLE IF NOT EXISTS block_checkpoints (
+    chain_id BIGINT REFERENCES chains(id),
+    block_number BIGINT NOT NULL,
+    block_hash VARCHAR(66) NOT NULL,
+    parent_hash VARCHAR(66),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (chain_id, block_number)
+);
+
+-- Progress of historical backfill shards (next_block > end_block when done)
+CREATE TABLE IF NOT EXISTS backfill_shards (
+    chain_id BIGINT REFERENCES chains(id),
+    start_block BIGINT NOT NULL,
+    end_block BIGINT NOT NULL,
+    next_block BIGINT NOT NULL,
+    completed_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (chain_id, start_block, end_block)
 );
-ALTER TABLE transactions
-ADD COLUMN from_balance NUMERIC(30, 18),
-ADD COLUMN to_balance   NUMERIC(30, 18);
 
 -- Indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_wallets_address ON wallets(address);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_wallets_address_bytes ON wallets(address_bytes, chain_id);
 CREATE INDEX IF NOT EXISTS idx_wallets_grp_name ON wallets(grp_name);
 CREATE INDEX IF NOT EXISTS idx_wallets_grp_type ON wallets(grp_type);
-CREATE INDEX IF NOT EXISTS idx_transactions_hash ON transactions(hash);
+CREATE INDEX IF NOT EXISTS idx_wallets_updated_at ON wallets(updated_at);
+CREATE INDEX IF NOT EXISTS idx_wallets_placeholder ON wallets(id)
+    WHERE friendly_name IS NULL OR friendly_name = 'Wallet ' || left(address, 8);
 CREATE INDEX IF NOT EXISTS idx_transactions_block_number ON transactions(block_number);
 CREATE INDEX IF NOT EXISTS idx_transactions_timestamp ON transactions(timestamp);
 CREATE INDEX IF NOT EXISTS idx_transactions_from_wallet ON transactions(from_wallet_id);
 CREATE INDEX IF NOT EXISTS idx_transactions_to_wallet ON transactions(to_wallet_id);
+CREATE INDEX IF NOT EXISTS idx_transactions_incomplete ON transactions(id)
+    WHERE from_wallet_id IS NULL OR to_wallet_id IS NULL;
 
 -- Insert default chain
 INSERT INTO chains (name, native_sym) VALUES ('ethereum', 'ETH') 
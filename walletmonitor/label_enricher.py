@@ -0,0 +1,297 @@
+"""
+Background Arkham label enrichment for unknown wallets.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from arkham import ArkhamClient
+from config import Config
+from database import DatabaseManager
+from metrics import stage
+from models import Wallet
+
+logger = logging.getLogger(__name__)
+
+# Sweep cursor before the first wallet id (BIGINT max)
+SWEEP_START = 2**63 - 1
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting requests per second."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = max(1.0, burst if burst is not None else rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, stop: Optional[threading.Event] = None) -> bool:
+        """Wait for a token; returns False if `stop` is set while waiting."""
+        if self.rate <= 0:
+            return True
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if stop is not None:
+                if stop.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
+
+
+class LabelEnricher:
+    """Resolves labels of unknown addresses off the block-processing path.
+
+    `get_wallet` never blocks on Arkham: it returns a cached label or a
+    placeholder wallet and queues the address (deduplicated). Worker threads,
+    each with its own Arkham client, share a `rate` requests/second budget.
+    Resolved labels are kept in memory (the `wallets` table is the persistent
+    cache) and written to `wallets` in bulk every `flush_interval` seconds.
+    Addresses without a label are not retried for `negative_ttl` seconds;
+    both in-memory sets keep at most `max_cached` addresses.
+
+    Placeholder wallets already stored are never looked up by the block
+    processor again, so with `start(sweep=True)` the flusher also queues
+    `sweep_batch` of them every `sweep_interval` seconds, newest first.
+    Lookups that found nothing are recorded in `wallet_label_checks`, which
+    keeps the retry delay across restarts.
+    """
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        to_wallet: Callable[[str, dict], Wallet],
+        workers: int = 4,
+        rate: float = 2.0,
+        negative_ttl: float = 6 * 3600,
+        flush_interval: float = 10.0,
+        sweep_interval: float = 300.0,
+        sweep_batch: int = 1000,
+        max_cached: int = 100000,
+    ):
+        self.db_manager = db_manager
+        self.to_wallet = to_wallet
+        self.workers = max(1, workers)
+        self.negative_ttl = negative_ttl
+        self.flush_interval = flush_interval
+        self.sweep_interval = sweep_interval
+        self.sweep_batch = max(1, sweep_batch)
+        self.max_cached = max(1, max_cached)
+        self.bucket = TokenBucket(rate)
+
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._queued = set()
+        # Insertion ordered, so the oldest entries are evicted first
+        self._labels: "OrderedDict[str, Wallet]" = OrderedDict()
+        self._negative: "OrderedDict[str, float]" = OrderedDict()
+        self._unflushed: List[Wallet] = []
+        self._unflushed_checks: List[str] = []
+        self._sweep = False
+        self._sweep_before = SWEEP_START
+        self._swept_at = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+        self.resolved = 0
+        self.unlabelled = 0
+        self.failed = 0
+
+    @classmethod
+    def from_config(
+        cls,
+        db_manager: DatabaseManager,
+        config: Config,
+        to_wallet: Callable[[str, dict], Wallet],
+    ) -> "LabelEnricher":
+        """Create an enricher from the LABEL_* settings."""
+        return cls(
+            db_manager,
+            to_wallet,
+            workers=config.LABEL_WORKERS,
+            rate=config.LABEL_RATE_PER_SEC,
+            negative_ttl=config.LABEL_NEGATIVE_TTL_SEC,
+            flush_interval=config.LABEL_FLUSH_SEC,
+            sweep_interval=config.LABEL_SWEEP_SEC,
+            sweep_batch=config.LABEL_SWEEP_BATCH,
+            max_cached=config.LABEL_CACHE_SIZE,
+        )
+
+    def pending(self) -> int:
+        """Number of addresses waiting for a lookup."""
+        return self._queue.qsize()
+
+    def get_wallet(self, address: str) -> Wallet:
+        """Get a labelled wallet if known, else a placeholder and queue a lookup."""
+        key = address.lower()
+        known = self._labels.get(key)
+        if known is not None:
+            return Wallet(
+                address=address,
+                friendly_name=known.friendly_name,
+                grp_name=known.grp_name,
+                grp_type=known.grp_type,
+            )
+        self.submit(key)
+        return Wallet(address=address)
+
+    def submit(self, address: str) -> bool:
+        """Queue an address for lookup unless queued, known or recently unlabelled."""
+        with self._lock:
+            if address in self._queued or address in self._labels:
+                return False
+            expires = self._negative.get(address)
+            if expires is not None:
+                if expires > time.time():
+                    return False
+                del self._negative[address]
+            self._queued.add(address)
+        self._queue.put(address)
+        return True
+
+    def _lookup(self, client: ArkhamClient, address: str) -> None:
+        """Resolve one address and record the outcome."""
+        try:
+            with stage("arkham", cycle=False):
+                response = client.get_address_info(address)
+        except Exception as e:
+            logger.warning(f"Failed to extract wallet info for {address}: {e}")
+            response = None
+            self.failed += 1
+
+        wallet = None
+        if response and isinstance(response, dict):
+            wallet = self.to_wallet(address, response)
+
+        with self._lock:
+            self._queued.discard(address)
+            if wallet is None or wallet.friendly_name in (None, "UNK"):
+                now = time.time()
+                self._negative[address] = now + self.negative_ttl
+                # Same TTL for all, so the oldest entries expire first
+                while self._negative and (
+                    len(self._negative) > self.max_cached
+                    or next(iter(self._negative.values())) <= now
+                ):
+                    self._negative.popitem(last=False)
+                if response is not None:
+                    self._unflushed_checks.append(address)
+                self.unlabelled += 1
+                return
+            self._labels[address] = wallet
+            if len(self._labels) > self.max_cached:
+                # Flushed labels reach the watch list with its next refresh
+                self._labels.popitem(last=False)
+            self._unflushed.append(wallet)
+            self.resolved += 1
+
+    def _worker(self) -> None:
+        """Process queued addresses until stopped."""
+        client = ArkhamClient()
+        while not self._stop.is_set():
+            try:
+                address = self._queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            if not self.bucket.acquire(self._stop):
+                break
+            self._lookup(client, address)
+
+    def flush(self) -> int:
+        """Write resolved labels to the wallets table in one statement."""
+        with self._lock:
+            wallets, self._unflushed = self._unflushed, []
+            checks, self._unflushed_checks = self._unflushed_checks, []
+        if not wallets and not checks:
+            return 0
+        try:
+            with self.db_manager.get_connection() as conn:
+                updated = self.db_manager.upsert_wallet_labels(conn, wallets)
+                self.db_manager.record_label_checks(conn, checks)
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Failed to store {len(wallets)} wallet labels: {e}")
+            with self._lock:
+                self._unflushed = wallets + self._unflushed
+                self._unflushed_checks = checks + self._unflushed_checks
+            return 0
+        if not wallets:
+            return 0
+        logger.info(
+            f"Stored {updated}/{len(wallets)} wallet labels "
+            f"(pending {self.pending()}, unlabelled {self.unlabelled})"
+        )
+        return updated
+
+    def sweep(self) -> int:
+        """Queue the next batch of stored placeholder wallets for a lookup.
+
+        Walks the wallets by descending id and starts over once it reaches
+        the oldest. Returns the number of addresses queued.
+        """
+        if self.pending() >= self.sweep_batch:
+            return 0
+        try:
+            with self.db_manager.get_connection() as conn:
+                rows = self.db_manager.get_placeholder_wallets(
+                    conn, self._sweep_before, self.negative_ttl, self.sweep_batch
+                )
+        except Exception as e:
+            logger.error(f"Failed to read placeholder wallets: {e}")
+            return 0
+
+        self._sweep_before = rows[-1][0] if len(rows) == self.sweep_batch else SWEEP_START
+        queued = sum(self.submit(address.lower()) for _, address in rows)
+        if rows:
+            logger.info(f"Queued {queued}/{len(rows)} placeholder wallets for labelling")
+        return queued
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+            if self._sweep and self.sweep_interval > 0:
+                if time.monotonic() - self._swept_at >= self.sweep_interval:
+                    self._swept_at = time.monotonic()
+                    self.sweep()
+
+    def start(self, sweep: bool = False) -> None:
+        """Start the worker pool and the periodic flusher.
+
+        Only one process should sweep (the live monitor); backfill workers
+        and batch tools only label what they see.
+        """
+        if self._threads:
+            return
+        self._sweep = sweep
+        self._stop.clear()
+        for i in range(self.workers):
+            self._threads.append(
+                threading.Thread(target=self._worker, name=f"label-worker-{i}", daemon=True)
+            )
+        self._threads.append(
+            threading.Thread(target=self._flush_loop, name="label-flusher", daemon=True)
+        )
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        """Stop the threads and flush remaining labels."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+        self.flush()
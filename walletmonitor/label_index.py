@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped wallet label index shared by all monitors on a host.
+
+The file holds the labels of every wallet with a hex address:
+
+    header   magic, record count, build time, wallets watermark,
+             string table size
+    keys     count x 20-byte addresses, sorted
+    records  count x (wallet id, friendly_name, grp_name, grp_type,
+             wallet_type, chain) with the names as string table offsets
+    strings  interned strings, each prefixed by its UTF-8 length
+
+Processes map it read-only, so they share the page cache instead of each
+holding a dict of Wallet objects, and look addresses up by binary search.
+`build_label_index` rewrites it from Postgres into a temporary file that
+replaces the old one atomically; open maps keep the old file until they
+`reopen()`.
+
+    python label_index.py build --path labels.idx
+    python label_index.py lookup 0x28c6c06298d514db089934071355e5743bf21d60
+"""
+
+import argparse
+import logging
+import mmap
+import os
+import struct
+import sys
+import time
+from bisect import bisect_left
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from config import load_config
+from database import DatabaseManager, address_bytes
+from models import Wallet
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"WLABIDX1"
+HEADER = struct.Struct("<8sIQQQ")  # magic, count, built_at, watermark, strings size
+RECORD = struct.Struct("<q5I")  # id, friendly_name, grp_name, grp_type, wallet_type, chain
+STRING_LENGTH = struct.Struct("<H")
+KEY_SIZE = 20
+NO_STRING = 0xFFFFFFFF
+
+# (20-byte address, id, friendly_name, grp_name, grp_type, wallet_type, chain)
+LabelEntry = Tuple[
+    bytes, Optional[int], Optional[str], Optional[str], Optional[str], Optional[str], Optional[str]
+]
+
+
+def write_label_index(
+    path: str,
+    entries: Iterable[LabelEntry],
+    watermark: int = 0,
+    built_at: Optional[int] = None,
+) -> int:
+    """Write entries sorted by address (without duplicates) to `path` atomically.
+
+    `watermark` is the newest wallets.updated_at (epoch of the naive
+    database timestamp) covered by the entries. Returns the number of
+    records written.
+    """
+    keys = bytearray()
+    records = bytearray()
+    strings = bytearray()
+    offsets: Dict[str, int] = {}
+
+    def intern(value: Optional[str]) -> int:
+        if value is None:
+            return NO_STRING
+        offset = offsets.get(value)
+        if offset is None:
+            data = value.encode("utf-8")[:0xFFFF]
+            offset = offsets[value] = len(strings)
+            strings.extend(STRING_LENGTH.pack(len(data)))
+            strings.extend(data)
+        return offset
+
+    previous = b""
+    count = 0
+    for key, wallet_id, *labels in entries:
+        if len(key) != KEY_SIZE or key <= previous:
+            raise ValueError(f"Label index keys must be unique, sorted 20-byte values: {key.hex()}")
+        previous = key
+        keys.extend(key)
+        records.extend(RECORD.pack(-1 if wallet_id is None else wallet_id, *map(intern, labels)))
+        count += 1
+
+    built_at = int(time.time()) if built_at is None else built_at
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, count, built_at, watermark, len(strings)))
+            f.write(keys)
+            f.write(records)
+            f.write(strings)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return count
+
+
+def build_label_index(db_manager: DatabaseManager, path: str) -> int:
+    """Rebuild the index at `path` from the wallets table.
+
+    Addresses present on several chains keep their ethereum row.
+    """
+    def entries(cur) -> Iterator[LabelEntry]:
+        previous = None
+        for key, wallet_id, friendly_name, grp_name, grp_type, wallet_type, chain in cur:
+            key = bytes(key)
+            if key != previous:
+                previous = key
+                yield key, wallet_id, friendly_name, grp_name, grp_type, wallet_type, chain
+
+    with db_manager.get_connection() as conn:
+        # Taken first: rows changed while streaming are newer than it
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT COALESCE(extract(epoch FROM max(updated_at)), 0)::BIGINT FROM wallets"
+            )
+            watermark = cur.fetchone()[0]
+        # Named cursor: rows are streamed instead of fetched all at once
+        with conn.cursor(name="label_index") as cur:
+            cur.itersize = 50000
+            cur.execute(
+                """
+                SELECT w.address_bytes, w.id, w.friendly_name, w.grp_name, w.grp_type,
+                       wt.name, c.name
+                FROM wallets w
+                LEFT JOIN wallet_types wt ON w.wallet_type_id = wt.id
+                LEFT JOIN chains c ON w.chain_id = c.id
+                WHERE w.address_bytes IS NOT NULL
+                ORDER BY w.address_bytes, c.name = 'ethereum' DESC
+                """
+            )
+            return write_label_index(path, entries(cur), watermark=watermark)
+
+
+class _Keys:
+    """Sequence view of the sorted key block, for `bisect`."""
+
+    def __init__(self, buffer: mmap.mmap, count: int):
+        self.buffer = buffer
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> bytes:
+        start = HEADER.size + index * KEY_SIZE
+        return self.buffer[start : start + KEY_SIZE]
+
+
+class LabelIndex(Mapping):
+    """Read-only address -> Wallet mapping backed by a label index file.
+
+    Wallet objects are created per lookup; only the mapped file is kept.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._open()
+
+    def _open(self) -> None:
+        with open(self.path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, built_at, watermark, strings_size = HEADER.unpack_from(buffer)
+        records_offset = HEADER.size + count * KEY_SIZE
+        strings_offset = records_offset + count * RECORD.size
+        if magic != MAGIC or len(buffer) != strings_offset + strings_size:
+            buffer.close()
+            raise ValueError(f"{self.path} is not a complete label index")
+
+        self._buffer = buffer
+        self._keys = _Keys(buffer, count)
+        self._records_offset = records_offset
+        self._strings_offset = strings_offset
+        self._identity = (stat.st_ino, stat.st_mtime_ns)
+        self.built_at = built_at
+        self.watermark = watermark
+
+    def updated_since(self) -> datetime:
+        """Changes at or after this (naive database time) may be missing from the index."""
+        return datetime.fromtimestamp(self.watermark, tz=timezone.utc).replace(tzinfo=None)
+
+    def reopen(self) -> bool:
+        """Map the file again if it was rebuilt; returns whether it changed."""
+        stat = os.stat(self.path)
+        if (stat.st_ino, stat.st_mtime_ns) == self._identity:
+            return False
+        # The old map is released once no lookup refers to it any more
+        self._open()
+        logger.info(f"Reopened label index {self.path} ({len(self)} wallets)")
+        return True
+
+    def _string(self, offset: int) -> Optional[str]:
+        if offset == NO_STRING:
+            return None
+        start = self._strings_offset + offset
+        (length,) = STRING_LENGTH.unpack_from(self._buffer, start)
+        start += STRING_LENGTH.size
+        return self._buffer[start : start + length].decode("utf-8")
+
+    def _find(self, address: str) -> int:
+        key = address_bytes(address) if isinstance(address, str) else None
+        if key is None:
+            return -1
+        keys = self._keys
+        position = bisect_left(keys, key)
+        if position < len(keys) and keys[position] == key:
+            return position
+        return -1
+
+    def _wallet(self, position: int) -> Wallet:
+        wallet_id, *offsets = RECORD.unpack_from(
+            self._buffer, self._records_offset + position * RECORD.size
+        )
+        friendly_name, grp_name, grp_type, wallet_type, chain = map(self._string, offsets)
+        return Wallet(
+            address="0x" + self._keys[position].hex(),
+            chain_id=chain or "ethereum",
+            friendly_name=friendly_name,
+            grp_type=grp_type,
+            grp_name=grp_name,
+            wallet_type=wallet_type,
+            id=None if wallet_id < 0 else wallet_id,
+        )
+
+    def __getitem__(self, address: str) -> Wallet:
+        position = self._find(address)
+        if position < 0:
+            raise KeyError(address)
+        return self._wallet(position)
+
+    def __contains__(self, address) -> bool:
+        return self._find(address) >= 0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __iter__(self) -> Iterator[str]:
+        for position in range(len(self._keys)):
+            yield "0x" + self._keys[position].hex()
+
+
+class OverlayLabels(Mapping):
+    """A label index with wallets changed since it was built on top."""
+
+    def __init__(self, index: LabelIndex, overlay: Dict[str, Wallet]):
+        self.index = index
+        self.overlay = overlay
+
+    def __getitem__(self, address: str) -> Wallet:
+        wallet = self.overlay.get(address)
+        return wallet if wallet is not None else self.index[address]
+
+    def __contains__(self, address) -> bool:
+        return address in self.overlay or address in self.index
+
+    def __len__(self) -> int:
+        return len(self.index) + sum(1 for address in self.overlay if address not in self.index)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.overlay
+        for address in self.index:
+            if address not in self.overlay:
+                yield address
+
+
+def main():
+    """Main entry point."""
+    config = load_config()
+    parser = argparse.ArgumentParser(description="Build or query the wallet label index")
+    parser.add_argument("command", choices=["build", "lookup", "stats"])
+    parser.add_argument("addresses", nargs="*", help="Addresses for lookup")
+    parser.add_argument(
+        "--path",
+        default=config.LABEL_INDEX_PATH or "labels.idx",
+        help="Index file (default: LABEL_INDEX_PATH or labels.idx)",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format=config.LOG_FORMAT)
+
+    if args.command == "build":
+        started = time.monotonic()
+        count = build_label_index(DatabaseManager(config.DATABASE_URL), args.path)
+        logger.info(
+            f"Wrote {count} wallets to {args.path} ({os.path.getsize(args.path) / 2**20:.1f} MiB) "
+            f"in {time.monotonic() - started:.1f}s"
+        )
+        return
+
+    index = LabelIndex(args.path)
+    if args.command == "stats":
+        built = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(index.built_at))
+        print(f"{args.path}: {len(index)} wallets, built {built}")
+        return
+
+    missing = 0
+    for address in args.addresses:
+        wallet = index.get(address.lower())
+        if wallet is None:
+            missing += 1
+        print(f"{address}: {wallet}")
+    sys.exit(1 if missing else 0)
+
+
+if __name__ == "__main__":
+    main()
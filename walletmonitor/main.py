@@ -2,14 +2,22 @@
 Main entry point for wallet monitoring service.
 """
 
+import asyncio
 import logging
 import time
-from typing import Optional
+from typing import List, Optional
 
+from async_block_processor import AsyncBlockProcessor
 from block_processor import BlockProcessor
 from config import Config, load_config
 from database import DatabaseManager
+from head_stream import HeadStream
+from metrics import end_cycle, start_cycle, start_http_server
+from models import BlockCheckpoint
+from partitions import maintain
+from watch_list import WatchList
 from web3 import HTTPProvider, Web3
+from write_behind import WriteBehindWriter
 
 # Configure logging - will be updated with config values
 logging.basicConfig(
@@ -21,6 +29,8 @@ logger = logging.getLogger(__name__)
 class WalletMonitor:
     """Main wallet monitoring service."""
 
+    processor_class = BlockProcessor
+
     def __init__(self, config: Config):
         self.config = config
         # Update logging level based on config
@@ -40,8 +50,133 @@ class WalletMonitor:
         #         },
         #     )
         # )
+        if config.METRICS_PORT > 0:
+            start_http_server(config.METRICS_PORT)
         self.db_manager = DatabaseManager()
-        self.block_processor = BlockProcessor(self.web3, self.db_manager, config)
+        self.ensure_partitions()
+        self.block_processor = self.processor_class(self.web3, self.db_manager, config)
+        self.block_processor.price_store.start_refresher(config.PRICE_REFRESH_SEC)
+        if self.block_processor.label_enricher is not None:
+            # The live monitor also retries stored placeholder wallets
+            self.block_processor.label_enricher.start(sweep=True)
+        self._checkpoints: Optional[List[BlockCheckpoint]] = None
+        self._failed_cycles = 0
+        self.watch_list = WatchList(
+            self.db_manager,
+            full_reload_sec=config.WATCH_FULL_RELOAD_SEC,
+            overlap_sec=config.WATCH_REFRESH_OVERLAP_SEC,
+            label_index_path=config.LABEL_INDEX_PATH or None,
+        )
+        self.writer: Optional[WriteBehindWriter] = None
+        if config.WRITE_BEHIND:
+            self.writer = WriteBehindWriter(
+                self.db_manager,
+                wal_path=config.WRITE_BEHIND_WAL,
+                batch_size=config.WRITE_BATCH_SIZE,
+                max_delay=config.WRITE_MAX_DELAY_SEC,
+                checkpoint_retention=config.REORG_DEPTH,
+                max_pending=config.WRITE_MAX_PENDING,
+                max_attempts=config.WRITE_MAX_ATTEMPTS,
+            )
+            self.writer.start()
+        self.head_stream: Optional[HeadStream] = None
+        if config.STREAM_BLOCKS:
+            self.head_stream = HeadStream(
+                config.WS_URL,
+                block_time=config.BLOCK_TIME_SEC,
+                min_poll=config.STREAM_MIN_POLL_SEC,
+            )
+            self.head_stream.start()
+
+    def ensure_partitions(self) -> None:
+        """Create upcoming transactions partitions (retention runs from partitions.py)."""
+        try:
+            created, _ = maintain(self.db_manager, self.config.PARTITION_MONTHS_AHEAD)
+            if created:
+                logger.info(f"Created transactions partitions {created}")
+        except Exception as e:
+            logger.warning(f"Partition maintenance failed: {e}")
+
+    def get_checkpoints(self) -> List[BlockCheckpoint]:
+        """Get processed block checkpoints, loading them from database once."""
+        if self._checkpoints is None:
+            with self.db_manager.get_connection() as conn:
+                self._checkpoints = self.db_manager.get_block_checkpoints(
+                    conn, limit=self.config.REORG_DEPTH
+                )
+            if self.writer is not None:
+                # Cycles still waiting in the WAL were already processed
+                for entry in self.writer.pending_entries():
+                    self.advance_checkpoints(
+                        [BlockCheckpoint(**cp) for cp in entry["checkpoints"]],
+                        entry["reorg_block"],
+                    )
+            if self._checkpoints:
+                logger.info(
+                    f"Resuming from block {self._checkpoints[0].block_number}"
+                )
+        return self._checkpoints
+
+    def advance_checkpoints(
+        self, new_checkpoints: List[BlockCheckpoint], reorg_block: Optional[int]
+    ) -> None:
+        """Advance the in-memory block cursor after blocks were stored."""
+        checkpoints = self._checkpoints or []
+        if reorg_block is not None:
+            checkpoints = [cp for cp in checkpoints if cp.block_number <= reorg_block]
+        checkpoints = sorted(
+            new_checkpoints + checkpoints, key=lambda cp: cp.block_number, reverse=True
+        )
+        self._checkpoints = checkpoints[: self.config.REORG_DEPTH]
+
+    def shutdown(self) -> None:
+        """Stop background workers and persist their state."""
+        self.block_processor.price_store.stop()
+        if self.block_processor.label_enricher is not None:
+            self.block_processor.label_enricher.stop()
+        if self.writer is not None:
+            self.writer.stop()
+        if self.head_stream is not None:
+            self.head_stream.stop()
+
+    def wait_for_next_cycle(self, succeeded: bool = True) -> None:
+        """Sleep until the next cycle is due.
+
+        In streaming mode this returns as soon as a head newer than the
+        processed blocks is known; while the subscription is down it polls
+        about once per block instead of every `POLL_INTERVAL_SEC`. After a
+        failed cycle the cursor has not moved, so it first backs off
+        exponentially (up to `POLL_INTERVAL_SEC`) rather than retrying at once.
+        """
+        self._failed_cycles = 0 if succeeded else self._failed_cycles + 1
+        if self.head_stream is None:
+            logger.debug(
+                f"Waiting {self.config.POLL_INTERVAL_SEC} seconds before next cycle..."
+            )
+            time.sleep(self.config.POLL_INTERVAL_SEC)
+            return
+
+        if self._failed_cycles:
+            delay = min(self.config.POLL_INTERVAL_SEC, 2 ** (self._failed_cycles - 1))
+            logger.info(f"Cycle failed {self._failed_cycles} times in a row, retrying in {delay}s")
+            time.sleep(delay)
+
+        checkpoints = self._checkpoints
+        processed = checkpoints[0].block_number if checkpoints else None
+        if self.head_stream.connected:
+            timeout = self.config.POLL_INTERVAL_SEC
+        else:
+            timeout = self.head_stream.next_poll_delay()
+            logger.debug(f"No head subscription, polling again in {timeout:.1f}s")
+        head = self.head_stream.wait(processed, timeout)
+        if head is not None:
+            logger.debug(f"New head {head}, processed up to {processed}")
+
+    def get_block_bloom(self, watch_addresses):
+        """Get the logsBloom prefilter for full block downloads, if enabled."""
+        if self.config.BLOOM_PREFILTER != "blocks":
+            return None
+        return self.block_processor.watch_bloom(watch_addresses)
 
     def get_watch_addresses(
         self, group_name: Optional[str] = None, all_addresses: bool = False
@@ -80,34 +215,40 @@ class WalletMonitor:
             logger.error(f"Error getting watch addresses: {e}", exc_info=True)
             return {}
 
-    def run_monitoring_cycle(self, group_name: Optional[str] = None):
-        """Run a single monitoring cycle."""
+    def run_monitoring_cycle(self, group_name: Optional[str] = None) -> bool:
+        """Run a single monitoring cycle; returns False if it failed."""
         try:
             logger.info("=" * 80)
             logger.info("Starting monitoring cycle")
             logger.info("=" * 80)
+            start_cycle()
 
             # Get watch addresses
-            logger.debug("Step 1: Getting watch addresses...")
-            watch_addresses = self.get_watch_addresses(group_name)
-            full_addresses = self.get_watch_addresses(
-                group_name=None, all_addresses=True
-            )
+            logger.debug("Step 1: Refreshing watch addresses...")
+            self.watch_list.refresh()
+            watch_addresses = self.watch_list.watch_addresses(group_name)
+            full_addresses = self.watch_list.full
             if not watch_addresses:
                 logger.warning("No watch addresses found, skipping cycle")
-                return
+                return False
 
-            # Get recent blocks
-            logger.debug("Step 2: Fetching recent blocks...")
-            blocks = self.block_processor.get_recent_blocks(minutes=10)
+            # Get blocks newer than the checkpoint
+            logger.debug("Step 2: Fetching new blocks...")
+            blocks, reorg_block = self.block_processor.get_blocks_since(
+                self.get_checkpoints(),
+                self.config.MAX_BLOCKS_PER_CYCLE,
+                bloom=self.get_block_bloom(watch_addresses),
+            )
             if not blocks:
-                logger.warning("No recent blocks found")
-                return
+                logger.info("No new blocks found")
+                return True
 
             logger.debug(f"Found {len(blocks)} blocks to process")
+            if self.head_stream is not None:
+                self.head_stream.observe(blocks[-1].number, blocks[-1].timestamp)
             for block in blocks:
                 logger.debug(
-                    f"  Block {block.number}: {len(block.transactions)} transactions"
+                    "  Block %s: %s transactions", block.number, len(block.transactions)
                 )
 
             # Process blocks and extract transactions
@@ -116,20 +257,46 @@ class WalletMonitor:
                 blocks, self.config.MIN_ETH, watch_addresses, full_addresses
             )
 
-            # Store data in database
-            if transactions:
-                logger.debug("Step 4: Storing data in database...")
-                logger.info(f"Storing {len(transactions)} transactions")
-                self.db_manager.store_all_data(transactions)
-                logger.debug("Data storage completed")
-            else:
-                logger.info("No transactions to store")
+            # Store data and advance the block cursor in database
+            logger.debug("Step 4: Storing data in database...")
+            self.store_cycle(transactions, blocks, reorg_block)
 
+            logger.info(
+                end_cycle(
+                    len(blocks),
+                    sum(len(block.transactions) for block in blocks),
+                    len(transactions),
+                )
+            )
             logger.info("Monitoring cycle completed successfully")
             logger.info("=" * 80)
+            return True
 
         except Exception as e:
             logger.error(f"Error in monitoring cycle: {e}", exc_info=True)
+            return False
+
+    def store_cycle(self, transactions, blocks, reorg_block: Optional[int]) -> None:
+        """Store a cycle's transactions and advance the block cursor.
+
+        With write-behind enabled the cycle is queued in the WAL and the
+        cursor advances right away; the database catches up on group commit.
+        """
+        checkpoints = [BlockCheckpoint.from_block(block) for block in blocks]
+        self.get_checkpoints()  # the cursor must be loaded before it advances
+        if self.writer is not None:
+            logger.info(f"Queueing {len(transactions)} transactions for storage")
+            self.writer.submit(transactions, checkpoints, reorg_block)
+        else:
+            logger.info(f"Storing {len(transactions)} transactions")
+            self.db_manager.store_all_data(
+                transactions,
+                checkpoints=checkpoints,
+                reorg_block=reorg_block,
+                checkpoint_retention=self.config.REORG_DEPTH,
+            )
+        self.advance_checkpoints(checkpoints, reorg_block)
+        logger.debug("Data storage completed")
 
     def run(self, group_name: Optional[str] = None):
         """Run the monitoring service continuously."""
@@ -146,28 +313,122 @@ class WalletMonitor:
 
         cycle_count = 0
         while True:
+            succeeded = False
             try:
                 cycle_count += 1
                 logger.info(f"Starting monitoring cycle #{cycle_count}")
-                self.run_monitoring_cycle(group_name)
+                succeeded = self.run_monitoring_cycle(group_name)
             except KeyboardInterrupt:
                 logger.info("Received interrupt signal, shutting down")
+                self.shutdown()
                 break
             except Exception as e:
                 logger.error(
                     f"Unexpected error in cycle #{cycle_count}: {e}", exc_info=True
                 )
 
-            logger.debug(
-                f"Waiting {self.config.POLL_INTERVAL_SEC} seconds before next cycle..."
+            self.wait_for_next_cycle(succeeded)
+
+
+class AsyncWalletMonitor(WalletMonitor):
+    """Wallet monitoring service running on the asyncio engine.
+
+    RPC, price and label I/O of a cycle run concurrently through
+    `AsyncBlockProcessor`; database access stays on the psycopg2 manager and
+    runs in a worker thread.
+    """
+
+    processor_class = AsyncBlockProcessor
+
+    async def run_monitoring_cycle_async(self, group_name: Optional[str] = None) -> bool:
+        """Run a single monitoring cycle; returns False if it failed."""
+        try:
+            logger.info("=" * 80)
+            logger.info("Starting monitoring cycle")
+            logger.info("=" * 80)
+            start_cycle()
+
+            logger.debug("Step 1: Refreshing watch addresses...")
+            await asyncio.to_thread(self.watch_list.refresh)
+            watch_addresses = self.watch_list.watch_addresses(group_name)
+            full_addresses = self.watch_list.full
+            if not watch_addresses:
+                logger.warning("No watch addresses found, skipping cycle")
+                return False
+
+            logger.debug("Step 2: Fetching new blocks...")
+            checkpoints = await asyncio.to_thread(self.get_checkpoints)
+            blocks, reorg_block = await self.block_processor.get_blocks_since_async(
+                checkpoints,
+                self.config.MAX_BLOCKS_PER_CYCLE,
+                bloom=self.get_block_bloom(watch_addresses),
             )
-            time.sleep(self.config.POLL_INTERVAL_SEC)
+            if not blocks:
+                logger.info("No new blocks found")
+                return True
+            if self.head_stream is not None:
+                self.head_stream.observe(blocks[-1].number, blocks[-1].timestamp)
+
+            logger.debug("Step 3: Processing blocks and extracting transactions...")
+            transactions = await self.block_processor.process_blocks_async(
+                blocks, self.config.MIN_ETH, watch_addresses, full_addresses
+            )
+
+            logger.debug("Step 4: Storing data in database...")
+            await asyncio.to_thread(self.store_cycle, transactions, blocks, reorg_block)
+
+            logger.info(
+                end_cycle(
+                    len(blocks),
+                    sum(len(block.transactions) for block in blocks),
+                    len(transactions),
+                )
+            )
+            logger.info("Monitoring cycle completed successfully")
+            logger.info("=" * 80)
+            return True
+
+        except Exception as e:
+            logger.error(f"Error in monitoring cycle: {e}", exc_info=True)
+            return False
+
+    async def run_async(self, group_name: Optional[str] = None):
+        """Run the monitoring service continuously."""
+        logger.info("Starting wallet monitoring service (async engine)")
+        logger.info(
+            f"Configuration: min_eth={self.config.MIN_ETH} ETH, "
+            f"poll_interval={self.config.POLL_INTERVAL_SEC}s, group={group_name}, "
+            f"rpc_concurrency={self.config.ASYNC_RPC_CONCURRENCY}, "
+            f"label_concurrency={self.config.ASYNC_LABEL_CONCURRENCY}"
+        )
+
+        cycle_count = 0
+        try:
+            while True:
+                cycle_count += 1
+                logger.info(f"Starting monitoring cycle #{cycle_count}")
+                succeeded = await self.run_monitoring_cycle_async(group_name)
+                await asyncio.to_thread(self.wait_for_next_cycle, succeeded)
+        finally:
+            await self.block_processor.close()
+
+    def run(self, group_name: Optional[str] = None):
+        """Run the async engine until interrupted."""
+        try:
+            asyncio.run(self.run_async(group_name))
+        except KeyboardInterrupt:
+            logger.info("Received interrupt signal, shutting down")
+        finally:
+            self.shutdown()
 
 
 def main():
     """Main entry point."""
     config = load_config()
-    monitor = WalletMonitor(config)
+    if config.ENGINE == "async":
+        monitor = AsyncWalletMonitor(config)
+    else:
+        monitor = WalletMonitor(config)
     monitor.run()
 
 
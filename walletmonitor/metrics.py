@@ -0,0 +1,367 @@
+"""
+Lightweight in-process metrics with a Prometheus text endpoint.
+
+Counters and histograms are plain Python objects guarded by a lock and
+updated once per stage, batch or RPC call (never per transaction), so the
+instrumentation costs microseconds per cycle. `start_http_server` serves
+them at `/metrics`; `start_cycle` / `end_cycle` produce the per-cycle
+summary line logged by the monitor.
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        """Child metric for one combination of label values."""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(child.render(self.name, self.labelnames, values))
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def render(self, name, labelnames, values) -> List[str]:
+        return [f"{name}{_label_text(labelnames, values)} {self.value}"]
+
+
+class Counter(_Metric):
+    """Monotonic counter, optionally labelled."""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def total(self) -> float:
+        """Sum over all label values."""
+        return sum(child.value for child in list(self._children.values()))
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.sum += value
+            self.count += 1
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+
+    def render(self, name, labelnames, values) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            le = _label_text(labelnames, values, f'le="{bound}"')
+            lines.append(f"{name}_bucket{le} {cumulative}")
+        le = _label_text(labelnames, values, 'le="+Inf"')
+        lines.append(f"{name}_bucket{le} {self.count}")
+        labels = _label_text(labelnames, values)
+        lines.append(f"{name}_sum{labels} {self.sum}")
+        lines.append(f"{name}_count{labels} {self.count}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Histogram with fixed upper bounds (seconds by default)."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+RPC_CALLS = REGISTRY.register(
+    Counter("walletmonitor_rpc_calls_total", "JSON-RPC calls by method", ["method"])
+)
+RPC_REQUESTS = REGISTRY.register(
+    Counter(
+        "walletmonitor_rpc_requests_total",
+        "HTTP requests to the node by method and kind (batch or single)",
+        ["method", "kind"],
+    )
+)
+RPC_ERRORS = REGISTRY.register(
+    Counter("walletmonitor_rpc_errors_total", "Failed JSON-RPC calls by method", ["method"])
+)
+STAGE_SECONDS = REGISTRY.register(
+    Histogram("walletmonitor_stage_seconds", "Latency of processing stages", ["stage"])
+)
+CYCLE_SECONDS = REGISTRY.register(
+    Histogram("walletmonitor_cycle_seconds", "Duration of monitoring cycles")
+)
+BLOCKS = REGISTRY.register(
+    Counter("walletmonitor_blocks_processed_total", "Blocks processed")
+)
+BLOCK_TRANSACTIONS = REGISTRY.register(
+    Counter("walletmonitor_block_transactions_total", "Block transactions scanned")
+)
+TRANSFERS = REGISTRY.register(
+    Counter("walletmonitor_transfers_total", "Transfers extracted and stored")
+)
+BLOCKS_PER_SECOND = REGISTRY.register(
+    Gauge("walletmonitor_blocks_per_second", "Blocks per second of the last cycle")
+)
+TRANSACTIONS_PER_SECOND = REGISTRY.register(
+    Gauge("walletmonitor_transactions_per_second", "Block transactions per second of the last cycle")
+)
+HEAD_LAG_BLOCKS = REGISTRY.register(
+    Gauge("walletmonitor_head_lag_blocks", "Blocks between the chain head and the last processed block")
+)
+
+
+class _CycleStats:
+    """Stage time and RPC calls accumulated since `start_cycle`."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.rpc_calls = RPC_CALLS.total()
+        self.rpc_requests = RPC_REQUESTS.total()
+        self.stages: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+
+_cycle = _CycleStats()
+
+
+def observe_stage(stage: str, seconds: float, cycle: bool = True) -> None:
+    """Record a stage duration (and count it towards the current cycle)."""
+    STAGE_SECONDS.labels(stage).observe(seconds)
+    if cycle:
+        _cycle.add(stage, seconds)
+
+
+@contextmanager
+def stage(name: str, cycle: bool = True):
+    """Time a block of code as processing stage `name`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - started, cycle)
+
+
+def timed(name: str, cycle: bool = True):
+    """Decorator timing a function or coroutine function as stage `name`."""
+
+    def decorate(func):
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    observe_stage(name, time.perf_counter() - started, cycle)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe_stage(name, time.perf_counter() - started, cycle)
+
+        return wrapper
+
+    return decorate
+
+
+def count_rpc(method: str, calls: int = 1, kind: str = "single") -> None:
+    """Count `calls` JSON-RPC calls sent in one HTTP request."""
+    RPC_CALLS.labels(method).inc(calls)
+    RPC_REQUESTS.labels(method, kind).inc()
+
+
+def rpc_middleware(make_request, w3):
+    """Web3 middleware counting calls made through the provider."""
+
+    def middleware(method, params):
+        count_rpc(method)
+        response = make_request(method, params)
+        if "error" in response:
+            RPC_ERRORS.labels(method).inc()
+        return response
+
+    return middleware
+
+
+async def async_rpc_middleware(make_request, async_w3):
+    """AsyncWeb3 counterpart of `rpc_middleware`."""
+
+    async def middleware(method, params):
+        count_rpc(method)
+        response = await make_request(method, params)
+        if "error" in response:
+            RPC_ERRORS.labels(method).inc()
+        return response
+
+    return middleware
+
+
+def start_cycle() -> None:
+    """Start accumulating stage times for a new cycle."""
+    global _cycle
+    _cycle = _CycleStats()
+
+
+def end_cycle(blocks: int, transactions: int, transfers: int) -> str:
+    """Record the cycle and return its one-line summary."""
+    stats = _cycle
+    elapsed = time.perf_counter() - stats.started
+    CYCLE_SECONDS.observe(elapsed)
+    BLOCKS.inc(blocks)
+    BLOCK_TRANSACTIONS.inc(transactions)
+    TRANSFERS.inc(transfers)
+    rate = 1 / elapsed if elapsed > 0 else 0.0
+    BLOCKS_PER_SECOND.set(blocks * rate)
+    TRANSACTIONS_PER_SECOND.set(transactions * rate)
+
+    stages = " ".join(
+        f"{name}={seconds:.2f}s"
+        for name, seconds in sorted(stats.stages.items(), key=lambda item: -item[1])
+    )
+    return (
+        f"Cycle: {blocks} blocks, {transactions} txs, {transfers} transfers in {elapsed:.2f}s "
+        f"({blocks * rate:.1f} blocks/s, {transactions * rate:.0f} tx/s); "
+        f"rpc {RPC_CALLS.total() - stats.rpc_calls:.0f} calls in "
+        f"{RPC_REQUESTS.total() - stats.rpc_requests:.0f} requests; {stages}"
+    )
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("metrics: " + format, *args)
+
+
+def start_http_server(port: int, addr: str = "0.0.0.0") -> Optional[ThreadingHTTPServer]:
+    """Serve `/metrics` from a daemon thread; returns None if the port is unavailable."""
+    try:
+        server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+    except OSError as e:
+        logger.error(f"Failed to start metrics endpoint on {addr}:{port}: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info(f"Serving metrics on http://{addr}:{port}/metrics")
+    return server
@@ -0,0 +1,13 @@
+-- Block cursor for incremental ingestion (existing deployments)
+-- New databases get this table from init.sql.
+
+CREATE TABLE IF NOT EXISTS block_checkpoints (
+    chain_id BIGINT REFERENCES chains(id),
+    block_number BIGINT NOT NULL,
+    block_hash VARCHAR(66) NOT NULL,
+    parent_hash VARCHAR(66),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (chain_id, block_number)
+);
+
+GRANT ALL PRIVILEGES ON block_checkpoints TO walletmonitor;
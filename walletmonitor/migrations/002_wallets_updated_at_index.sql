@@ -0,0 +1,4 @@
+-- Index for incremental watch list refreshes (existing deployments)
+-- New databases get this index from init.sql.
+
+CREATE INDEX IF NOT EXISTS idx_wallets_updated_at ON wallets(updated_at);
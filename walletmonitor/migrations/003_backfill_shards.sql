@@ -0,0 +1,14 @@
+-- Progress of historical backfill shards (backfill.py)
+-- New databases get this table from init.sql.
+
+CREATE TABLE IF NOT EXISTS backfill_shards (
+    chain_id BIGINT REFERENCES chains(id),
+    start_block BIGINT NOT NULL,
+    end_block BIGINT NOT NULL,
+    next_block BIGINT NOT NULL,
+    completed_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (chain_id, start_block, end_block)
+);
+
+GRANT ALL PRIVILEGES ON backfill_shards TO walletmonitor;
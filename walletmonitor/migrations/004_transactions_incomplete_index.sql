@@ -0,0 +1,8 @@
+-- Partial index over transactions missing a wallet id (existing deployments)
+-- New databases get this index from init.sql. The data completer pages
+-- through these rows by id; the index only holds incomplete rows, so it
+-- stays small and shrinks as rows are completed.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_incomplete
+    ON transactions(id)
+    WHERE from_wallet_id IS NULL OR to_wallet_id IS NULL;
@@ -0,0 +1,59 @@
+-- Binary wallet addresses for index-friendly lookups (existing deployments)
+-- New databases get the column, trigger and index from init.sql.
+-- Run with psql in autocommit mode (the default): the backfill commits per
+-- batch and the index is built CONCURRENTLY, so writers are not blocked.
+--
+-- Hex addresses are lowercased (checksummed rows would otherwise not match
+-- the lowercase addresses the monitor writes), and the trigger keeps them so.
+-- This fails if one address is stored in several spellings (e.g. checksummed
+-- and lowercase) for the same chain. Check first with:
+--   SELECT lower(address), chain_id, count(*) FROM wallets
+--   GROUP BY 1, 2 HAVING count(*) > 1;
+--
+-- The backfill bumps updated_at, so the next watch list refresh reloads
+-- all wallets once.
+
+ALTER TABLE wallets ADD COLUMN IF NOT EXISTS address_bytes BYTEA;
+
+-- 20-byte form of hex addresses; NULL for anything else (e.g. Tron)
+CREATE OR REPLACE FUNCTION set_wallet_address_bytes()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.address ~* '^0x[0-9a-f]{40}$' THEN
+        -- One spelling per address, so text lookups and ON CONFLICT
+        -- (address, chain_id) agree with the address_bytes index
+        NEW.address = lower(NEW.address);
+        NEW.address_bytes = decode(substr(NEW.address, 3), 'hex');
+    ELSE
+        NEW.address_bytes = NULL;
+    END IF;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS set_wallets_address_bytes ON wallets;
+CREATE TRIGGER set_wallets_address_bytes BEFORE INSERT OR UPDATE OF address ON wallets
+    FOR EACH ROW EXECUTE FUNCTION set_wallet_address_bytes();
+
+-- Backfill rows written before the trigger, 10000 ids per transaction.
+-- Safe to re-run on databases that applied an earlier version of this file.
+DO $$
+DECLARE
+    batch_start BIGINT;
+    max_id BIGINT;
+BEGIN
+    SELECT min(id), max(id) INTO batch_start, max_id FROM wallets;
+    WHILE batch_start <= max_id LOOP
+        UPDATE wallets
+        SET address = lower(address), address_bytes = decode(substr(address, 3), 'hex')
+        WHERE id >= batch_start AND id < batch_start + 10000
+          AND (address_bytes IS NULL OR address <> lower(address))
+          AND address ~* '^0x[0-9a-f]{40}$';
+        COMMIT;
+        batch_start := batch_start + 10000;
+    END LOOP;
+END
+$$;
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_wallets_address_bytes
+    ON wallets(address_bytes, chain_id);
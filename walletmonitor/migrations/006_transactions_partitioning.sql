@@ -0,0 +1,98 @@
+-- Range-partition transactions by month on timestamp (existing deployments)
+-- New databases get the partitioned table from init.sql.
+--
+-- Stop the monitor and the data completer first: rows are copied into the
+-- new table in one transaction. The old table is kept as
+-- transactions_unpartitioned; drop it once the copy is verified.
+--
+-- Partition keys must be part of every unique constraint, so the primary
+-- key becomes (id, timestamp) and hash is unique per (hash, timestamp).
+-- A transaction hash always has the same block timestamp, so duplicates
+-- are still rejected. Later partitions are created (and old ones expired)
+-- by partitions.py.
+
+BEGIN;
+
+ALTER TABLE transactions RENAME TO transactions_unpartitioned;
+ALTER TABLE transactions_unpartitioned RENAME CONSTRAINT transactions_pkey
+    TO transactions_unpartitioned_pkey;
+ALTER TABLE transactions_unpartitioned RENAME CONSTRAINT transactions_hash_key
+    TO transactions_unpartitioned_hash_key;
+DROP INDEX IF EXISTS idx_transactions_hash;
+DROP INDEX IF EXISTS idx_transactions_block_number;
+DROP INDEX IF EXISTS idx_transactions_timestamp;
+DROP INDEX IF EXISTS idx_transactions_from_wallet;
+DROP INDEX IF EXISTS idx_transactions_to_wallet;
+DROP INDEX IF EXISTS idx_transactions_incomplete;
+
+-- Keep ids: the new table draws from the existing sequence
+ALTER SEQUENCE transactions_id_seq OWNED BY NONE;
+
+CREATE TABLE transactions (
+    id BIGINT NOT NULL DEFAULT nextval('transactions_id_seq'),
+    hash VARCHAR(66) NOT NULL,
+    block_number BIGINT NOT NULL,
+    from_wallet_id BIGINT REFERENCES wallets(id),
+    to_wallet_id BIGINT REFERENCES wallets(id),
+    token_id BIGINT REFERENCES tokens(id),
+    amount NUMERIC(30, 18) NOT NULL,
+    timestamp BIGINT NOT NULL,
+    chain_id BIGINT REFERENCES chains(id),
+    usd_value NUMERIC(30, 2),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    from_balance NUMERIC(30, 18),
+    to_balance NUMERIC(30, 18),
+    PRIMARY KEY (id, timestamp),
+    UNIQUE (hash, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+ALTER SEQUENCE transactions_id_seq OWNED BY transactions.id;
+
+-- Created on every partition, including those attached later
+CREATE INDEX idx_transactions_block_number ON transactions(block_number);
+CREATE INDEX idx_transactions_timestamp ON transactions(timestamp);
+CREATE INDEX idx_transactions_from_wallet ON transactions(from_wallet_id);
+CREATE INDEX idx_transactions_to_wallet ON transactions(to_wallet_id);
+CREATE INDEX idx_transactions_incomplete ON transactions(id)
+    WHERE from_wallet_id IS NULL OR to_wallet_id IS NULL;
+
+-- Catches rows outside all monthly partitions; partitions.py moves them
+-- out when it creates the matching partition
+CREATE TABLE transactions_default PARTITION OF transactions DEFAULT;
+
+-- Monthly partitions (UTC) from the oldest row to three months ahead
+DO $$
+DECLARE
+    month_start TIMESTAMP;  -- UTC
+    last_month TIMESTAMP;
+BEGIN
+    SELECT date_trunc('month', to_timestamp(COALESCE(min(timestamp), extract(epoch FROM now())))
+                               AT TIME ZONE 'UTC')
+    INTO month_start
+    FROM transactions_unpartitioned;
+    last_month := date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months';
+    WHILE month_start <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF transactions FOR VALUES FROM (%s) TO (%s)',
+            'transactions_' || to_char(month_start, 'YYYY_MM'),
+            extract(epoch FROM month_start)::BIGINT,
+            extract(epoch FROM month_start + interval '1 month')::BIGINT
+        );
+        month_start := month_start + interval '1 month';
+    END LOOP;
+END
+$$;
+
+INSERT INTO transactions (id, hash, block_number, from_wallet_id, to_wallet_id, token_id,
+                          amount, timestamp, chain_id, usd_value, created_at,
+                          from_balance, to_balance)
+SELECT id, hash, block_number, from_wallet_id, to_wallet_id, token_id,
+       amount, timestamp, chain_id, usd_value, created_at,
+       from_balance, to_balance
+FROM transactions_unpartitioned;
+
+GRANT ALL PRIVILEGES ON ALL TABLES IN SCHEMA public TO walletmonitor;
+
+COMMIT;
+
+ANALYZE transactions;
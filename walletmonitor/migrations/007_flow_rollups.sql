@@ -0,0 +1,38 @@
+-- Flow rollups per group, token and direction (existing deployments)
+-- New databases get these tables from init.sql. Fill them for past
+-- transactions with: python rollups.py --from 2024-01-01
+
+CREATE TABLE IF NOT EXISTS flow_rollup_1m (
+    bucket BIGINT NOT NULL,
+    grp_name VARCHAR(100) NOT NULL,
+    token_id BIGINT NOT NULL REFERENCES tokens(id),
+    direction VARCHAR(3) NOT NULL CHECK (direction IN ('in', 'out')),
+    amount NUMERIC(38, 18) NOT NULL,
+    usd_value NUMERIC(30, 2) NOT NULL DEFAULT 0,
+    tx_count BIGINT NOT NULL,
+    PRIMARY KEY (bucket, grp_name, token_id, direction)
+);
+
+CREATE TABLE IF NOT EXISTS flow_rollup_1h (
+    bucket BIGINT NOT NULL,
+    grp_name VARCHAR(100) NOT NULL,
+    token_id BIGINT NOT NULL REFERENCES tokens(id),
+    direction VARCHAR(3) NOT NULL CHECK (direction IN ('in', 'out')),
+    amount NUMERIC(38, 18) NOT NULL,
+    usd_value NUMERIC(30, 2) NOT NULL DEFAULT 0,
+    tx_count BIGINT NOT NULL,
+    PRIMARY KEY (bucket, grp_name, token_id, direction)
+);
+
+CREATE TABLE IF NOT EXISTS flow_rollup_1d (
+    bucket BIGINT NOT NULL,
+    grp_name VARCHAR(100) NOT NULL,
+    token_id BIGINT NOT NULL REFERENCES tokens(id),
+    direction VARCHAR(3) NOT NULL CHECK (direction IN ('in', 'out')),
+    amount NUMERIC(38, 18) NOT NULL,
+    usd_value NUMERIC(30, 2) NOT NULL DEFAULT 0,
+    tx_count BIGINT NOT NULL,
+    PRIMARY KEY (bucket, grp_name, token_id, direction)
+);
+
+GRANT ALL PRIVILEGES ON flow_rollup_1m, flow_rollup_1h, flow_rollup_1d TO walletmonitor;
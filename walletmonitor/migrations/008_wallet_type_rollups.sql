@@ -0,0 +1,39 @@
+-- Flow rollups per wallet type (lower(wallet_types.name)), token and
+-- direction, read by the dashboard's GET /api/flows (existing deployments).
+-- New databases get these tables from init.sql. Fill them for past
+-- transactions with: python rollups.py --from 2024-01-01
+
+CREATE TABLE IF NOT EXISTS wallet_type_rollup_1m (
+    bucket BIGINT NOT NULL,
+    wallet_type VARCHAR(50) NOT NULL,
+    token_id BIGINT NOT NULL REFERENCES tokens(id),
+    direction VARCHAR(3) NOT NULL CHECK (direction IN ('in', 'out')),
+    amount NUMERIC(38, 18) NOT NULL,
+    usd_value NUMERIC(30, 2) NOT NULL DEFAULT 0,
+    tx_count BIGINT NOT NULL,
+    PRIMARY KEY (bucket, wallet_type, token_id, direction)
+);
+
+CREATE TABLE IF NOT EXISTS wallet_type_rollup_1h (
+    bucket BIGINT NOT NULL,
+    wallet_type VARCHAR(50) NOT NULL,
+    token_id BIGINT NOT NULL REFERENCES tokens(id),
+    direction VARCHAR(3) NOT NULL CHECK (direction IN ('in', 'out')),
+    amount NUMERIC(38, 18) NOT NULL,
+    usd_value NUMERIC(30, 2) NOT NULL DEFAULT 0,
+    tx_count BIGINT NOT NULL,
+    PRIMARY KEY (bucket, wallet_type, token_id, direction)
+);
+
+CREATE TABLE IF NOT EXISTS wallet_type_rollup_1d (
+    bucket BIGINT NOT NULL,
+    wallet_type VARCHAR(50) NOT NULL,
+    token_id BIGINT NOT NULL REFERENCES tokens(id),
+    direction VARCHAR(3) NOT NULL CHECK (direction IN ('in', 'out')),
+    amount NUMERIC(38, 18) NOT NULL,
+    usd_value NUMERIC(30, 2) NOT NULL DEFAULT 0,
+    tx_count BIGINT NOT NULL,
+    PRIMARY KEY (bucket, wallet_type, token_id, direction)
+);
+
+GRANT ALL PRIVILEGES ON wallet_type_rollup_1m, wallet_type_rollup_1h, wallet_type_rollup_1d TO walletmonitor;
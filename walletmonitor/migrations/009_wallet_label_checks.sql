@@ -0,0 +1,16 @@
+-- Label lookups that found nothing, and a partial index over placeholder
+-- wallets (existing deployments). New databases get both from init.sql.
+-- The label enricher sweeps placeholder wallets by id and retries those
+-- not checked within LABEL_NEGATIVE_TTL_SEC. Checks live in their own table
+-- so recording one does not touch wallets.updated_at.
+
+CREATE TABLE IF NOT EXISTS wallet_label_checks (
+    wallet_id BIGINT PRIMARY KEY REFERENCES wallets(id) ON DELETE CASCADE,
+    checked_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+GRANT ALL PRIVILEGES ON wallet_label_checks TO walletmonitor;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_wallets_placeholder
+    ON wallets(id)
+    WHERE friendly_name IS NULL OR friendly_name = 'Wallet ' || left(address, 8);
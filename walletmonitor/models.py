@@ -4,7 +4,7 @@ Data models for wallet monitoring system.
 
 from dataclasses import dataclass, field
 from decimal import Decimal
-from typing import List, Optional
+from typing import Dict, List, Optional, Union
 
 
 @dataclass
@@ -135,6 +135,12 @@ class Transaction:
         if isinstance(self.to_balance, (int, float)):
             self.to_balance = Decimal(str(self.to_balance))
 
+    def touches(self, addresses: Dict[str, Wallet]) -> bool:
+        """Whether sender or recipient is one of the (lowercase) addresses."""
+        if not self.from_address or not self.to_address:
+            return False
+        return self.from_address in addresses or self.to_address in addresses
+
     @classmethod
     def from_dict(cls, data: dict) -> "Transaction":
         """Create Transaction instance from dictionary."""
@@ -217,13 +223,59 @@ class Transaction:
         }
 
 
+class RawTransaction:
+    """Compact block transaction kept until the watch-list test.
+
+    Holds the fields of a fetched block transaction that ingestion needs,
+    as returned by web3 (hash bytes, checksummed addresses), without the
+    conversions of `Transaction`. Only transactions touching a watched
+    address are turned into a `Transaction` with `to_transaction`.
+    """
+
+    __slots__ = ("hash", "block_number", "from_address", "to_address", "value")
+
+    def __init__(self, hash, block_number: int, from_address: str, to_address: str, value: int):
+        self.hash = hash
+        self.block_number = block_number
+        self.from_address = from_address
+        self.to_address = to_address
+        self.value = value
+
+    @classmethod
+    def from_web3(cls, tx) -> "RawTransaction":
+        """Create from a web3 block transaction."""
+        return cls(tx["hash"], tx["blockNumber"], tx["from"], tx["to"], tx["value"])
+
+    def touches(self, addresses: Dict[str, Wallet]) -> bool:
+        """Whether sender or recipient is one of the (lowercase) addresses."""
+        from_address = self.from_address
+        to_address = self.to_address
+        if not from_address or not to_address:
+            return False
+        return from_address.lower() in addresses or to_address.lower() in addresses
+
+    def to_transaction(self) -> "Transaction":
+        """Materialize the full model."""
+        tx_hash = self.hash
+        return Transaction(
+            hash=tx_hash.hex() if isinstance(tx_hash, bytes) else tx_hash,
+            block_number=self.block_number,
+            from_address=self.from_address,
+            to_address=self.to_address,
+            value=self.value,
+        )
+
+
 @dataclass
 class BlockData:
     """Block data model for processing."""
 
     number: int
     timestamp: int
-    transactions: List[Transaction] = field(default_factory=list)
+    transactions: List[Union[RawTransaction, Transaction]] = field(default_factory=list)
+    hash: Optional[str] = None
+    parent_hash: Optional[str] = None
+    logs_bloom: Optional[bytes] = None
 
     @classmethod
     def from_dict(cls, data: dict) -> "BlockData":
@@ -236,8 +288,8 @@ class BlockData:
             if isinstance(tx_data, dict):
                 # If it's a dictionary, create Transaction object
                 transactions.append(Transaction.from_dict(tx_data))
-            elif isinstance(tx_data, Transaction):
-                # If it's already a Transaction object, use it directly
+            elif isinstance(tx_data, (Transaction, RawTransaction)):
+                # If it's already a transaction object, use it directly
                 transactions.append(tx_data)
             else:
                 # Skip invalid transaction data
@@ -247,4 +299,27 @@ class BlockData:
             number=data.get("number", 0),
             timestamp=data.get("timestamp", 0),
             transactions=transactions,
+            hash=data.get("hash"),
+            parent_hash=data.get("parent_hash"),
+            logs_bloom=data.get("logs_bloom"),
+        )
+
+
+@dataclass
+class BlockCheckpoint:
+    """Processed block marker used to resume ingestion and detect reorgs."""
+
+    block_number: int
+    block_hash: str
+    parent_hash: Optional[str] = None
+    chain: str = "ethereum"
+
+    @classmethod
+    def from_block(cls, block: BlockData, chain: str = "ethereum") -> "BlockCheckpoint":
+        """Create checkpoint from a processed block."""
+        return cls(
+            block_number=block.number,
+            block_hash=block.hash or "",
+            parent_hash=block.parent_hash,
+            chain=chain,
         )
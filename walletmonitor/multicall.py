@@ -0,0 +1,215 @@
+"""
+Multicall3 batched balance lookups.
+"""
+
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from rpc_batch import BatchRpcClient
+from web3 import Web3
+
+logger = logging.getLogger(__name__)
+
+# Multicall3 has the same address on every EVM chain
+MULTICALL3_ADDRESS = Web3.to_checksum_address(
+    "0xcA11bde05977b3631167028862bE2a173976CA11"
+)
+MULTICALL3_DEPLOY_BLOCK = 14353601  # Ethereum mainnet
+
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"name": "target", "type": "address"},
+                    {"name": "allowFailure", "type": "bool"},
+                    {"name": "callData", "type": "bytes"},
+                ],
+                "name": "calls",
+                "type": "tuple[]",
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"name": "success", "type": "bool"},
+                    {"name": "returnData", "type": "bytes"},
+                ],
+                "name": "returnData",
+                "type": "tuple[]",
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function",
+    }
+]
+
+ERC20_BALANCE_ABI = '[{"constant":true,"inputs":[{"name":"_owner","type":"address"}],"name":"balanceOf","outputs":[{"name":"","type":"uint256"}],"type":"function"}]'
+
+# Function selectors: balanceOf(address) and Multicall3.getEthBalance(address)
+BALANCE_OF_SELECTOR = bytes.fromhex("70a08231")
+GET_ETH_BALANCE_SELECTOR = bytes.fromhex("4d2301cc")
+
+# (address, token contract or None for ETH, block number)
+BalanceKey = Tuple[str, Optional[str], int]
+
+
+class BalanceFetcher:
+    """Resolves (address, token, block) balances with Multicall3 aggregate3.
+
+    Requests are deduplicated, grouped per block and packed into one
+    aggregate3 call per block (chunked by `chunk_size`). When a batch client
+    is given, the aggregate3 calls of all blocks go out in one JSON-RPC batch.
+    Blocks before the Multicall3 deployment and failed sub-calls fall back to
+    individual balance calls.
+    """
+
+    def __init__(
+        self,
+        web3: Web3,
+        rpc_batch: Optional[BatchRpcClient] = None,
+        chunk_size: int = 500,
+    ):
+        self.web3 = web3
+        self.rpc_batch = rpc_batch
+        self.chunk_size = max(1, chunk_size)
+        self.multicall = web3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+        self._erc20_contracts: Dict[str, object] = {}
+
+    def get_erc20_contract(self, token_address: str):
+        """Get cached ERC20 contract object for balanceOf calls."""
+        token_address = token_address.lower()
+        contract = self._erc20_contracts.get(token_address)
+        if contract is None:
+            contract = self.web3.eth.contract(
+                address=Web3.to_checksum_address(token_address), abi=ERC20_BALANCE_ABI
+            )
+            self._erc20_contracts[token_address] = contract
+        return contract
+
+    def get_balance(self, key: BalanceKey) -> Optional[int]:
+        """Get a single raw balance without Multicall3."""
+        address, token, block_number = key
+        try:
+            if token is None:
+                return self.web3.eth.get_balance(
+                    Web3.to_checksum_address(address), block_identifier=block_number
+                )
+            return (
+                self.get_erc20_contract(token)
+                .functions.balanceOf(Web3.to_checksum_address(address))
+                .call(block_identifier=block_number)
+            )
+        except Exception as e:
+            logger.warning(f"Failed to get balance {key}: {e}")
+            return None
+
+    @staticmethod
+    def _encode_call(address: str, token: Optional[str]) -> Tuple[str, bool, bytes]:
+        """Build the aggregate3 call tuple for one balance."""
+        argument = bytes(12) + bytes.fromhex(address[2:])
+        if token is None:
+            return (MULTICALL3_ADDRESS, True, GET_ETH_BALANCE_SELECTOR + argument)
+        return (Web3.to_checksum_address(token), True, BALANCE_OF_SELECTOR + argument)
+
+    def _decode_results(self, keys: List[BalanceKey], results) -> Dict[BalanceKey, Optional[int]]:
+        """Decode aggregate3 results, falling back for failed sub-calls."""
+        balances = {}
+        for key, (success, data) in zip(keys, results):
+            if success and len(data) >= 32:
+                balances[key] = int.from_bytes(data[:32], "big")
+            else:
+                balances[key] = self.get_balance(key)
+        return balances
+
+    def plan_chunks(
+        self, keys: Iterable[BalanceKey]
+    ) -> Tuple[Dict[BalanceKey, Optional[int]], List[Tuple[int, List[BalanceKey]]]]:
+        """Deduplicate keys and split them into per-block aggregate3 chunks.
+
+        Returns the balances resolved directly (blocks before the Multicall3
+        deployment) and the (block_number, keys) chunks left to call.
+        """
+        unique = dict.fromkeys(
+            (address.lower(), token.lower() if token else None, block_number)
+            for address, token, block_number in keys
+        )
+
+        by_block: Dict[int, List[BalanceKey]] = defaultdict(list)
+        balances: Dict[BalanceKey, Optional[int]] = {}
+        for key in unique:
+            if key[2] < MULTICALL3_DEPLOY_BLOCK:
+                balances[key] = self.get_balance(key)
+            else:
+                by_block[key[2]].append(key)
+
+        chunks = [
+            (block_number, block_keys[i : i + self.chunk_size])
+            for block_number, block_keys in by_block.items()
+            for i in range(0, len(block_keys), self.chunk_size)
+        ]
+        return balances, chunks
+
+    def chunk_params(self, chunks: List[Tuple[int, List[BalanceKey]]]) -> List[list]:
+        """Build the eth_call params of each aggregate3 chunk."""
+        return [
+            [
+                {
+                    "to": MULTICALL3_ADDRESS,
+                    "data": self.multicall.encodeABI(
+                        fn_name="aggregate3",
+                        args=[[self._encode_call(a, t) for a, t, _ in chunk]],
+                    ),
+                },
+                hex(block_number),
+            ]
+            for block_number, chunk in chunks
+        ]
+
+    def collect(
+        self,
+        chunks: List[Tuple[int, List[BalanceKey]]],
+        responses: List[Optional[bytes]],
+        balances: Dict[BalanceKey, Optional[int]],
+    ) -> None:
+        """Decode raw eth_call responses of the chunks into `balances`.
+
+        A None response is retried through the contract call, and a failed
+        chunk falls back to individual calls.
+        """
+        for (block_number, chunk), response in zip(chunks, responses):
+            try:
+                if response is not None:
+                    results = self.web3.codec.decode(["(bool,bytes)[]"], bytes(response))[0]
+                else:
+                    results = self.multicall.functions.aggregate3(
+                        [self._encode_call(a, t) for a, t, _ in chunk]
+                    ).call(block_identifier=block_number)
+                balances.update(self._decode_results(chunk, results))
+            except Exception as e:
+                logger.warning(
+                    f"aggregate3 at block {block_number} failed, "
+                    f"falling back to {len(chunk)} individual calls: {e}"
+                )
+                for key in chunk:
+                    balances[key] = self.get_balance(key)
+
+        logger.debug(
+            f"Resolved {len(balances)} balances with {len(chunks)} aggregate3 calls"
+        )
+
+    def get_balances(self, keys: Iterable[BalanceKey]) -> Dict[BalanceKey, Optional[int]]:
+        """Get raw balances for many (address, token, block) keys."""
+        balances, chunks = self.plan_chunks(keys)
+        if not chunks:
+            return balances
+
+        if self.rpc_batch is not None:
+            responses = self.rpc_batch.call("eth_call", self.chunk_params(chunks))
+        else:
+            responses = [None] * len(chunks)
+
+        self.collect(chunks, responses, balances)
+        return balances
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Maintenance of the monthly `transactions` partitions.
+
+Creates the partitions of the current and the next `--ahead` months, plus
+those of older months that have rows in `transactions_default` (history
+stored before the partitions existed, e.g. by a backfill), and detaches (or
+drops) partitions older than `--retention-months`. Meant to run from cron,
+e.g. daily:
+
+    python partitions.py --ahead 3 --retention-months 24
+    python partitions.py --retention-months 24 --drop --dry-run
+"""
+
+import argparse
+import logging
+import sys
+import time
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence, Tuple
+
+from config import load_config
+from database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# (name, start, end) with timestamp bounds, None bounds for the default partition
+Partition = Tuple[str, Optional[int], Optional[int]]
+
+
+def month_start(timestamp: float) -> datetime:
+    """First instant (UTC) of the month containing `timestamp`."""
+    moment = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    """Shift a month start by `months` (negative goes back)."""
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    """Partition table name of a month, e.g. transactions_2025_06."""
+    return f"transactions_{month:%Y_%m}"
+
+
+def plan_partitions(
+    existing: Sequence[Partition],
+    now: float,
+    months_ahead: int,
+    since: Optional[float] = None,
+) -> List[Partition]:
+    """Monthly partitions from the current month to `months_ahead` that are missing.
+
+    With `since` the range starts at the month containing it instead, so
+    older months get their partitions too.
+    """
+    bounded = [(start, end) for _, start, end in existing if start is not None]
+    current = month_start(now)
+    first = month_start(min(since, now)) if since is not None else current
+    months = (current.year - first.year) * 12 + current.month - first.month
+    missing = []
+    for offset in range(-months, months_ahead + 1):
+        month = add_months(current, offset)
+        start = int(month.timestamp())
+        end = int(add_months(month, 1).timestamp())
+        if not any(start < other_end and other_start < end for other_start, other_end in bounded):
+            missing.append((partition_name(month), start, end))
+    return missing
+
+
+def expired_partitions(
+    existing: Sequence[Partition], now: float, retention_months: int
+) -> List[str]:
+    """Partitions that end before the retention window (none if retention is 0)."""
+    if retention_months <= 0:
+        return []
+    cutoff = int(add_months(month_start(now), -retention_months).timestamp())
+    return [name for name, _, end in existing if end is not None and end <= cutoff]
+
+
+def maintain(
+    db_manager: DatabaseManager,
+    months_ahead: int,
+    retention_months: int = 0,
+    drop: bool = False,
+    dry_run: bool = False,
+    now: Optional[float] = None,
+    since: Optional[float] = None,
+) -> Tuple[List[str], List[str]]:
+    """Create missing partitions and expire old ones.
+
+    Partitions are created from the month of `since` (default: the oldest
+    row in transactions_default) to `months_ahead`, each committed on its
+    own so moving a large default partition does not hold one long lock.
+    Returns the names of the created and the expired partitions. Does
+    nothing if transactions is not partitioned.
+    """
+    now = time.time() if now is None else now
+    with db_manager.get_connection() as conn:
+        existing = db_manager.get_transaction_partitions(conn)
+        if existing is None:
+            logger.warning("transactions is not partitioned, apply migrations/006 first")
+            return [], []
+
+        if since is None:
+            since = db_manager.get_default_partition_start(conn)
+        created = plan_partitions(existing, now, months_ahead, since=since)
+        # Months older than the retention window are created and expired at once
+        expired = expired_partitions(list(existing) + created, now, retention_months)
+        if dry_run:
+            return [name for name, _, _ in created], expired
+
+        for name, start, end in created:
+            db_manager.create_transaction_partition(conn, name, start, end)
+            conn.commit()
+        for name in expired:
+            db_manager.detach_transaction_partition(conn, name, drop=drop)
+        conn.commit()
+    return [name for name, _, _ in created], expired
+
+
+def main():
+    """Main entry point."""
+    config = load_config()
+    parser = argparse.ArgumentParser(description="Maintain monthly transactions partitions")
+    parser.add_argument(
+        "--ahead",
+        type=int,
+        default=config.PARTITION_MONTHS_AHEAD,
+        help=f"Months created in advance (default: {config.PARTITION_MONTHS_AHEAD})",
+    )
+    parser.add_argument(
+        "--retention-months",
+        type=int,
+        default=config.RETENTION_MONTHS,
+        help=f"Months of transactions kept, 0 keeps all (default: {config.RETENTION_MONTHS})",
+    )
+    parser.add_argument(
+        "--drop", action="store_true", help="Drop expired partitions instead of detaching them"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Only print what would change")
+    parser.add_argument("--list", action="store_true", help="List partitions and exit")
+    parser.add_argument("--log-level", default="INFO", help="Log level (default: INFO)")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=getattr(logging, args.log_level.upper()),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    db_manager = DatabaseManager(config.DATABASE_URL)
+    if args.list:
+        with db_manager.get_connection() as conn:
+            partitions = db_manager.get_transaction_partitions(conn)
+        if partitions is None:
+            print("transactions is not partitioned")
+            sys.exit(1)
+        for name, start, end in partitions:
+            if start is None:
+                print(f"{name:<28} default")
+            else:
+                print(
+                    f"{name:<28} {datetime.fromtimestamp(start, tz=timezone.utc):%Y-%m-%d} - "
+                    f"{datetime.fromtimestamp(end, tz=timezone.utc):%Y-%m-%d}"
+                )
+        return
+
+    created, expired = maintain(
+        db_manager,
+        args.ahead,
+        retention_months=args.retention_months,
+        drop=args.drop,
+        dry_run=args.dry_run,
+    )
+    if args.dry_run:
+        verb = "drop" if args.drop else "detach"
+        logger.info(f"Would create {created or 'no partitions'}, would {verb} {expired or 'none'}")
+    else:
+        verb = "dropped" if args.drop else "detached"
+        logger.info(f"Created {len(created)} partitions, {verb} {len(expired)} expired")
+
+
+if __name__ == "__main__":
+    main()
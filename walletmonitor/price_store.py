@@ -0,0 +1,222 @@
+"""
+Minute-resolution ETH/USDT price store backed by Binance 1m klines.
+"""
+
+import logging
+import math
+import os
+import struct
+import threading
+import time
+from array import array
+from typing import List, Optional, Tuple
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+BINANCE_KLINES_URL = "https://api.binance.com/api/v3/klines"
+KLINES_LIMIT = 1000  # Maximum candles per klines request
+
+# File layout: little-endian int64 first minute, then float64 open prices
+_HEADER = struct.Struct("<q")
+
+
+class PriceStore:
+    """Open prices of 1m candles in a compact array indexed by unix minute.
+
+    Ranges are bulk-loaded with up to 1000 candles per request, lookups are
+    O(1), and a background thread keeps the current minute filled. Missing
+    minutes are stored as NaN. The array is persisted to `path` so restarts
+    and backfills reuse already downloaded history.
+    """
+
+    def __init__(self, symbol: str = "ETHUSDT", path: Optional[str] = None):
+        self.symbol = symbol
+        self.path = path
+        self.http_calls = 0
+        # (first minute, prices) published as one tuple so readers never
+        # pair a new base with the old array
+        self._series: Tuple[Optional[int], array] = (None, array("d"))
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+        self._dirty = False
+
+        if path and os.path.exists(path):
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._series[1])
+
+    def get_price(self, unix_ts: int) -> Optional[float]:
+        """Get the open price of the minute containing `unix_ts`, if loaded."""
+        base, prices = self._series
+        if base is None:
+            return None
+        index = unix_ts // 60 - base
+        if 0 <= index < len(prices):
+            price = prices[index]
+            if not math.isnan(price):
+                return price
+        return None
+
+    def latest_price(self) -> Optional[float]:
+        """Get the most recent loaded price."""
+        for price in reversed(self._series[1]):
+            if not math.isnan(price):
+                return price
+        return None
+
+    def price_at(self, unix_ts: int) -> Optional[float]:
+        """Get the price at `unix_ts`, loading its range on a miss."""
+        price = self.get_price(unix_ts)
+        if price is None:
+            self.ensure_range(unix_ts, unix_ts)
+            price = self.get_price(unix_ts)
+        return price
+
+    def set_prices(self, prices: List[Tuple[int, float]]) -> None:
+        """Store (minute, price) pairs, growing the array as needed."""
+        if not prices:
+            return
+        with self._lock:
+            low = min(minute for minute, _ in prices)
+            high = max(minute for minute, _ in prices)
+            base, series = self._series
+            if base is None:
+                base = low
+            if low < base:
+                # Prepending shifts every index, so it goes into a new array
+                grown = array("d", [math.nan]) * (base - low)
+                grown.extend(series)
+                series = grown
+                base = low
+            missing = high - base + 1 - len(series)
+            if missing > 0:
+                series.extend(array("d", [math.nan]) * missing)
+            for minute, price in prices:
+                series[minute - base] = price
+            self._series = (base, series)
+            self._dirty = True
+
+    def fetch_klines(self, start_minute: int, end_minute: int) -> int:
+        """Download 1m candles for [start_minute, end_minute], 1000 per request."""
+        loaded = 0
+        minute = start_minute
+        while minute <= end_minute:
+            batch_end = min(end_minute, minute + KLINES_LIMIT - 1)
+            params = {
+                "symbol": self.symbol,
+                "interval": "1m",
+                "startTime": minute * 60_000,
+                "endTime": batch_end * 60_000,
+                "limit": KLINES_LIMIT,
+            }
+            resp = requests.get(BINANCE_KLINES_URL, params=params, timeout=10)
+            self.http_calls += 1
+            data = resp.json()
+            if not isinstance(data, list):
+                raise ValueError(f"Unexpected klines response: {str(data)[:200]}")
+
+            # [0] is open time in ms, [1] is open price
+            prices = [(int(kline[0]) // 60_000, float(kline[1])) for kline in data]
+            self.set_prices(prices)
+            loaded += len(prices)
+            minute = batch_end + 1
+        return loaded
+
+    def ensure_range(self, start_ts: int, end_ts: int) -> None:
+        """Make sure prices for [start_ts, end_ts] are loaded.
+
+        Only the span between the first and last missing minute is downloaded.
+        Minutes in the future are skipped.
+        """
+        now_minute = int(time.time()) // 60
+        start_minute = start_ts // 60
+        end_minute = min(end_ts // 60, now_minute)
+
+        missing = [
+            minute
+            for minute in range(start_minute, end_minute + 1)
+            if self.get_price(minute * 60) is None
+        ]
+        if not missing:
+            return
+
+        try:
+            loaded = self.fetch_klines(missing[0], missing[-1])
+            logger.debug(
+                f"Loaded {loaded} {self.symbol} candles for minutes {missing[0]}-{missing[-1]}"
+            )
+        except Exception as e:
+            logger.warning(f"Failed to load {self.symbol} klines: {e}")
+            return
+
+        if self.path:
+            self.save()
+
+    def save(self) -> None:
+        """Persist prices to disk atomically."""
+        if not self.path or self._series[0] is None:
+            return
+        with self._lock:
+            base, prices = self._series
+            # Per-process temp file, backfill workers share the store path
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(_HEADER.pack(base))
+                prices.tofile(f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def load(self) -> None:
+        """Load persisted prices from disk."""
+        try:
+            with open(self.path, "rb") as f:
+                (base_minute,) = _HEADER.unpack(f.read(_HEADER.size))
+                prices = array("d")
+                prices.frombytes(f.read())
+        except Exception as e:
+            logger.warning(f"Failed to load price store {self.path}: {e}")
+            return
+
+        with self._lock:
+            self._series = (base_minute, prices)
+        logger.info(f"Loaded {len(prices)} minutes of {self.symbol} prices from {self.path}")
+
+    def _refresh_loop(self, interval: float, save_every: int) -> None:
+        """Keep the current minute loaded until stopped."""
+        refreshes = 0
+        while not self._stop.wait(interval):
+            now = int(time.time())
+            try:
+                self.fetch_klines(now // 60 - 1, now // 60)
+            except Exception as e:
+                logger.warning(f"Failed to refresh {self.symbol} price: {e}")
+                continue
+            refreshes += 1
+            if self.path and self._dirty and refreshes % save_every == 0:
+                self.save()
+
+    def start_refresher(self, interval: float = 15.0, save_every: int = 20) -> None:
+        """Start the background refresher for the current minute."""
+        if self._refresher is not None or interval <= 0:
+            return
+        self._stop.clear()
+        self._refresher = threading.Thread(
+            target=self._refresh_loop,
+            args=(interval, save_every),
+            name=f"{self.symbol}-price-refresher",
+            daemon=True,
+        )
+        self._refresher.start()
+
+    def stop(self) -> None:
+        """Stop the background refresher and persist prices."""
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join(timeout=5)
+            self._refresher = None
+        if self._dirty:
+            self.save()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Rebuild the flow rollup tables (flow_rollup_* and wallet_type_rollup_*) from transactions.
+
+Ingest keeps the rollups current, but only with the labels known when a
+transfer was stored. Rebuilding fills them for history and picks up labels
+assigned later (label enrichment, data completer). Days are rebuilt one
+transaction each:
+
+    python rollups.py --from 2024-01-01
+    python rollups.py --days 7
+"""
+
+import argparse
+import logging
+import sys
+import time
+from datetime import datetime, timezone
+
+from config import load_config
+from database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+DAY = 86400
+
+
+def parse_day(value: str) -> int:
+    """Timestamp of a YYYY-MM-DD date (UTC midnight)."""
+    day = datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    return int(day.timestamp())
+
+
+def rebuild(db_manager: DatabaseManager, start: int, end: int) -> int:
+    """Rebuild the rollups of all days in [start, end); returns the flow rows aggregated."""
+    total = 0
+    for day in range(start, end, DAY):
+        with db_manager.get_connection() as conn:
+            flows = db_manager.rebuild_flow_rollups(conn, day, day + DAY)
+            conn.commit()
+        total += flows
+        logger.info(
+            f"Rebuilt {datetime.fromtimestamp(day, tz=timezone.utc):%Y-%m-%d}: {flows} flows"
+        )
+    return total
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Rebuild flow rollups from transactions")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--from", dest="from_day", help="First day (YYYY-MM-DD, UTC)")
+    source.add_argument("--days", type=int, help="Rebuild the last N days (today included)")
+    parser.add_argument("--to", dest="to_day", help="Last day, inclusive (default: today)")
+    parser.add_argument("--log-level", default="INFO", help="Log level (default: INFO)")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=getattr(logging, args.log_level.upper()),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    today = int(time.time()) // DAY * DAY
+    end = parse_day(args.to_day) + DAY if args.to_day else today + DAY
+    start = parse_day(args.from_day) if args.from_day else end - max(1, args.days) * DAY
+    if start >= end:
+        print("Empty day range", file=sys.stderr)
+        sys.exit(1)
+
+    started = time.monotonic()
+    total = rebuild(DatabaseManager(load_config().DATABASE_URL), start, end)
+    logger.info(
+        f"Rebuilt {(end - start) // DAY} days, {total} flows in {time.monotonic() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
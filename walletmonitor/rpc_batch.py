@@ -0,0 +1,174 @@
+"""
+Batched JSON-RPC client for block and receipt fetching.
+"""
+
+import itertools
+import logging
+from typing import Any, Iterable, List, Optional, Sequence, Set
+
+import requests
+from metrics import RPC_ERRORS, count_rpc
+from web3 import Web3
+from web3._utils.method_formatters import PYTHONIC_RESULT_FORMATTERS
+from web3._utils.rpc_abi import RPC
+from web3.datastructures import AttributeDict
+
+logger = logging.getLogger(__name__)
+
+# JSON-RPC error code for methods the node does not implement
+METHOD_NOT_FOUND = -32601
+UNSUPPORTED_MESSAGES = ("not supported", "does not exist", "not found", "not available")
+
+
+class BatchRpcError(Exception):
+    """Raised when a JSON-RPC batch response cannot be used."""
+
+
+class BatchRpcClient:
+    """Packs many JSON-RPC calls of one method into batch POSTs.
+
+    Results are formatted the same way Web3 formats them (HexBytes hashes,
+    checksum addresses, int quantities), so callers can treat them like
+    `web3.eth.get_block` / `web3.eth.get_transaction_receipt` results.
+    A failed batch falls back to individual calls through the Web3 provider.
+    """
+
+    def __init__(
+        self,
+        web3: Web3,
+        endpoint_uri: str,
+        batch_size: int = 50,
+        timeout: int = 30,
+    ):
+        self.web3 = web3
+        self.endpoint_uri = endpoint_uri
+        self.batch_size = max(1, batch_size)
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._ids = itertools.count(1)
+        # Methods the node rejected as unknown, so callers can stop using them
+        self.unsupported_methods: Set[str] = set()
+
+    def _format(self, method: str, result: Any) -> Any:
+        """Apply Web3 result formatters to a raw JSON-RPC result."""
+        if result is None:
+            return None
+        if method == "eth_getBlockReceipts":
+            # List of receipts, format each like eth_getTransactionReceipt
+            formatter = PYTHONIC_RESULT_FORMATTERS[RPC.eth_getTransactionReceipt]
+            return [AttributeDict.recursive(formatter(receipt)) for receipt in result]
+        formatter = PYTHONIC_RESULT_FORMATTERS.get(method)
+        if formatter is not None:
+            result = formatter(result)
+        return AttributeDict.recursive(result)
+
+    def _check_unsupported(self, method: str, error: Any) -> None:
+        """Remember methods the node reports as not implemented."""
+        if not isinstance(error, dict):
+            return
+        message = str(error.get("message", "")).lower()
+        mentions_method = method.lower() in message or "method" in message
+        if error.get("code") == METHOD_NOT_FOUND or (
+            mentions_method and any(text in message for text in UNSUPPORTED_MESSAGES)
+        ):
+            if method not in self.unsupported_methods:
+                logger.warning(f"Node does not support {method}: {error}")
+            self.unsupported_methods.add(method)
+
+    def _post(self, payload: List[dict]) -> List[dict]:
+        """Send one batch request and return the list of responses."""
+        resp = self.session.post(self.endpoint_uri, json=payload, timeout=self.timeout)
+        resp.raise_for_status()
+        data = resp.json()
+        if not isinstance(data, list):
+            raise BatchRpcError(f"Unexpected batch response: {str(data)[:200]}")
+        return data
+
+    def call_single(self, method: str, params: Sequence[Any]) -> Optional[Any]:
+        """Make one call through the Web3 provider, returning None on failure."""
+        count_rpc(method)
+        try:
+            response = self.web3.provider.make_request(method, list(params))
+            if "error" in response:
+                self._check_unsupported(method, response["error"])
+                raise BatchRpcError(str(response["error"]))
+            return self._format(method, response.get("result"))
+        except Exception as e:
+            RPC_ERRORS.labels(method).inc()
+            logger.warning(f"{method}{list(params)} failed: {e}")
+            return None
+
+    def _call_chunk(self, method: str, chunk: List[Sequence[Any]]) -> List[Any]:
+        """Call one chunk as a batch, falling back to individual calls."""
+        if method in self.unsupported_methods:
+            return [None] * len(chunk)
+        if len(chunk) == 1:
+            return [self.call_single(method, chunk[0])]
+
+        payload = [
+            {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": list(params)}
+            for params in chunk
+        ]
+        count_rpc(method, len(chunk), "batch")
+        try:
+            responses = {response.get("id"): response for response in self._post(payload)}
+        except Exception as e:
+            logger.warning(
+                f"Batch {method} of {len(chunk)} calls failed, "
+                f"falling back to individual calls: {e}"
+            )
+            return [self.call_single(method, params) for params in chunk]
+
+        results = []
+        for request, params in zip(payload, chunk):
+            response = responses.get(request["id"])
+            if response is not None and "error" in response:
+                self._check_unsupported(method, response["error"])
+            if method in self.unsupported_methods:
+                results.append(None)
+            elif response is None or "error" in response:
+                # Retry just the failed entry (e.g. per-item rate limit)
+                results.append(self.call_single(method, params))
+            else:
+                results.append(self._format(method, response.get("result")))
+        return results
+
+    def call(self, method: str, params_list: Sequence[Sequence[Any]]) -> List[Any]:
+        """Call `method` once per params entry, `batch_size` calls per POST.
+
+        Returns results in the order of `params_list`; failed calls yield None.
+        """
+        params_list = list(params_list)
+        results: List[Any] = []
+        for i in range(0, len(params_list), self.batch_size):
+            results.extend(self._call_chunk(method, params_list[i : i + self.batch_size]))
+        return results
+
+    def get_blocks(
+        self, block_numbers: Iterable[int], full_transactions: bool = True
+    ) -> List[Any]:
+        """Get blocks by number, in the given order."""
+        return self.call(
+            RPC.eth_getBlockByNumber,
+            [[hex(number), full_transactions] for number in block_numbers],
+        )
+
+    def get_transactions(self, tx_hashes: Iterable[str]) -> List[Any]:
+        """Get transactions by hash, in the given order."""
+        return self.call(RPC.eth_getTransactionByHash, [[h] for h in tx_hashes])
+
+    def get_receipts(self, tx_hashes: Iterable[str]) -> List[Any]:
+        """Get transaction receipts by hash, in the given order."""
+        return self.call(RPC.eth_getTransactionReceipt, [[h] for h in tx_hashes])
+
+    def get_block_receipts(self, block_numbers: Iterable[int]) -> List[Any]:
+        """Get all receipts of each block with eth_getBlockReceipts.
+
+        Returns one receipt list per block, or None where the call failed or
+        the node does not support the method (see `unsupported_methods`).
+        """
+        return self.call("eth_getBlockReceipts", [[hex(number)] for number in block_numbers])
+
+    def get_logs(self, filters: Iterable[dict]) -> List[Any]:
+        """Run eth_getLogs for each filter; failed calls yield None."""
+        return self.call(RPC.eth_getLogs, [[log_filter] for log_filter in filters])
@@ -0,0 +1,148 @@
+"""
+Test script for the newHeads stream against a local websocket stub.
+"""
+
+import asyncio
+import json
+import logging
+import sys
+import threading
+import time
+
+import websockets
+
+from head_stream import HeadStream
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Recorded mainnet headers (fields used by HeadStream only), one missed slot
+RECORDED_HEADERS = [
+    {"number": hex(18500000), "timestamp": hex(1698751511), "hash": "0x" + "a0" * 32},
+    {"number": hex(18500001), "timestamp": hex(1698751523), "hash": "0x" + "a1" * 32},
+    {"number": hex(18500002), "timestamp": hex(1698751547), "hash": "0x" + "a2" * 32},
+    {"number": hex(18500003), "timestamp": hex(1698751559), "hash": "0x" + "a3" * 32},
+]
+
+
+class ReplayServer:
+    """Websocket stub that answers eth_subscribe and replays recorded headers.
+
+    Each connection gets the headers `interval` seconds apart and is then
+    closed, like a provider dropping the subscription.
+    """
+
+    def __init__(self, headers, interval=0.05):
+        self.headers = headers
+        self.interval = interval
+        self.connections = 0
+        self.port = None
+        self._loop = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    async def _handler(self, ws, path=None):
+        self.connections += 1
+        request = json.loads(await ws.recv())
+        assert request["method"] == "eth_subscribe" and request["params"] == ["newHeads"]
+        await ws.send(json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": "0x1"}))
+        for header in self.headers:
+            await asyncio.sleep(self.interval)
+            await ws.send(
+                json.dumps(
+                    {
+                        "jsonrpc": "2.0",
+                        "method": "eth_subscription",
+                        "params": {"subscription": "0x1", "result": header},
+                    }
+                )
+            )
+        await ws.close()
+
+    def _serve(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        server = self._loop.run_until_complete(websockets.serve(self._handler, "127.0.0.1", 0))
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    def start(self):
+        self._thread.start()
+        self._ready.wait(5)
+        return f"ws://127.0.0.1:{self.port}"
+
+
+def test_stream_replay():
+    """Heads from the stub wake up waiters in order."""
+    server = ReplayServer(RECORDED_HEADERS)
+    stream = HeadStream(server.start(), block_time=12.0)
+    stream.start()
+    try:
+        first = int(RECORDED_HEADERS[0]["number"], 16)
+        last = int(RECORDED_HEADERS[-1]["number"], 16)
+
+        head = stream.wait(None, timeout=5)
+        assert head is not None and head >= first, f"no head received: {head}"
+        assert stream.wait(last, timeout=0.2) is None, "wait returned without a newer head"
+
+        deadline = time.monotonic() + 5
+        while stream.head != last and time.monotonic() < deadline:
+            stream.wait(stream.head, timeout=1)
+        assert stream.head == last, f"expected head {last}, got {stream.head}"
+        assert stream.head_timestamp == int(RECORDED_HEADERS[-1]["timestamp"], 16)
+        # Smoothed block time: 12s slots with one 24s gap
+        assert abs(stream.block_time - 13.92) < 0.01, f"block time {stream.block_time}"
+        logger.info(f"✓ Replayed {stream.heads_received} heads, head {stream.head}")
+    finally:
+        stream.stop()
+
+
+def test_fallback_and_reconnect():
+    """A dropped subscription switches to block-time polling and reconnects."""
+    server = ReplayServer(RECORDED_HEADERS[:2])
+    stream = HeadStream(server.start(), block_time=12.0, min_poll=2.0)
+    stream.start()
+    try:
+        stream.wait(None, timeout=5)
+        deadline = time.monotonic() + 5
+        while stream.connected and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert not stream.connected, "subscription still marked connected after close"
+
+        head_ts = stream.head_timestamp
+        delay = stream.next_poll_delay(now=head_ts + 1)
+        assert abs(delay - 11.0) < 0.01, f"expected next block in ~11s, got {delay}"
+        delay = stream.next_poll_delay(now=head_ts + 60)
+        assert delay == 2.0, f"late block should poll at min interval, got {delay}"
+
+        deadline = time.monotonic() + 5
+        while server.connections < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert server.connections >= 2, "stream did not reconnect"
+        # Every session subscribed, so the backoff does not grow across drops
+        deadline = time.monotonic() + 5
+        while server.connections < 3 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert server.connections >= 3, "stream did not reconnect again"
+        assert stream._reconnect_delay <= 2.0, f"backoff grew to {stream._reconnect_delay}"
+        # Replayed (older) heads never move the head backwards
+        assert stream.head == int(RECORDED_HEADERS[1]["number"], 16)
+        logger.info(f"✓ Reconnected after drop ({stream.reconnects} reconnects)")
+    finally:
+        stream.stop()
+
+
+def main():
+    """Run all tests."""
+    try:
+        test_stream_replay()
+        test_fallback_and_reconnect()
+        logger.info("All head stream tests passed")
+    except Exception as e:
+        logger.error(f"TEST FAILED: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
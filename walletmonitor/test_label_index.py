@@ -0,0 +1,128 @@
+"""
+Test script for the memory-mapped label index.
+"""
+
+import logging
+import os
+import sys
+import tempfile
+
+from label_index import LabelIndex, OverlayLabels, write_label_index
+from models import Wallet
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BINANCE = "0x28c6c06298d514db089934071355e5743bf21d60"
+COINBASE = "0xa090e606e30bd747d4e6245a1517ebe430f0057e"
+UNLABELLED = "0x" + "11" * 20
+
+
+def entries(count: int):
+    """Sorted synthetic entries with a few shared label strings."""
+    rows = [
+        (bytes.fromhex(BINANCE[2:]), 1, "Binance 14", "binance", "Hot", "hot", "ethereum"),
+        (bytes.fromhex(COINBASE[2:]), 2, "Coinbase 10", "coinbase", "Hot", "hot", "ethereum"),
+        (bytes.fromhex(UNLABELLED[2:]), None, None, None, None, None, None),
+    ]
+    for i in range(count):
+        address = (0x3000 + i).to_bytes(20, "big")
+        rows.append((address, 100 + i, f"Deposit {i}", "okx", "Deposit", "deposit", "ethereum"))
+    return sorted(rows)
+
+
+def index_path(tmp: str) -> str:
+    return os.path.join(tmp, "labels.idx")
+
+
+def test_lookup():
+    """Hits, misses and missing labels."""
+    with tempfile.TemporaryDirectory() as tmp:
+        check_lookup(index_path(tmp))
+
+
+def check_lookup(path: str):
+    write_label_index(path, entries(10000), watermark=1700000000)
+    index = LabelIndex(path)
+    assert len(index) == 10003
+
+    wallet = index[BINANCE]
+    assert wallet == Wallet(
+        address=BINANCE, friendly_name="Binance 14", grp_name="binance", grp_type="Hot",
+        wallet_type="hot", id=1,
+    ), wallet
+    assert index.get(COINBASE.upper().replace("0X", "0x")).friendly_name == "Coinbase 10"
+    assert index[UNLABELLED].friendly_name is None and index[UNLABELLED].id is None
+    assert index.get("0x" + "ff" * 20) is None
+    assert index.get("TXyz") is None and "" not in index
+    assert index.get("0x" + (0x3000 + 10000).to_bytes(20, "big").hex()) is None
+    addresses = list(index)
+    assert addresses == sorted(addresses) and addresses[-3:] == [UNLABELLED, BINANCE, COINBASE]
+    assert index.updated_since().year == 2023
+
+    # Shared strings are stored once
+    size = os.path.getsize(path)
+    assert size < 10003 * (20 + 28) + 10000 * 20, size
+    logger.info(f"✓ Lookups ({size / 1024:.0f} KiB for {len(index)} wallets)")
+
+
+def test_rebuild():
+    """A rebuilt file replaces the old one atomically and is picked up by reopen."""
+    with tempfile.TemporaryDirectory() as tmp:
+        check_rebuild(index_path(tmp))
+
+
+def check_rebuild(path: str):
+    write_label_index(path, entries(10))
+    index = LabelIndex(path)
+    assert not index.reopen()
+
+    write_label_index(path, entries(20))
+    assert len(index) == 13, "old mapping must stay valid"
+    assert index.reopen() and len(index) == 23
+    assert not [name for name in os.listdir(os.path.dirname(path)) if ".tmp." in name]
+
+    try:
+        write_label_index(path, [(b"\x02" * 20, 1) + (None,) * 5, (b"\x01" * 20, 2) + (None,) * 5])
+        raise AssertionError("unsorted entries accepted")
+    except ValueError:
+        pass
+    assert len(LabelIndex(path)) == 23, "failed build must keep the previous file"
+    logger.info("✓ Atomic rebuild")
+
+
+def test_overlay():
+    """Wallets changed since the build take precedence over the index."""
+    with tempfile.TemporaryDirectory() as tmp:
+        check_overlay(index_path(tmp))
+
+
+def check_overlay(path: str):
+    write_label_index(path, entries(10))
+    index = LabelIndex(path)
+    relabelled = Wallet(address=UNLABELLED, friendly_name="Wintermute", grp_name="wintermute")
+    new = Wallet(address="0x" + "22" * 20, friendly_name="New")
+    labels = OverlayLabels(index, {UNLABELLED: relabelled, new.address: new})
+
+    assert labels.get(UNLABELLED) is relabelled
+    assert labels.get(new.address) is new
+    assert labels.get(BINANCE).grp_name == "binance"
+    assert len(labels) == len(index) + 1
+    assert sorted(labels) == sorted(set(index) | {new.address})
+    logger.info("✓ Overlay")
+
+
+def main():
+    """Run all tests."""
+    try:
+        test_lookup()
+        test_rebuild()
+        test_overlay()
+        logger.info("All label index tests passed")
+    except Exception as e:
+        logger.error(f"TEST FAILED: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
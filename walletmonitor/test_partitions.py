@@ -0,0 +1,83 @@
+"""
+Test script for the monthly transactions partition planning.
+"""
+
+import logging
+import sys
+from datetime import datetime, timezone
+
+from partitions import add_months, expired_partitions, month_start, plan_partitions
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def ts(year: int, month: int, day: int = 1) -> int:
+    """Unix timestamp of a UTC date."""
+    return int(datetime(year, month, day, tzinfo=timezone.utc).timestamp())
+
+
+def test_month_math():
+    """Month starts are UTC and shifts cross year boundaries."""
+    assert month_start(ts(2025, 6, 17) + 3600) == datetime(2025, 6, 1, tzinfo=timezone.utc)
+    november = datetime(2025, 11, 1, tzinfo=timezone.utc)
+    assert add_months(november, 3) == datetime(2026, 2, 1, tzinfo=timezone.utc)
+    assert add_months(november, -23) == datetime(2023, 12, 1, tzinfo=timezone.utc)
+    logger.info("✓ Month math")
+
+
+def test_plan_partitions():
+    """Only months without an overlapping partition are planned."""
+    now = ts(2025, 11, 20)
+    existing = [
+        ("transactions_default", None, None),
+        ("transactions_2025_11", ts(2025, 11), ts(2025, 12)),
+        ("transactions_2026_01", ts(2026, 1), ts(2026, 2)),
+    ]
+    planned = plan_partitions(existing, now, 3)
+    assert planned == [
+        ("transactions_2025_12", ts(2025, 12), ts(2026, 1)),
+        ("transactions_2026_02", ts(2026, 2), ts(2026, 3)),
+    ], planned
+    assert plan_partitions(existing + planned, now, 3) == []
+
+    # History in the default partition gets the partitions of its months
+    planned = plan_partitions(existing, now, 1, since=ts(2025, 8, 20))
+    assert [name for name, _, _ in planned] == [
+        "transactions_2025_08", "transactions_2025_09", "transactions_2025_10",
+        "transactions_2025_12",
+    ], planned
+    assert plan_partitions(existing, now, 0, since=ts(2026, 3)) == []
+    logger.info(f"✓ Planned {[name for name, _, _ in planned]}")
+
+
+def test_expired_partitions():
+    """Partitions ending before the retention window expire, the default never does."""
+    now = ts(2025, 11, 20)
+    existing = [
+        ("transactions_default", None, None),
+        ("transactions_2025_08", ts(2025, 8), ts(2025, 9)),
+        ("transactions_2025_09", ts(2025, 9), ts(2025, 10)),
+        ("transactions_2025_10", ts(2025, 10), ts(2025, 11)),
+    ]
+    assert expired_partitions(existing, now, 0) == []
+    # Two months kept: September 1st is the cutoff
+    assert expired_partitions(existing, now, 2) == ["transactions_2025_08"]
+    assert expired_partitions(existing, now, 1) == ["transactions_2025_08", "transactions_2025_09"]
+    logger.info("✓ Retention")
+
+
+def main():
+    """Run all tests."""
+    try:
+        test_month_math()
+        test_plan_partitions()
+        test_expired_partitions()
+        logger.info("All partition tests passed")
+    except Exception as e:
+        logger.error(f"TEST FAILED: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
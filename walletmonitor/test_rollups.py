@@ -0,0 +1,139 @@
+"""
+Test script for the flow rollups (requires database connection).
+
+Everything runs in one database transaction that is rolled back at the end.
+"""
+
+import logging
+import os
+import sys
+import time
+from decimal import Decimal
+
+from database import FLOW_ROLLUPS, ROLLUP_TABLES, WALLET_TYPE_ROLLUPS, DatabaseManager
+from models import Transaction, Wallet
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Far above any real block, so the rollback only touches test rows
+FORK_BLOCK = 10**15
+
+
+def random_address() -> str:
+    return "0x" + os.urandom(20).hex()
+
+
+def rollups(conn, groups):
+    """{(table, group, direction): (amount, usd_value, tx_count)} of the test groups and types."""
+    tables = [(table, "grp_name") for table in FLOW_ROLLUPS]
+    tables += [(table, "wallet_type") for table in WALLET_TYPE_ROLLUPS]
+    result = {}
+    with conn.cursor() as cur:
+        for table, key in tables:
+            cur.execute(
+                f"""
+                SELECT {key}, direction, sum(amount), sum(usd_value), sum(tx_count)
+                FROM {table}
+                WHERE {key} = ANY(%s)
+                GROUP BY {key}, direction
+                """,
+                (list(groups),),
+            )
+            for group, direction, amount, usd_value, tx_count in cur.fetchall():
+                result[(table, group, direction)] = (amount, usd_value, tx_count)
+    return result
+
+
+def transfers(source: Wallet, target: Wallet, timestamp: int):
+    """Two transfers in the first block after the fork and one in the next."""
+    return [
+        Transaction(
+            hash="0x" + os.urandom(32).hex(),
+            block_number=FORK_BLOCK + 1 + i // 2,
+            from_address=source.address,
+            to_address=target.address,
+            from_wallet=source,
+            to_wallet=target,
+            amount=Decimal("1.5") * (i + 1),
+            usd_value=Decimal("3000") * (i + 1),
+            timestamp=timestamp + i,
+        )
+        for i in range(3)
+    ]
+
+
+def test_reorg_replay():
+    """Rolled back blocks leave the rollups, so storing them again counts them once."""
+    db_manager = DatabaseManager()
+    try:
+        with db_manager.get_connection():
+            pass
+    except Exception as e:
+        logger.warning(f"Skipping reorg replay test, no database: {e}")
+        return
+
+    tag = os.urandom(4).hex()
+    # Group and wallet type names of their own, so only test rows are counted
+    source = Wallet(
+        address=random_address(), friendly_name="Test A", grp_name=f"test_a_{tag}",
+        wallet_type=f"test_a_{tag}",
+    )
+    target = Wallet(
+        address=random_address(), friendly_name="Test B", grp_name=f"test_b_{tag}",
+        wallet_type=f"test_b_{tag}",
+    )
+    groups = (source.grp_name, target.grp_name)
+    timestamp = int(time.time()) // 60 * 60
+
+    with db_manager.get_connection() as conn:
+        try:
+            db_manager.store_transactions_batch(conn, transfers(source, target, timestamp))
+            stored = rollups(conn, groups)
+            assert len(stored) == 2 * len(ROLLUP_TABLES), stored
+            expected = (Decimal("9"), Decimal("18000"), 3)
+            for table in ROLLUP_TABLES:
+                assert stored[(table, source.grp_name, "out")] == expected, stored
+                assert stored[(table, target.grp_name, "in")] == expected, stored
+
+            removed = db_manager.rollback_to_block(conn, FORK_BLOCK)
+            assert removed == 3, removed
+            assert rollups(conn, groups) == {}, "emptied buckets must be removed"
+
+            # The canonical chain carries the same transfers
+            db_manager.store_transactions_batch(conn, transfers(source, target, timestamp))
+            assert rollups(conn, groups) == stored
+
+            # A shorter rollback only removes the later block
+            db_manager.rollback_to_block(conn, FORK_BLOCK + 1)
+            for (table, grp_name, direction), value in rollups(conn, groups).items():
+                assert value == (Decimal("4.5"), Decimal("9000"), 2), (table, grp_name, value)
+
+            # Relabelled after ingest: the rollback recomputes the day, so
+            # the old group is not left with the removed transfers
+            relabelled = f"test_c_{tag}"
+            with conn.cursor() as cur:
+                cur.execute(
+                    "UPDATE wallets SET grp_name = %s WHERE address = %s",
+                    (relabelled, source.address),
+                )
+            db_manager.rollback_to_block(conn, FORK_BLOCK)
+            after = rollups(conn, groups + (relabelled,))
+            assert after == {}, after
+        finally:
+            conn.rollback()
+    logger.info("✓ Reorg replay")
+
+
+def main():
+    """Run all tests."""
+    try:
+        test_reorg_replay()
+        logger.info("All rollup tests passed")
+    except Exception as e:
+        logger.error(f"TEST FAILED: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import { getFlowRollups, pickRollupInterval } from '../../lib/database.js';
+
+// 组别流量汇总：从 flow_rollup_1m/1h/1d 读取，不扫描 transactions
+// 参数：startTime, endTime（秒）, tokens, groups（逗号分隔）, interval（1m/1h/1d，默认按时间跨度选择）
+export async function GET(request) {
+  try {
+    const { searchParams } = new URL(request.url);
+
+    const startTime = searchParams.get('startTime') ? parseInt(searchParams.get('startTime')) : undefined;
+    const endTime = searchParams.get('endTime') ? parseInt(searchParams.get('endTime')) : undefined;
+    const tokens = searchParams.get('tokens') ? searchParams.get('tokens').split(',').map(t => t.trim()).filter(t => t) : undefined;
+    const groups = searchParams.get('groups') ? searchParams.get('groups').split(',').map(g => g.trim()).filter(g => g) : undefined;
+    const interval = searchParams.get('interval') || pickRollupInterval(startTime, endTime);
+
+    if (!['1m', '1h', '1d'].includes(interval)) {
+      return Response.json(
+        { success: false, error: 'interval must be 1m, 1h or 1d' },
+        { status: 400 }
+      );
+    }
+
+    const data = await getFlowRollups(startTime, endTime, tokens, groups, interval);
+
+    return Response.json({
+      success: true,
+      interval,
+      data,
+      total: data.length
+    });
+  } catch (error) {
+    console.error('Error fetching flow rollups:', error);
+    return Response.json(
+      { success: false, error: 'Failed to fetch flow rollups' },
+      { status: 500 }
+    );
+  }
+}
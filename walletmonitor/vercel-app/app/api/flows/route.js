@@ -1,4 +1,4 @@
-import { getFlowData, processFlowDataForChart } from '../../lib/database.js';
+import { getFlowData, getWalletTypeFlows, pickRollupInterval, processFlowDataForChart } from '../../lib/database.js';
 
 export async function GET(request) {
   try {
@@ -8,12 +8,21 @@ export async function GET(request) {
     const endTime = searchParams.get('endTime') ? parseInt(searchParams.get('endTime')) : undefined;
     const tokens = searchParams.get('tokens') ? searchParams.get('tokens').split(',') : undefined;
     const groups = searchParams.get('groups') ? searchParams.get('groups').split(',') : undefined;
-    
-    const flowData = await getFlowData(startTime, endTime, tokens, groups);
-    const chartData = processFlowDataForChart(flowData);
+    const interval = searchParams.get('interval') || pickRollupInterval(startTime, endTime);
+
+    if (!['1m', '1h', '1d'].includes(interval)) {
+      return Response.json(
+        { success: false, error: 'interval must be 1m, 1h or 1d' },
+        { status: 400 }
+      );
+    }
+
+    // 按时间桶从钱包类型汇总表读取净流量，不扫描 transactions
+    const chartData = await getWalletTypeFlows(startTime, endTime, tokens, groups, interval);
     
     return Response.json({
       success: true,
+      interval,
       data: chartData,
       total: chartData.length
     });
@@ -9,12 +9,12 @@ const pool = new Pool({
 export async function GET(request) {
   try {
     const query = `
-      SELECT DISTINCT 
+      SELECT
         tk.symbol as value,
         tk.symbol as label
       FROM tokens tk
-      INNER JOIN transactions t ON tk.id = t.token_id
-      WHERE tk.symbol IS NOT NULL 
+      WHERE tk.symbol IS NOT NULL
+        AND EXISTS (SELECT 1 FROM flow_rollup_1d r WHERE r.token_id = tk.id)
       ORDER BY tk.symbol ASC
     `;
 
@@ -94,11 +94,12 @@ export async function getAvailableTokens() {
   const client = await pool.connect();
   
   try {
+    // 只查询日汇总表，不扫描 transactions
     const result = await client.query(`
-      SELECT DISTINCT tk.symbol as token 
-      FROM transactions t
-      LEFT JOIN tokens tk ON t.token_id = tk.id
-      WHERE tk.symbol IS NOT NULL 
+      SELECT tk.symbol as token
+      FROM tokens tk
+      WHERE tk.symbol IS NOT NULL
+        AND EXISTS (SELECT 1 FROM flow_rollup_1d r WHERE r.token_id = tk.id)
       ORDER BY tk.symbol
     `);
     return result.rows.map(row => row.token);
@@ -107,26 +108,181 @@ export async function getAvailableTokens() {
   }
 }
 
+// 汇总表及其时间粒度（秒）
+const ROLLUP_TABLES = {
+  '1m': { table: 'flow_rollup_1m', seconds: 60 },
+  '1h': { table: 'flow_rollup_1h', seconds: 3600 },
+  '1d': { table: 'flow_rollup_1d', seconds: 86400 },
+};
+
+// 按时间跨度选择粒度：6小时以内按分钟，7天以内按小时，更长按天
+export function pickRollupInterval(startTime, endTime) {
+  const span = (endTime || Math.floor(Date.now() / 1000)) - (startTime || 0);
+  if (span <= 6 * 3600) return '1m';
+  if (span <= 7 * 86400) return '1h';
+  return '1d';
+}
+
+// 从汇总表读取各组别、代币的流入/流出/净流量
+export async function getFlowRollups(startTime, endTime, tokens, groups, interval) {
+  const { table, seconds } = ROLLUP_TABLES[interval] || ROLLUP_TABLES[pickRollupInterval(startTime, endTime)];
+  const client = await pool.connect();
+
+  try {
+    let query = `
+      SELECT
+        r.bucket,
+        r.grp_name,
+        tk.symbol as token,
+        SUM(r.amount) FILTER (WHERE r.direction = 'in') as inflow,
+        SUM(r.amount) FILTER (WHERE r.direction = 'out') as outflow,
+        SUM(r.usd_value) FILTER (WHERE r.direction = 'in') as inflow_usd,
+        SUM(r.usd_value) FILTER (WHERE r.direction = 'out') as outflow_usd,
+        SUM(r.tx_count) as count
+      FROM ${table} r
+      JOIN tokens tk ON r.token_id = tk.id
+      WHERE 1=1
+    `;
+
+    const params = [];
+    let paramIndex = 1;
+
+    // 起始时间向下对齐到所在的桶
+    if (startTime) {
+      query += ` AND r.bucket >= $${paramIndex}`;
+      params.push(Math.floor(startTime / seconds) * seconds);
+      paramIndex++;
+    }
+
+    if (endTime) {
+      query += ` AND r.bucket <= $${paramIndex}`;
+      params.push(endTime);
+      paramIndex++;
+    }
+
+    if (tokens && tokens.length > 0) {
+      query += ` AND tk.symbol = ANY($${paramIndex})`;
+      params.push(tokens);
+      paramIndex++;
+    }
+
+    if (groups && groups.length > 0) {
+      query += ` AND LOWER(r.grp_name) = ANY($${paramIndex})`;
+      params.push(groups.map(g => g.toLowerCase()));
+      paramIndex++;
+    }
+
+    query += ` GROUP BY r.bucket, r.grp_name, tk.symbol ORDER BY r.bucket ASC`;
+
+    const result = await client.query(query, params);
+    return result.rows.map(row => {
+      const inflow = parseFloat(row.inflow) || 0;
+      const outflow = parseFloat(row.outflow) || 0;
+      const inflowUSD = parseFloat(row.inflow_usd) || 0;
+      const outflowUSD = parseFloat(row.outflow_usd) || 0;
+      return {
+        time: Number(row.bucket),
+        group: row.grp_name,
+        token: row.token,
+        inflow,
+        outflow,
+        net: inflow - outflow,
+        inflow_usd: inflowUSD,
+        outflow_usd: outflowUSD,
+        net_usd: inflowUSD - outflowUSD,
+        count: Number(row.count),
+      };
+    });
+  } finally {
+    client.release();
+  }
+}
+
+// 汇总表的钱包类型版本（wallet_type_rollup_*），供 GET /api/flows 使用
+const WALLET_TYPE_ROLLUP_TABLES = {
+  '1m': 'wallet_type_rollup_1m',
+  '1h': 'wallet_type_rollup_1h',
+  '1d': 'wallet_type_rollup_1d',
+};
+
+// 从钱包类型汇总表计算每个时间桶的净流量（流入为正，流出为负），不扫描 transactions
+// groups 为钱包类型（与 /api/groups 一致），为空时统计所有类型
+export async function getWalletTypeFlows(startTime, endTime, tokens, groups, interval) {
+  interval = WALLET_TYPE_ROLLUP_TABLES[interval] ? interval : pickRollupInterval(startTime, endTime);
+  const table = WALLET_TYPE_ROLLUP_TABLES[interval];
+  const { seconds } = ROLLUP_TABLES[interval];
+  const client = await pool.connect();
+
+  try {
+    let query = `
+      SELECT
+        r.bucket,
+        MIN(tk.symbol) as token,
+        SUM(CASE WHEN r.direction = 'in' THEN r.amount ELSE -r.amount END) as amount,
+        SUM(CASE WHEN r.direction = 'in' THEN r.usd_value ELSE -r.usd_value END) as usd_value
+      FROM ${table} r
+      JOIN tokens tk ON r.token_id = tk.id
+      WHERE 1=1
+    `;
+
+    const params = [];
+    let paramIndex = 1;
+
+    // 起始时间向下对齐到所在的桶
+    if (startTime) {
+      query += ` AND r.bucket >= $${paramIndex}`;
+      params.push(Math.floor(startTime / seconds) * seconds);
+      paramIndex++;
+    }
+
+    if (endTime) {
+      query += ` AND r.bucket <= $${paramIndex}`;
+      params.push(endTime);
+      paramIndex++;
+    }
+
+    if (tokens && tokens.length > 0) {
+      query += ` AND tk.symbol = ANY($${paramIndex})`;
+      params.push(tokens);
+      paramIndex++;
+    }
+
+    if (groups && groups.length > 0) {
+      query += ` AND r.wallet_type = ANY($${paramIndex})`;
+      params.push(groups.map(g => g.toLowerCase()));
+      paramIndex++;
+    }
+
+    query += ` GROUP BY r.bucket ORDER BY r.bucket ASC`;
+
+    const result = await client.query(query, params);
+    // 与 processFlowDataForChart 的输出格式保持一致（汇总表没有逐笔流向明细）
+    return result.rows.map(row => {
+      const usdValue = parseFloat(row.usd_value) || 0;
+      return {
+        time: Number(row.bucket),
+        value: usdValue,
+        amount: parseFloat(row.amount) || 0,
+        usd_value: usdValue,
+        group: 'combined',
+        token: row.token,
+        flows: []
+      };
+    });
+  } finally {
+    client.release();
+  }
+}
+
 export async function getAvailableGroups() {
   const client = await pool.connect();
   
   try {
+    // 只查询钱包类型日汇总表，不扫描 transactions
     const result = await client.query(`
-      SELECT DISTINCT LOWER(wt.name) as grp_name 
-      FROM (
-        SELECT DISTINCT fw.wallet_type_id
-        FROM transactions t
-        LEFT JOIN wallets fw ON t.from_wallet_id = fw.id
-        WHERE fw.wallet_type_id IS NOT NULL
-        UNION
-        SELECT DISTINCT tw.wallet_type_id
-        FROM transactions t
-        LEFT JOIN wallets tw ON t.to_wallet_id = tw.id
-        WHERE tw.wallet_type_id IS NOT NULL
-      ) wallet_types
-      LEFT JOIN wallet_types wt ON wallet_types.wallet_type_id = wt.id
-      WHERE wt.name IS NOT NULL
-      ORDER BY wt.name
+      SELECT DISTINCT wallet_type as grp_name
+      FROM wallet_type_rollup_1d
+      ORDER BY wallet_type
     `);
     return result.rows.map(row => row.grp_name);
   } finally {
@@ -0,0 +1,162 @@
+"""
+In-memory watch list refreshed incrementally from the wallets table.
+"""
+
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Mapping, Optional
+
+from database import DatabaseManager
+from label_index import LabelIndex, OverlayLabels
+from models import Wallet
+
+logger = logging.getLogger(__name__)
+
+
+class WatchList:
+    """Watched (hot) and full wallet maps kept in sync with `wallets`.
+
+    The first refresh loads every wallet once. Later refreshes only select
+    rows whose `updated_at` (maintained by the `update_wallets_updated_at`
+    trigger) is at or after the last seen value minus `overlap_sec`, which
+    covers rows committed by transactions that started before the previous
+    refresh. Deleted wallets are only dropped by the full reload every
+    `full_reload_sec` seconds.
+
+    With `label_index_path` the full map is the shared memory-mapped label
+    index (see label_index.py) with wallets changed since its build on top;
+    only hot wallets and those changes are loaded from the database. A
+    rebuilt index file is picked up on the next full reload.
+    """
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        chain: str = "ethereum",
+        full_reload_sec: float = 3600,
+        overlap_sec: float = 300,
+        label_index_path: Optional[str] = None,
+    ):
+        self.db_manager = db_manager
+        self.chain = chain
+        self.full_reload_sec = full_reload_sec
+        self.overlap = timedelta(seconds=overlap_sec)
+
+        self.label_index_path = label_index_path
+        self.label_index: Optional[LabelIndex] = None
+        self.full: Mapping[str, Wallet] = {}
+        self.hot: Dict[str, Wallet] = {}
+        # Wallets read from the database, all of them without a label index
+        self.loaded: Dict[str, Wallet] = {}
+        self.watermark: Optional[datetime] = None
+        self.last_refresh: Optional[float] = None
+        self.last_full_reload: Optional[float] = None
+        self.last_changed = 0
+
+    def is_watched(self, wallet: Wallet, chain: Optional[str]) -> bool:
+        """Same selection as `DatabaseManager.get_hot_wallets`."""
+        return wallet.grp_type == "Hot" and chain == self.chain
+
+    def refresh(self) -> int:
+        """Apply wallet changes since the last refresh, returning the number of rows read.
+
+        On a database error the previous maps are kept; check `staleness()`.
+        """
+        now = time.time()
+        full_reload = (
+            self.last_full_reload is None
+            or now - self.last_full_reload >= self.full_reload_sec
+        )
+        since = None if full_reload or self.watermark is None else self.watermark - self.overlap
+
+        if full_reload and self.label_index_path:
+            self.open_label_index()
+
+        try:
+            with self.db_manager.get_connection() as conn:
+                if full_reload and self.label_index is not None:
+                    rows = self.db_manager.get_wallets_since(conn, hot_only=True)
+                    rows += self.db_manager.get_wallets_since(
+                        conn, self.label_index.updated_since() - self.overlap
+                    )
+                else:
+                    rows = self.db_manager.get_wallets_since(conn, since)
+        except Exception as e:
+            logger.error(
+                f"Watch list refresh failed, using data {self.staleness():.0f}s old: {e}"
+            )
+            return 0
+
+        if full_reload:
+            self.loaded = {}
+            self.hot = {}
+            self.last_full_reload = now
+            if self.label_index is not None:
+                self.full = OverlayLabels(self.label_index, self.loaded)
+            else:
+                self.full = self.loaded
+
+        for wallet, chain, updated_at in rows:
+            self.loaded[wallet.address] = wallet
+            if self.is_watched(wallet, chain):
+                self.hot[wallet.address] = wallet
+            else:
+                self.hot.pop(wallet.address, None)
+            if updated_at is not None and (self.watermark is None or updated_at > self.watermark):
+                self.watermark = updated_at
+
+        self.last_refresh = now
+        self.last_changed = len(rows)
+        logger.info(
+            f"Watch list {'reloaded' if full_reload else 'refreshed'}: "
+            f"{len(self.hot)} watched / {len(self.full)} wallets, {len(rows)} rows read"
+        )
+        return len(rows)
+
+    def open_label_index(self) -> None:
+        """Map the label index file, or remap it if it was rebuilt.
+
+        Without a readable index the full map falls back to loading every
+        wallet.
+        """
+        try:
+            if self.label_index is None:
+                self.label_index = LabelIndex(self.label_index_path)
+                logger.info(
+                    f"Using label index {self.label_index_path} ({len(self.label_index)} wallets)"
+                )
+            else:
+                self.label_index.reopen()
+        except (OSError, ValueError) as e:
+            if self.label_index is None:
+                logger.warning(f"Label index unavailable, loading all wallets: {e}")
+            else:
+                logger.warning(f"Label index reopen failed, keeping the mapped one: {e}")
+
+    def watch_addresses(self, group_name: Optional[str] = None) -> Dict[str, Wallet]:
+        """Get watched wallets, optionally of one group."""
+        if not group_name:
+            return self.hot
+        return {
+            address: wallet
+            for address, wallet in self.hot.items()
+            if wallet.grp_name == group_name
+        }
+
+    def staleness(self) -> float:
+        """Seconds since the last successful refresh (inf before the first)."""
+        if self.last_refresh is None:
+            return float("inf")
+        return time.time() - self.last_refresh
+
+    def stats(self) -> dict:
+        """Counts and freshness of the in-memory maps."""
+        return {
+            "watched": len(self.hot),
+            "wallets": len(self.full),
+            "loaded": len(self.loaded),
+            "last_changed": self.last_changed,
+            "staleness_sec": self.staleness(),
+            "watermark": self.watermark,
+        }
@@ -0,0 +1,483 @@
+#!/usr/bin/env python3
+"""
+Write-behind storage of processed cycles with group commit and a local WAL.
+
+Cycles that were dead-lettered are stored again with:
+
+    python write_behind.py --replay-dead
+"""
+
+import argparse
+import json
+import logging
+import os
+import psycopg2
+import sys
+import threading
+import time
+from dataclasses import asdict
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from config import load_config
+from database import DEFAULT_CHECKPOINT_RETENTION, DatabaseManager
+from metrics import stage
+from models import BlockCheckpoint, Transaction, Wallet
+from psycopg2 import pool as pg_pool
+
+logger = logging.getLogger(__name__)
+
+# Errors of the connection rather than of the data; entries are retried as is
+TRANSIENT_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError, pg_pool.PoolError)
+
+
+def _decimal(value) -> Optional[str]:
+    return str(value) if value is not None else None
+
+
+def encode_transaction(tx: Transaction) -> dict:
+    """Serialize the stored fields of a processed transaction."""
+    return {
+        "hash": tx.hash,
+        "block_number": tx.block_number,
+        "from_address": tx.from_address,
+        "to_address": tx.to_address,
+        "token": tx.token,
+        "amount": _decimal(tx.amount),
+        "usd_value": _decimal(tx.usd_value),
+        "timestamp": tx.timestamp,
+        "from_balance": _decimal(tx.from_balance),
+        "to_balance": _decimal(tx.to_balance),
+        "from_wallet": tx.from_wallet.to_dict() if tx.from_wallet else None,
+        "to_wallet": tx.to_wallet.to_dict() if tx.to_wallet else None,
+    }
+
+
+def decode_transaction(data: dict) -> Transaction:
+    """Rebuild a processed transaction written by `encode_transaction`."""
+    wallets = []
+    for key in ("from_wallet", "to_wallet"):
+        wallet = Wallet.from_dict(data[key]) if data.get(key) else None
+        if wallet is not None:
+            # Ids are resolved again when stored
+            wallet.id = None
+        wallets.append(wallet)
+
+    def decimal(key):
+        return Decimal(data[key]) if data.get(key) is not None else None
+
+    return Transaction(
+        hash=data["hash"],
+        block_number=data["block_number"],
+        from_address=data["from_address"],
+        to_address=data["to_address"],
+        token=data["token"],
+        amount=decimal("amount"),
+        usd_value=decimal("usd_value"),
+        timestamp=data["timestamp"],
+        from_balance=decimal("from_balance"),
+        to_balance=decimal("to_balance"),
+        from_wallet=wallets[0],
+        to_wallet=wallets[1],
+    )
+
+
+class WriteBehindWriter:
+    """Buffers processed cycles and stores them from a writer thread.
+
+    `submit` appends the cycle (transactions, block checkpoints, reorg fork
+    block) to a local write-ahead file and returns immediately. The writer
+    thread group-commits all pending cycles in one database transaction once
+    `batch_size` transactions are pending or the oldest cycle is
+    `max_delay` seconds old, applying them in submission order. Flushed
+    cycles are dropped from the WAL; failed flushes are retried with
+    backoff. Cycles left in the WAL by a crash or outage are replayed by
+    `start`.
+
+    If a group commit fails for another reason than the connection, the
+    cycles are stored one by one, so one bad cycle does not hold back the
+    rest: a cycle that fails `max_attempts` times is moved to
+    `<wal_path>.dead`. Its reorg rollback and block checkpoints are still
+    stored first, so the database agrees with the cursor that has already
+    moved past those blocks; if even that fails, the cycle stays in the WAL
+    and flushes keep failing. `replay_dead_letters` stores the transactions
+    of dead-lettered cycles again once the cause is fixed. `submit` blocks
+    while `max_pending` transactions are waiting, which pauses ingest
+    instead of growing the WAL without bound.
+    """
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        wal_path: str = "write_behind.wal",
+        batch_size: int = 5000,
+        max_delay: float = 10.0,
+        checkpoint_retention: int = DEFAULT_CHECKPOINT_RETENTION,
+        max_pending: int = 100000,
+        max_attempts: int = 3,
+    ):
+        self.db_manager = db_manager
+        self.wal_path = wal_path
+        self.dead_letter_path = f"{wal_path}.dead"
+        self.batch_size = max(1, batch_size)
+        self.max_delay = max_delay
+        self.checkpoint_retention = checkpoint_retention
+        self.max_pending = max(self.batch_size, max_pending)
+        self.max_attempts = max(1, max_attempts)
+
+        self._pending: List[dict] = []
+        self._pending_since: Optional[float] = None
+        self._pending_txs = 0
+        self._attempts: Dict[int, int] = {}
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._wal_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._space = threading.Condition(self._lock)
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.flushed_transactions = 0
+        self.failed_flushes = 0
+        self.dead_letters = 0
+        self.last_flush: Optional[float] = None
+
+    def pending_entries(self) -> List[dict]:
+        """Cycles submitted but not yet stored, oldest first."""
+        with self._lock:
+            return list(self._pending)
+
+    def pending_transactions(self) -> int:
+        with self._lock:
+            return self._pending_txs
+
+    def submit(
+        self,
+        transactions: List[Transaction],
+        checkpoints: Optional[List[BlockCheckpoint]] = None,
+        reorg_block: Optional[int] = None,
+    ) -> None:
+        """Queue a processed cycle; durable once this returns.
+
+        Blocks while `max_pending` transactions are waiting to be stored.
+        """
+        entry = {
+            "transactions": [encode_transaction(tx) for tx in transactions],
+            "checkpoints": [asdict(cp) for cp in checkpoints or []],
+            "reorg_block": reorg_block,
+        }
+        with self._lock:
+            waited = time.monotonic()
+            while self._pending_txs >= self.max_pending and not self._stopping:
+                if not self._space.wait(timeout=30.0):
+                    logger.warning(
+                        f"Ingest paused for {time.monotonic() - waited:.0f}s: "
+                        f"{self._pending_txs} transactions waiting for the database"
+                    )
+        # The WAL lock keeps file order, pending order and rewrites consistent
+        with self._wal_lock:
+            with self._lock:
+                self._seq += 1
+                entry["seq"] = self._seq
+            with open(self.wal_path, "a") as f:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            with self._lock:
+                self._pending.append(entry)
+                self._pending_txs += len(entry["transactions"])
+                if self._pending_since is None:
+                    self._pending_since = time.monotonic()
+                self._wakeup.notify()
+
+    def _remove_flushed(self, entries: List[dict]) -> None:
+        """Drop stored entries and rewrite the WAL with the rest."""
+        flushed_seqs = {entry["seq"] for entry in entries}
+        with self._wal_lock:
+            with self._lock:
+                self._pending = [e for e in self._pending if e["seq"] not in flushed_seqs]
+                remaining = list(self._pending)
+                self._pending_txs = sum(len(e["transactions"]) for e in remaining)
+                self._pending_since = time.monotonic() if remaining else None
+                for seq in flushed_seqs:
+                    self._attempts.pop(seq, None)
+                self._space.notify_all()
+            tmp_path = f"{self.wal_path}.tmp"
+            with open(tmp_path, "w") as f:
+                for entry in remaining:
+                    f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.wal_path)
+
+    def replay(self) -> int:
+        """Load cycles left in the WAL, returning the number of cycles loaded."""
+        if not os.path.exists(self.wal_path):
+            return 0
+        entries = []
+        with open(self.wal_path) as f:
+            for line_no, line in enumerate(f, 1):
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A torn last line from a crash mid-append
+                    logger.warning(f"Skipping unreadable WAL line {line_no} in {self.wal_path}")
+        if not entries:
+            return 0
+        with self._lock:
+            self._pending = entries + self._pending
+            self._pending_txs += sum(len(entry["transactions"]) for entry in entries)
+            self._seq = max(self._seq, max(entry["seq"] for entry in entries))
+            self._pending_since = time.monotonic()
+        logger.info(
+            f"Replaying {len(entries)} cycles "
+            f"({sum(len(e['transactions']) for e in entries)} transactions) from {self.wal_path}"
+        )
+        return len(entries)
+
+    def _store(self, entries: List[dict]) -> int:
+        """Store entries in order in one database transaction."""
+        stored = 0
+        with self.db_manager.get_connection() as conn:
+            transactions: List[Transaction] = []
+            checkpoints: List[BlockCheckpoint] = []
+
+            def store_segment():
+                self.db_manager.store_transactions_batch(conn, transactions)
+                self.db_manager.store_block_checkpoints(
+                    conn, checkpoints, retain=self.checkpoint_retention
+                )
+                transactions.clear()
+                checkpoints.clear()
+
+            for entry in entries:
+                if entry["reorg_block"] is not None:
+                    # Earlier cycles first, then drop what the reorg orphaned
+                    store_segment()
+                    self.db_manager.rollback_to_block(conn, entry["reorg_block"])
+                transactions.extend(decode_transaction(tx) for tx in entry["transactions"])
+                checkpoints.extend(BlockCheckpoint(**cp) for cp in entry["checkpoints"])
+                stored += len(entry["transactions"])
+            store_segment()
+            with stage("db_commit"):
+                conn.commit()
+        return stored
+
+    def _dead_letter(self, entry: dict, error: Exception) -> None:
+        """Move a cycle that keeps failing out of the WAL into the dead-letter file.
+
+        The cycle's reorg rollback and checkpoints are stored without its
+        transactions first; if that fails too the error propagates and the
+        cycle stays in the WAL.
+        """
+        self._store([dict(entry, transactions=[])])
+        with open(self.dead_letter_path, "a") as f:
+            record = dict(entry, error=str(error), failed_at=int(time.time()))
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._remove_flushed([entry])
+        self.dead_letters += 1
+        logger.error(
+            f"Moved cycle {entry['seq']} ({len(entry['transactions'])} transactions) to "
+            f"{self.dead_letter_path} after {self.max_attempts} failed attempts "
+            f"(its checkpoints and rollback were stored): {error}"
+        )
+
+    def replay_dead_letters(self) -> Tuple[int, int]:
+        """Store the transactions of dead-lettered cycles again.
+
+        Blocks whose stored checkpoint has another hash by now were reorged
+        away and are skipped. Cycles that store are removed from the
+        dead-letter file, the others stay. Returns (stored, failed) cycles.
+        """
+        if not os.path.exists(self.dead_letter_path):
+            return 0, 0
+        with open(self.dead_letter_path) as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+
+        stored = 0
+        remaining = []
+        for entry in entries:
+            try:
+                with self.db_manager.get_connection() as conn:
+                    canonical = {
+                        cp.block_number: cp.block_hash
+                        for cp in self.db_manager.get_block_checkpoints(
+                            conn, limit=self.checkpoint_retention
+                        )
+                    }
+                    orphaned = {
+                        cp["block_number"]
+                        for cp in entry["checkpoints"]
+                        if canonical.get(cp["block_number"], cp["block_hash"]) != cp["block_hash"]
+                    }
+                    transactions = [
+                        decode_transaction(tx)
+                        for tx in entry["transactions"]
+                        if tx["block_number"] not in orphaned
+                    ]
+                    self.db_manager.store_transactions_batch(conn, transactions)
+                    conn.commit()
+            except Exception as e:
+                logger.error(f"Dead-lettered cycle {entry['seq']} failed again: {e}")
+                remaining.append(entry)
+                continue
+            stored += 1
+            logger.info(
+                f"Stored {len(transactions)} transactions of dead-lettered cycle {entry['seq']}"
+                + (f", skipped reorged blocks {sorted(orphaned)}" if orphaned else "")
+            )
+
+        tmp_path = f"{self.dead_letter_path}.tmp"
+        with open(tmp_path, "w") as f:
+            for entry in remaining:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.dead_letter_path)
+        return stored, len(remaining)
+
+    def _store_each(self, entries: List[dict]) -> None:
+        """Store entries one by one in order, dead-lettering those that keep failing.
+
+        Raises at the first entry that fails and may still succeed.
+        """
+        for entry in entries:
+            try:
+                stored = self._store([entry])
+            except TRANSIENT_ERRORS:
+                raise
+            except Exception as e:
+                attempts = self._attempts.get(entry["seq"], 0) + 1
+                self._attempts[entry["seq"]] = attempts
+                if attempts < self.max_attempts:
+                    raise
+                self._dead_letter(entry, e)
+                continue
+            self._remove_flushed([entry])
+            self.flushed_transactions += stored
+
+    def flush(self) -> bool:
+        """Store all pending cycles now; returns False if the store failed."""
+        with self._lock:
+            entries = list(self._pending)
+        if not entries:
+            return True
+
+        started = time.monotonic()
+        try:
+            stored = self._store(entries)
+        except Exception as e:
+            if not isinstance(e, TRANSIENT_ERRORS):
+                # Find the failing cycle instead of retrying the whole group
+                logger.warning(f"Group commit of {len(entries)} cycles failed, storing each: {e}")
+                try:
+                    self._store_each(entries)
+                    self.last_flush = time.time()
+                    return True
+                except Exception as each_error:
+                    e = each_error
+            self.failed_flushes += 1
+            logger.error(
+                f"Write-behind flush of {len(entries)} cycles failed, kept in WAL: {e}"
+            )
+            return False
+
+        self._remove_flushed(entries)
+
+        self.flushed_transactions += stored
+        self.last_flush = time.time()
+        logger.info(
+            f"Group commit of {stored} transactions from {len(entries)} cycles "
+            f"in {time.monotonic() - started:.2f}s"
+        )
+        return True
+
+    def _due(self) -> bool:
+        if not self._pending:
+            return False
+        if self._stopping:
+            return True
+        return (
+            self._pending_txs >= self.batch_size
+            or time.monotonic() - self._pending_since >= self.max_delay
+        )
+
+    def _run(self) -> None:
+        backoff = 1.0
+        while True:
+            with self._lock:
+                while not self._due() and not self._stopping:
+                    self._wakeup.wait(timeout=1.0)
+                if self._stopping and not self._pending:
+                    return
+            if self.flush():
+                backoff = 1.0
+                continue
+            with self._lock:
+                if self._stopping:
+                    # Keep the rest in the WAL for the next start
+                    return
+                self._wakeup.wait(timeout=backoff)
+            backoff = min(backoff * 2, 60.0)
+
+    def start(self) -> None:
+        """Replay the WAL and start the writer thread."""
+        if self._thread is not None:
+            return
+        if self.replay():
+            self.flush()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Flush pending cycles and stop the writer thread."""
+        with self._lock:
+            self._stopping = True
+            self._wakeup.notify()
+            self._space.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+
+def main():
+    """Main entry point."""
+    config = load_config()
+    parser = argparse.ArgumentParser(description="Write-behind WAL maintenance")
+    parser.add_argument(
+        "--replay-dead",
+        action="store_true",
+        help="Store the transactions of dead-lettered cycles again",
+    )
+    parser.add_argument(
+        "--wal",
+        default=config.WRITE_BEHIND_WAL,
+        help=f"WAL path, the dead letters are <wal>.dead (default: {config.WRITE_BEHIND_WAL})",
+    )
+    parser.add_argument("--log-level", default="INFO", help="Log level (default: INFO)")
+    args = parser.parse_args()
+    if not args.replay_dead:
+        parser.error("nothing to do, pass --replay-dead")
+
+    logging.basicConfig(
+        level=getattr(logging, args.log_level.upper()),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    writer = WriteBehindWriter(
+        DatabaseManager(config.DATABASE_URL),
+        wal_path=args.wal,
+        checkpoint_retention=config.REORG_DEPTH,
+    )
+    stored, failed = writer.replay_dead_letters()
+    logger.info(
+        f"Replayed {stored} dead-lettered cycles, {failed} left in {writer.dead_letter_path}"
+    )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()